@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import TriageJob
+
+@admin.register(TriageJob)
+class TriageJobAdmin(admin.ModelAdmin):
+    list_display = ['concern', 'status', 'attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['result', 'last_error']
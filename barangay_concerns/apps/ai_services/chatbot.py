@@ -1,10 +1,22 @@
 
 import google.generativeai as genai
 from django.conf import settings
+import asyncio
 import logging
+import queue
+import threading
+import time
+from .faq_cache import get_faq_cache, is_personal
 
 logger = logging.getLogger(__name__)
 
+UNAVAILABLE_MESSAGE = "I'm sorry, my connection to the AI service is currently unavailable. Please contact the administrator."
+ERROR_MESSAGE = "I apologize, but I'm having trouble thinking right now. Please try again later."
+TIMEOUT_MESSAGE = "Sorry, that took too long to answer. Please try again."
+
+_model = None
+_model_key = None
+
 def configure_genai():
     """Configures the Gemini API client."""
     if not settings.GEMINI_API_KEY:
@@ -14,6 +26,24 @@ def configure_genai():
     genai.configure(api_key=settings.GEMINI_API_KEY)
     return True
 
+def get_chat_model():
+    """The chatbot model, reused across requests (None without an API key)."""
+    global _model, _model_key
+    key = (settings.AI_MODEL_BACKEND, settings.GEMINI_API_KEY, settings.CHATBOT_MODEL)
+    if _model is not None and _model_key == key:
+        return _model
+
+    if settings.AI_MODEL_BACKEND == 'fake':
+        from .fake import FakeGenerativeModel
+        model = FakeGenerativeModel()
+    elif not configure_genai():
+        return None
+    else:
+        model = genai.GenerativeModel(settings.CHATBOT_MODEL)
+
+    _model, _model_key = model, key
+    return model
+
 SYSTEM_PROMPT = """
 You are "Barangay Bot", a helpful AI assistant for the Barangay Connect Platform.
 Your goal is to assist residents with community concerns and platform features.
@@ -60,21 +90,174 @@ LIMITATIONS:
 Tone: Friendly, community-focused, and respectful.
 """
 
-def generate_chat_response(message):
-    """Generates a response from Gemini."""
-    if not configure_genai():
-        return "I'm sorry, my connection to the AI service is currently unavailable. Please contact the administrator."
+def build_prompt(message):
+    # Gemini Pro doesn't separate system prompt strongly yet, so we prepend it.
+    return f"{SYSTEM_PROMPT}\n\nUser: {message}\nAssistant:"
+
+def cache_scope(message, user=None):
+    """
+    FAQ cache scope of ``message``: '' (shared) for general questions, the
+    user's own scope for personal ones, and None (not cached) for personal
+    questions from anonymous visitors.
+    """
+    if not is_personal(message):
+        return ''
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return None
+
+def generate_chat_response(message, user=None):
+    """Generates a response from Gemini, answering repeat questions from the FAQ cache."""
+    cache = get_faq_cache()
+    scope = cache_scope(message, user)
+    cached = cache.get(message, scope) if scope is not None else None
+    if cached is not None:
+        return cached
+
+    model = get_chat_model()
+    if not model:
+        return UNAVAILABLE_MESSAGE
 
     try:
-        # gemini-flash-latest is the safest alias for the current library version/quota
-        model = genai.GenerativeModel('gemini-flash-latest')
-        
-        # Construct prompt with system context
-        # Note: Gemini Pro doesn't separate system prompt strongly yet, so we prepend it.
-        full_prompt = f"{SYSTEM_PROMPT}\n\nUser: {message}\nAssistant:"
-        
-        response = model.generate_content(full_prompt)
+        response = model.generate_content(build_prompt(message))
+        # Only real answers are cached, never the apologies below
+        if scope is not None:
+            cache.set(message, response.text, scope)
         return response.text
     except Exception as e:
         logger.error(f"Gemini API Error: {e}")
-        return "I apologize, but I'm having trouble thinking right now. Please try again later."
+        return ERROR_MESSAGE
+
+def _cancel(response):
+    """Stop a streaming Gemini call (a gRPC stream) if it is still open."""
+    cancel = getattr(getattr(response, '_iterator', None), 'cancel', None)
+    if cancel:
+        cancel()
+
+def _produce(model, prompt, put, stop, call):
+    """Thread body: ``put`` each streamed text chunk, then None (or the error)."""
+    try:
+        response = call['response'] = model.generate_content(prompt, stream=True)
+        for chunk in response:
+            if stop.is_set():
+                _cancel(response)
+                return
+            if chunk.text:
+                put(chunk.text)
+        put(None)
+    except Exception as e:
+        put(e)
+
+def _start_producer(model, message, put):
+    stop = threading.Event()
+    call = {}
+    threading.Thread(
+        target=_produce, args=(model, build_prompt(message), put, stop, call), name='chatbot-stream', daemon=True
+    ).start()
+    return stop, call
+
+def _stop_producer(stop, call):
+    stop.set()
+    if 'response' in call:
+        _cancel(call['response'])
+
+def stream_chat_response(message, user=None):
+    """
+    Yield the answer to ``message`` piece by piece as Gemini writes it.
+
+    A cached answer comes back as a single piece. The model runs on its own
+    thread so the wait for each piece is bounded by ``CHATBOT_STREAM_TIMEOUT``
+    in total; after that, or when the caller closes the generator (the client
+    went away), the model call is cancelled and the request finishes.
+    Complete answers are added to the FAQ cache (see ``cache_scope``).
+    """
+    cache = get_faq_cache()
+    scope = cache_scope(message, user)
+    cached = cache.get(message, scope) if scope is not None else None
+    if cached is not None:
+        yield cached
+        return
+
+    model = get_chat_model()
+    if not model:
+        yield UNAVAILABLE_MESSAGE
+        return
+
+    chunks = queue.Queue()
+    stop, call = _start_producer(model, message, chunks.put)
+    deadline = time.monotonic() + settings.CHATBOT_STREAM_TIMEOUT
+    parts = []
+    try:
+        while True:
+            try:
+                chunk = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                logger.warning("Chatbot stream timed out after %ss", settings.CHATBOT_STREAM_TIMEOUT)
+                yield ("\n\n" if parts else "") + TIMEOUT_MESSAGE
+                return
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                logger.error(f"Gemini API Error: {chunk}")
+                yield ("\n\n" if parts else "") + ERROR_MESSAGE
+                return
+            parts.append(chunk)
+            yield chunk
+    finally:
+        # Also runs on GeneratorExit when the response is closed early
+        _stop_producer(stop, call)
+    if scope is not None:
+        cache.set(message, ''.join(parts), scope)
+
+async def astream_chat_response(message, user=None):
+    """
+    ``stream_chat_response`` for async views: the same pieces, timeout and
+    caching, but waiting for the model holds no server thread, and each
+    piece is yielded the moment the model thread hands it over. Closing or
+    cancelling the generator (see config/streaming.py) cancels the model call.
+    """
+    cache = get_faq_cache()
+    scope = cache_scope(message, user)
+    cached = cache.get(message, scope) if scope is not None else None
+    if cached is not None:
+        yield cached
+        return
+
+    model = get_chat_model()
+    if not model:
+        yield UNAVAILABLE_MESSAGE
+        return
+
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(chunks.put_nowait, item)
+        except RuntimeError:
+            pass  # The loop is gone; nobody is listening any more
+
+    stop, call = _start_producer(model, message, put)
+    deadline = time.monotonic() + settings.CHATBOT_STREAM_TIMEOUT
+    parts = []
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.get(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                logger.warning("Chatbot stream timed out after %ss", settings.CHATBOT_STREAM_TIMEOUT)
+                yield ("\n\n" if parts else "") + TIMEOUT_MESSAGE
+                return
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                logger.error(f"Gemini API Error: {chunk}")
+                yield ("\n\n" if parts else "") + ERROR_MESSAGE
+                return
+            parts.append(chunk)
+            yield chunk
+    finally:
+        # Also runs on CancelledError when the client disconnects
+        _stop_producer(stop, call)
+    if scope is not None:
+        cache.set(message, ''.join(parts), scope)
@@ -0,0 +1,80 @@
+# apps/ai_services/fake.py
+"""
+Offline stand-in for ``genai.GenerativeModel`` (``AI_MODEL_BACKEND = 'fake'``).
+
+Answers the single and batched analysis prompts of ``utils`` with keyword
+rules, so triage and ``retriage`` can run without network access or an API
+key, and gives the chatbot a canned reply (streamed word by word with
+``stream=True``). ``AI_FAKE_LATENCY`` adds a per-call delay to mimic the
+real service.
+"""
+import json
+import re
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+FakeUsage = namedtuple('FakeUsage', 'prompt_token_count candidates_token_count total_token_count')
+
+KEYWORDS = (
+    ('FLOOD', ('flood', 'baha', 'drainage', 'canal', 'clogged')),
+    ('ROAD', ('pothole', 'road', 'bridge', 'sidewalk', 'highway')),
+    ('WASTE', ('garbage', 'trash', 'basura', 'uncollected')),
+    ('ELECTRICITY', ('brownout', 'power', 'outage', 'streetlight', 'kuryente')),
+    ('WATER', ('water', 'leak', 'pipe', 'tubig')),
+    ('SAFETY', ('crime', 'fight', 'theft', 'loitering', 'fire', 'sunog')),
+)
+URGENT_WORDS = ('fire', 'sunog', 'drowning', 'collapsed', 'emergency', 'injured')
+HIGH_WORDS = ('flood', 'crime', 'outage', 'dengue', 'landslide', 'typhoon')
+CHAT_REPLY = (
+    'You asked: "{question}". To report a problem, click "Report Concern", describe it, '
+    'pick a category and pin the location. You can follow its status from your dashboard.'
+)
+
+
+class FakeResponse:
+    def __init__(self, text, prompt):
+        self.text = text
+        self.usage_metadata = FakeUsage(len(prompt) // 4, len(text) // 4, (len(prompt) + len(text)) // 4)
+
+
+class FakeGenerativeModel:
+    def classify(self, title, description):
+        text = f'{title} {description}'.lower()
+        category = next((code for code, words in KEYWORDS if any(word in text for word in words)), 'OTHER')
+        if any(word in text for word in URGENT_WORDS):
+            priority = 'URGENT'
+        elif any(word in text for word in HIGH_WORDS):
+            priority = 'HIGH'
+        else:
+            priority = 'MEDIUM' if category != 'OTHER' else 'LOW'
+        return {'category': category, 'priority': priority, 'reasoning': f'Keyword match suggests {category.lower()}.'}
+
+    def answer(self, prompt):
+        question = re.search(r'User: (.*)\nAssistant:$', prompt, re.DOTALL)
+        if question:
+            return CHAT_REPLY.format(question=question.group(1).strip())
+        batch = re.search(r'Reports \(JSON array\):\s*(\[.*?\])\s*Respond', prompt, re.DOTALL)
+        if batch:
+            return json.dumps([
+                dict(self.classify(report['title'], report['description']), id=report['id'])
+                for report in json.loads(batch.group(1))
+            ])
+        title = re.search(r'Report Title: (.*)', prompt)
+        description = re.search(r'Report Description: (.*)', prompt)
+        return json.dumps(self.classify(title.group(1) if title else '', description.group(1) if description else ''))
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream(prompt)
+        if settings.AI_FAKE_LATENCY:
+            time.sleep(settings.AI_FAKE_LATENCY)
+        return FakeResponse(self.answer(prompt), prompt)
+
+    def _stream(self, prompt):
+        words = re.findall(r'\S+\s*', self.answer(prompt))
+        for word in words:
+            if settings.AI_FAKE_LATENCY:
+                time.sleep(settings.AI_FAKE_LATENCY / len(words))
+            yield FakeResponse(word, prompt)
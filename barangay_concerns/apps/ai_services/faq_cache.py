@@ -0,0 +1,173 @@
+# apps/ai_services/faq_cache.py
+"""
+In-process answer cache for the Barangay Bot.
+
+Residents keep asking the same few questions in slightly different words.
+A lookup first tries the normalised question as an exact key, then the
+most similar cached question by TF-IDF cosine similarity, and accepts it
+above ``CHATBOT_CACHE_SIMILARITY``. Entries expire after
+``CHATBOT_CACHE_TTL`` seconds and the least recently used entry is evicted
+beyond ``CHATBOT_CACHE_SIZE``. Each gunicorn worker has its own cache.
+
+Answers are shared between residents only for general questions. One
+that talks about the asker's own things ("my concern", numbers, email
+addresses; see ``is_personal``) is stored under a scope (the user) and
+only ever matched within it.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+TOKEN_RE = re.compile(r'\w+')
+# Words that say nothing about which question was asked (English and Filipino)
+STOP_WORDS = frozenset((
+    'a', 'an', 'the', 'i', 'me', 'my', 'we', 'you', 'it', 'is', 'are', 'am', 'be', 'do', 'does',
+    'can', 'could', 'to', 'of', 'in', 'on', 'for', 'and', 'or', 'please', 'pls', 'what', 'how',
+    'ang', 'ng', 'sa', 'na', 'po', 'ko', 'ba', 'paano', 'ano', 'mga', 'yung', 'lang', 'mag',
+))
+
+
+# Words that make a question about the asker's own reports or account
+PERSONAL_WORDS = frozenset((
+    'my', 'mine', 'our', 'ours', 'ko', 'akin', 'aking', 'amin', 'aming', 'namin', 'natin', 'atin',
+))
+
+
+def is_personal(question):
+    """Whether the answer may depend on who asks (own things, ids, dates, contact details)."""
+    words = TOKEN_RE.findall(question.lower())
+    return '@' in question or any(word in PERSONAL_WORDS or any(char.isdigit() for char in word) for word in words)
+
+
+def normalise(question):
+    """Lowercase word tokens joined by single spaces."""
+    return ' '.join(TOKEN_RE.findall(question.lower()))
+
+
+def terms(question):
+    return Counter(word for word in TOKEN_RE.findall(question.lower()) if word not in STOP_WORDS)
+
+
+class Entry:
+    __slots__ = ('answer', 'terms', 'expires_at', 'hits')
+
+    def __init__(self, answer, question_terms, expires_at):
+        self.answer = answer
+        self.terms = question_terms
+        self.expires_at = expires_at
+        self.hits = 0
+
+
+class FAQCache:
+    def __init__(self, max_entries, ttl, similarity):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()
+        self._document_frequency = Counter()
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._document_frequency.subtract(entry.terms.keys())
+
+    def _vector(self, question_terms):
+        total = len(self._entries) + 1
+        vector = {
+            term: count * (math.log(total / (1 + self._document_frequency[term])) + 1)
+            for term, count in question_terms.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def _most_similar(self, question_terms, scope):
+        query = self._vector(question_terms)
+        best_key, best_score = None, 0.0
+        for key, entry in self._entries.items():
+            if key[0] != scope:
+                continue
+            candidate = self._vector(entry.terms)
+            score = sum(weight * candidate.get(term, 0.0) for term, weight in query.items())
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def get(self, question, scope=''):
+        """Cached answer for ``question`` among the entries of ``scope`` ('' = shared), or None."""
+        key = (scope, normalise(question))
+        now = time.monotonic()
+        with self._lock:
+            for expired in [k for k, entry in self._entries.items() if entry.expires_at <= now]:
+                self._remove(expired)
+                self.counters['expired'] += 1
+
+            kind = 'exact_hits'
+            if key not in self._entries:
+                kind = 'similar_hits'
+                question_terms = terms(question)
+                key, score = self._most_similar(question_terms, scope) if question_terms else (None, 0.0)
+                if score < self.similarity:
+                    self.counters['misses'] += 1
+                    return None
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.counters[kind] += 1
+            return entry.answer
+
+    def set(self, question, answer, scope=''):
+        key = (scope, normalise(question))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            question_terms = terms(question)
+            self._entries[key] = Entry(answer, question_terms, time.monotonic() + self.ttl)
+            self._document_frequency.update(question_terms.keys())
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.counters['evicted'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._document_frequency.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.counters['exact_hits'] + self.counters['similar_hits']
+            lookups = hits + self.counters['misses']
+            return {
+                'entries': len(self._entries),
+                'lookups': lookups,
+                'exact_hits': self.counters['exact_hits'],
+                'similar_hits': self.counters['similar_hits'],
+                'misses': self.counters['misses'],
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'evicted': self.counters['evicted'],
+                'expired': self.counters['expired'],
+                # Shared questions only; scoped ones are private to their asker
+                'top_questions': [
+                    {'question': key[1], 'hits': entry.hits}
+                    for key, entry in sorted(self._entries.items(), key=lambda item: -item[1].hits)
+                    if not key[0]
+                ][:10],
+            }
+
+
+_cache = None
+
+
+def get_faq_cache():
+    global _cache
+    if _cache is None:
+        _cache = FAQCache(
+            max_entries=settings.CHATBOT_CACHE_SIZE,
+            ttl=settings.CHATBOT_CACHE_TTL,
+            similarity=settings.CHATBOT_CACHE_SIMILARITY,
+        )
+    return _cache
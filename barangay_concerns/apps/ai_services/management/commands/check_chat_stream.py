@@ -0,0 +1,102 @@
+# apps/ai_services/management/commands/check_chat_stream.py
+import asyncio
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.middleware.csrf import _get_new_csrf_string
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from apps.ai_services.faq_cache import get_faq_cache
+
+QUESTION = 'How do I file a concern about flooding on our street and attach photos to it?'
+
+
+class Command(BaseCommand):
+    help = (
+        'Posts a question to the streaming chatbot through the ASGI application with the '
+        'offline model and checks that pieces arrive while the model is still writing and '
+        'that a client disconnect cancels the model call'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=2.0, help='Seconds the fake model takes to answer')
+
+    def handle(self, *args, **options):
+        latency = options['latency']
+        with override_settings(AI_MODEL_BACKEND='fake', AI_FAKE_LATENCY=latency, CHATBOT_STREAM_TIMEOUT=latency * 5):
+            get_faq_cache().clear()
+            first, total, body = asyncio.run(self._post())
+            self.stdout.write(f'Full answer: first piece after {first:.2f}s, done after {total:.2f}s.')
+            if b'event: done' not in body:
+                raise CommandError('The stream ended without its done event.')
+            if first > total / 2:
+                raise CommandError(
+                    f'The first piece came {first:.2f}s into a {total:.2f}s answer; the response is being buffered.'
+                )
+
+            get_faq_cache().clear()
+            first, total, body = asyncio.run(self._post(disconnect=True))
+            time.sleep(latency / 4)
+            producing = any(thread.name == 'chatbot-stream' for thread in threading.enumerate())
+            self.stdout.write(f'Disconnect after the first piece: request finished after {total:.2f}s.')
+            if total > latency / 2:
+                raise CommandError(f'The request ran for {total:.2f}s after the client disconnected.')
+            if producing:
+                raise CommandError('The model call kept running after the client disconnected.')
+
+        self.stdout.write(self.style.SUCCESS('Chat stream OK.'))
+
+    async def _post(self, disconnect=False):
+        """
+        Call the ASGI application as a server would. Returns the seconds to
+        the first answer piece and to the end of the request, and the body.
+        """
+        from config.asgi import application
+
+        token = _get_new_csrf_string().encode()
+        path = reverse('ai_services:chat_stream')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'POST', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+            'headers': [
+                (b'host', b'localhost'), (b'content-type', b'application/json'),
+                (b'cookie', b'csrftoken=' + token), (b'x-csrftoken', token),
+            ],
+        }
+        body = json.dumps({'message': QUESTION}).encode()
+        first_piece = asyncio.Event()
+        requested = False
+        received = []
+        started = time.perf_counter()
+        first = None
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            if disconnect:
+                await first_piece.wait()
+            else:
+                await asyncio.Event().wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal first
+            if message['type'] == 'http.response.start' and message['status'] != 200:
+                raise CommandError(f"The chat stream answered {message['status']}.")
+            if message['type'] == 'http.response.body' and b'"text"' in message.get('body', b''):
+                if first is None:
+                    first = time.perf_counter() - started
+                    first_piece.set()
+            if message['type'] == 'http.response.body':
+                received.append(message.get('body', b''))
+
+        await application(scope, receive, send)
+        if first is None:
+            raise CommandError('The chat stream sent no answer.')
+        return first, time.perf_counter() - started, b''.join(received)
@@ -0,0 +1,154 @@
+# apps/ai_services/management/commands/retriage.py
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from apps.ai_services.fake import FakeGenerativeModel
+from apps.ai_services.models import TriageJob
+from apps.ai_services.triage import apply_analysis
+from apps.ai_services.utils import analyze_concerns_batch, get_gemini_model
+from apps.concerns.models import ACTIVE_OPEN, Comment, Concern
+
+
+def untriaged_concerns():
+    """
+    Open concerns the AI never analysed: no job (or only a failed one) and
+    no ``[System AI]`` comment, which concerns analysed inline before the
+    job queue existed have. Queued and running jobs belong to the workers.
+    """
+    ai_comment = Comment.objects.filter(concern=OuterRef('pk'), content__contains='[System AI]')
+    return (
+        Concern.objects.filter(ACTIVE_OPEN)
+        .filter(Q(triage_job__isnull=True) | Q(triage_job__status='FAILED'))
+        .exclude(Exists(ai_comment))
+    )
+
+
+class Command(BaseCommand):
+    help = 'Runs batched AI triage for every open concern that was never analysed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20, help='Concerns per model call')
+        parser.add_argument('--workers', type=int, default=4, help='Model calls in flight at once')
+        parser.add_argument('--limit', type=int, help='Stop after this many concerns')
+        parser.add_argument('--fake', action='store_true', help='Use the offline keyword model')
+
+    def handle(self, *args, **options):
+        model = FakeGenerativeModel() if options['fake'] else get_gemini_model()
+        if model is None:
+            raise CommandError('GEMINI_API_KEY is not set; use --fake to run offline.')
+
+        size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+        total = untriaged_concerns().count()
+        if options['limit']:
+            total = min(total, options['limit'])
+        self.stdout.write(f'{total} concerns to triage in batches of up to {size}.')
+
+        totals = {'analysed': 0, 'prompt_tokens': 0, 'output_tokens': 0, 'failed_batches': 0}
+        started = time.perf_counter()
+        batches = self._batches(size, total)
+        # Worker threads only talk to the model; all database work stays here.
+        # Only ``workers`` batches are claimed and loaded at a time.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            number = 0
+            while True:
+                while len(in_flight) < workers:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    claimed_at = timezone.now()
+                    concerns = Concern.objects.in_bulk(self._claim(batch, claimed_at))
+                    if not concerns:
+                        continue
+                    number += 1
+                    reports = [(pk, concern.title, concern.description) for pk, concern in concerns.items()]
+                    future = pool.submit(analyze_concerns_batch, reports, model)
+                    in_flight[future] = (number, concerns, claimed_at)
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    number_done, concerns, claimed_at = in_flight.pop(future)
+                    analyses, metrics = future.result()
+                    self._finish(concerns, analyses, metrics, claimed_at)
+                    self._report(number_done, len(concerns), analyses, metrics)
+                    totals['analysed'] += len(analyses)
+                    totals['prompt_tokens'] += metrics['prompt_tokens']
+                    totals['output_tokens'] += metrics['output_tokens']
+                    totals['failed_batches'] += bool(metrics['error'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Triaged {totals['analysed']}/{total} concerns in {elapsed:.1f}s "
+            f"({totals['analysed'] / elapsed if elapsed else 0:.1f}/s), "
+            f"{totals['prompt_tokens']} prompt + {totals['output_tokens']} output tokens, "
+            f"{totals['failed_batches']} failed batches."
+        ))
+
+    def _batches(self, size, total):
+        """Lists of up to ``size`` concern ids, read by keyset as they are needed."""
+        last_id, remaining = 0, total
+        while remaining > 0:
+            ids = list(
+                untriaged_concerns().filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:min(size, remaining)]
+            )
+            if not ids:
+                return
+            last_id = ids[-1]
+            remaining -= len(ids)
+            yield ids
+
+    def _claim(self, ids, claimed_at):
+        """
+        Take the concerns' triage with a RUNNING job, as a worker claims a
+        queued one. Returns the ids claimed; a concern whose job was queued
+        in the meantime is left to the workers.
+        """
+        claimed = []
+        for pk in ids:
+            if TriageJob.objects.filter(concern_id=pk, status='FAILED').update(
+                status='RUNNING', locked_at=claimed_at, finished_at=None,
+            ):
+                claimed.append(pk)
+                continue
+            try:
+                with transaction.atomic():
+                    TriageJob.objects.create(concern_id=pk, status='RUNNING', locked_at=claimed_at)
+                claimed.append(pk)
+            except IntegrityError:
+                pass
+        return claimed
+
+    def _finish(self, concerns, analyses, metrics, claimed_at):
+        """
+        Apply the analyses and close the jobs, but only jobs still held by
+        this run: a call slow enough for the workers to requeue the job is
+        theirs to finish.
+        """
+        now = timezone.now()
+        for pk, concern in concerns.items():
+            ours = TriageJob.objects.filter(concern_id=pk, status='RUNNING', locked_at=claimed_at)
+            with transaction.atomic():
+                if pk in analyses:
+                    if ours.update(status='DONE', result=analyses[pk], last_error='', locked_at=None, finished_at=now):
+                        apply_analysis(concern, analyses[pk])
+                else:
+                    ours.update(
+                        status='FAILED', attempts=F('attempts') + 1, locked_at=None, finished_at=now,
+                        last_error=metrics['error'] or 'The AI service returned no analysis.',
+                    )
+
+    def _report(self, number, size, analyses, metrics):
+        tokens = f"{metrics['prompt_tokens']}+{metrics['output_tokens']} tokens{' (est.)' if metrics['estimated'] else ''}"
+        line = f"  batch {number}: {len(analyses)}/{size} analysed, {metrics['latency_ms']:.0f}ms, {tokens}"
+        if metrics['error']:
+            self.stdout.write(self.style.WARNING(f"{line} - {metrics['error']}"))
+        else:
+            self.stdout.write(line)
@@ -0,0 +1,20 @@
+# apps/ai_services/management/commands/run_triage_worker.py
+from django.core.management.base import BaseCommand
+
+from apps.ai_services.models import TriageJob
+from apps.ai_services.triage import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Runs the AI triage queue in this process (use with AI_TRIAGE_IN_PROCESS=False)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no job is queued')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Queued triage jobs: {TriageJob.objects.filter(status='QUEUED').count()}")
+        run_worker(exit_when_idle=options['once'])
+        counts = {status: TriageJob.objects.filter(status=status).count() for status, _ in TriageJob.STATUS_CHOICES}
+        self.stdout.write(self.style.SUCCESS(
+            'Queue drained: ' + ', '.join(f'{count} {status.lower()}' for status, count in counts.items())
+        ))
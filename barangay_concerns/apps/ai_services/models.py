@@ -0,0 +1,44 @@
+# apps/ai_services/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class TriageJob(models.Model):
+    """
+    Queue entry for the background AI triage of a concern (see triage.py).
+    The table is the queue, so no broker is needed.
+    """
+    STATUS_CHOICES = (
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    concern = models.OneToOneField(
+        'concerns.Concern',
+        on_delete=models.CASCADE,
+        related_name='triage_job'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Analysis as returned by the model: category, priority, reasoning
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='triage_job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"Triage of concern #{self.concern_id} - {self.get_status_display()}"
+
+    @property
+    def is_pending(self):
+        return self.status in ('QUEUED', 'RUNNING')
@@ -0,0 +1,211 @@
+# apps/ai_services/triage.py
+"""
+Background AI triage of new concerns.
+
+``enqueue`` stores a ``TriageJob`` row; worker threads claim queued rows
+with a conditional UPDATE (safe across threads and gunicorn processes),
+run ``analyze_concern`` under a timeout, then apply the suggested
+category/priority and post the ``[System AI]`` comment. Failed attempts are
+retried with exponential backoff up to ``AI_TRIAGE_MAX_ATTEMPTS``.
+
+With ``AI_TRIAGE_IN_PROCESS`` the web process starts up to
+``AI_TRIAGE_CONCURRENCY`` workers when a job is queued; they exit once the
+queue is empty. ``manage.py run_triage_worker`` runs the same loop as a
+separate process.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as CallTimeout
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import TriageJob
+from .utils import ai_available, analyze_concern
+
+logger = logging.getLogger(__name__)
+
+# Never sleep longer than this while waiting for a retry to come due
+MAX_IDLE_SLEEP = 60
+
+_workers = []
+_workers_lock = threading.Lock()
+_calls = None
+
+
+class TriageError(Exception):
+    """An attempt failed; the job is retried if attempts remain."""
+
+
+def enqueue(concern):
+    """Queue (or re-queue) AI triage for ``concern``."""
+    job, _ = TriageJob.objects.update_or_create(
+        concern=concern,
+        defaults={
+            'status': 'QUEUED',
+            'attempts': 0,
+            'run_after': timezone.now(),
+            'locked_at': None,
+            'result': None,
+            'last_error': '',
+            'finished_at': None,
+        },
+    )
+    if settings.AI_TRIAGE_IN_PROCESS:
+        transaction.on_commit(start_workers)
+    return job
+
+
+def _requeue_stale():
+    """Put back jobs whose worker died mid-call."""
+    cutoff = timezone.now() - timedelta(seconds=settings.AI_TRIAGE_TIMEOUT + 60)
+    TriageJob.objects.filter(status='RUNNING', locked_at__lt=cutoff).update(status='QUEUED', locked_at=None)
+
+
+def claim_next():
+    """Atomically take the oldest due job, or return None."""
+    _requeue_stale()
+    now = timezone.now()
+    candidates = TriageJob.objects.filter(status='QUEUED', run_after__lte=now).order_by('run_after', 'id')
+    for job_id in candidates.values_list('id', flat=True)[:10]:
+        # Only one worker can move the row out of QUEUED
+        claimed = TriageJob.objects.filter(id=job_id, status='QUEUED').update(status='RUNNING', locked_at=now)
+        if claimed:
+            return TriageJob.objects.select_related('concern', 'concern__reporter').get(id=job_id)
+    return None
+
+
+def _call_with_timeout(func, *args):
+    global _calls
+    if _calls is None:
+        # Timed-out calls keep their thread until the API gives up, hence the headroom
+        _calls = ThreadPoolExecutor(max_workers=settings.AI_TRIAGE_CONCURRENCY * 2, thread_name_prefix='ai-call')
+    future = _calls.submit(func, *args)
+    try:
+        return future.result(timeout=settings.AI_TRIAGE_TIMEOUT)
+    except CallTimeout:
+        raise TriageError(f'AI call timed out after {settings.AI_TRIAGE_TIMEOUT}s')
+
+
+def apply_analysis(concern, analysis):
+    """
+    Apply a suggested priority (if staff have not set one) and category (if
+    the concern is still filed under OTHER), and explain it in a
+    ``[System AI]`` comment. Call inside a transaction: the concern row is
+    locked and re-read first, so a change staff made since it was loaded
+    is never overwritten.
+    """
+    from apps.concerns.models import Comment, Concern
+
+    Concern.objects.select_for_update().filter(pk=concern.pk).exists()
+    concern.refresh_from_db(fields=['priority', 'category'])
+    # Reporters cannot pick a priority (ConcernForm has no such field), so
+    # anything but the default was chosen by staff and is left alone
+    reported_priority = Concern._meta.get_field('priority').default
+
+    suggested_priority = analysis.get('priority')
+    suggested_category = analysis.get('category')
+    update_fields = []
+    if concern.priority == reported_priority and suggested_priority in dict(Concern.PRIORITY_CHOICES):
+        concern.priority = suggested_priority
+        update_fields.append('priority')
+    if concern.category == 'OTHER' and suggested_category in dict(Concern.CATEGORY_CHOICES):
+        concern.category = suggested_category
+        update_fields.append('category')
+    if update_fields:
+        # Suppresses the priority-change notification, as when triage ran inline
+        concern._ai_triage = True
+        concern.save(update_fields=update_fields + ['updated_at'])
+
+    # Determine comment author (System/Admin if anon)
+    comment_author = concern.reporter or get_user_model().objects.filter(is_superuser=True).first()
+    if comment_author:
+        ai_message = (
+            f"AI analyzed this report. Suggested Category: {suggested_category}, "
+            f"Priority: {suggested_priority}. {analysis.get('reasoning', '')}"
+        )
+        Comment.objects.create(concern=concern, author=comment_author, content=f"🤖 [System AI] {ai_message}")
+
+
+def run_job(job):
+    """One attempt at ``job``: analyse, apply, and record the outcome."""
+    job.attempts += 1
+    try:
+        if not ai_available():
+            # Retrying cannot help until the key is configured
+            job.attempts = settings.AI_TRIAGE_MAX_ATTEMPTS
+            raise TriageError('GEMINI_API_KEY is not set.')
+        analysis = _call_with_timeout(analyze_concern, job.concern.title, job.concern.description)
+        if not analysis:
+            raise TriageError('The AI service returned no analysis.')
+        with transaction.atomic():
+            apply_analysis(job.concern, analysis)
+            job.status = 'DONE'
+            job.result = analysis
+            job.finished_at = timezone.now()
+            job.last_error = ''
+            job.save()
+    except Exception as e:
+        logger.warning('AI triage of concern #%s failed (attempt %s): %s', job.concern_id, job.attempts, e)
+        job.last_error = str(e)
+        if job.attempts >= settings.AI_TRIAGE_MAX_ATTEMPTS:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+        else:
+            job.status = 'QUEUED'
+            job.run_after = timezone.now() + timedelta(seconds=settings.AI_TRIAGE_RETRY_DELAY * 2 ** (job.attempts - 1))
+        job.locked_at = None
+        job.save()
+    return job
+
+
+def process_next():
+    """Claim and run one due job. Returns False when none was due."""
+    job = claim_next()
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def seconds_until_next_job():
+    """Seconds until the earliest queued job is due, or None if none is queued."""
+    run_after = TriageJob.objects.filter(status='QUEUED').order_by('run_after').values_list('run_after', flat=True).first()
+    if run_after is None:
+        return None
+    return max(0.0, (run_after - timezone.now()).total_seconds())
+
+
+def run_worker(exit_when_idle=True):
+    """Process jobs until the queue is empty (or forever)."""
+    while True:
+        close_old_connections()
+        if process_next():
+            continue
+        wait = seconds_until_next_job()
+        if wait is None and exit_when_idle:
+            return
+        time.sleep(min(wait if wait is not None else MAX_IDLE_SLEEP, MAX_IDLE_SLEEP) or 0.1)
+
+
+def _worker_main():
+    try:
+        run_worker()
+    except Exception:
+        logger.exception('AI triage worker crashed')
+    finally:
+        connection.close()
+
+
+def start_workers():
+    """Top the in-process pool up to ``AI_TRIAGE_CONCURRENCY`` live threads."""
+    with _workers_lock:
+        _workers[:] = [thread for thread in _workers if thread.is_alive()]
+        while len(_workers) < settings.AI_TRIAGE_CONCURRENCY:
+            thread = threading.Thread(target=_worker_main, name=f'ai-triage-{len(_workers)}', daemon=True)
+            thread.start()
+            _workers.append(thread)
@@ -6,4 +6,6 @@ app_name = 'ai_services'
 
 urlpatterns = [
     path('chat/', views.chat_api, name='chat_api'),
+    path('chat/stream/', views.chat_stream, name='chat_stream'),
+    path('chat/cache-stats/', views.chat_cache_stats, name='chat_cache_stats'),
 ]
@@ -2,21 +2,63 @@ import google.generativeai as genai
 from django.conf import settings
 import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+_model = None
+_model_key = None
+
+ANALYSIS_GUIDE = """
+    Categories:
+    - FLOOD (Flooding, drainage issues)
+    - ROAD (Potholes, broken path, obstruction)
+    - WASTE (Garbage, uncollected trash)
+    - ELECTRICITY (No power, broken street light)
+    - WATER (No water, leak, dirty water)
+    - SAFETY (Crime, drugs, fight, suspicious)
+    - HEALTH (Dengue, sickness, sanitation)
+    - OTHER (Anything else)
+
+    Priorities:
+    - LOW (Minor issue, no immediate danger)
+    - MEDIUM (Needs attention but not critical)
+    - HIGH (Significant breakage, health risk, or major inconvenience)
+    - URGENT (Immediate danger to life or property, severe flooding/fire/crime)
+"""
+
+def ai_available():
+    """True when analysis can run: the fake model, or Gemini with an API key."""
+    return settings.AI_MODEL_BACKEND == 'fake' or bool(getattr(settings, 'GEMINI_API_KEY', None))
+
 def get_gemini_model():
     """
-    Configure and return the Gemini model.
+    Configure and return the analysis model, reused across calls.
+    ``AI_MODEL_BACKEND = 'fake'`` swaps in the offline stand-in.
     """
-    if not hasattr(settings, 'GEMINI_API_KEY') or not settings.GEMINI_API_KEY:
+    global _model, _model_key
+    key = (settings.AI_MODEL_BACKEND, getattr(settings, 'GEMINI_API_KEY', None), settings.AI_ANALYSIS_MODEL)
+    if _model is not None and _model_key == key:
+        return _model
+
+    if settings.AI_MODEL_BACKEND == 'fake':
+        from .fake import FakeGenerativeModel
+        model = FakeGenerativeModel()
+    elif not key[1]:
         logger.warning("GEMINI_API_KEY is not set.")
         return None
-    
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-pro')
+    else:
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        model = genai.GenerativeModel(settings.AI_ANALYSIS_MODEL)
+
+    _model, _model_key = model, key
     return model
 
+def _parse_json(text):
+    if "```" in text:
+        text = text.replace("```json", "").replace("```", "")
+    return json.loads(text.strip())
+
 def analyze_concern(title, description):
     """
     Analyze a concern report to suggest category and priority.
@@ -28,42 +70,83 @@ def analyze_concern(title, description):
     prompt = f"""
     You are an intelligent assistant for a Barangay Concern Reporting System.
     Analyze the following report and suggest the best Category and Priority.
-    
-    Categories: 
-    - FLOOD (Flooding, drainage issues)
-    - ROAD (Potholes, broken path, obstruction)
-    - WASTE (Garbage, uncollected trash)
-    - ELECTRICITY (No power, broken street light)
-    - WATER (No water, leak, dirty water)
-    - SAFETY (Crime, drugs, fight, suspicious)
-    - HEALTH (Dengue, sickness, sanitation)
-    - OTHER (Anything else)
-    
-    Priorities:
-    - LOW (Minor issue, no immediate danger)
-    - MEDIUM (Needs attention but not critical)
-    - HIGH (Significant breakage, health risk, or major inconvenience)
-    - URGENT (Immediate danger to life or property, severe flooding/fire/crime)
-
+    {ANALYSIS_GUIDE}
     Report Title: {title}
     Report Description: {description}
-    
+
     Respond STRICTLY in JSON format:
     {{
-        "category": "CATEGORY_CODE", 
+        "category": "CATEGORY_CODE",
         "priority": "PRIORITY_CODE",
         "reasoning": "Short explanation why"
     }}
     """
-    
+
     try:
         response = model.generate_content(prompt)
-        text = response.text
-        if "```" in text:
-            text = text.replace("```json", "").replace("```", "")
-        
-        data = json.loads(text.strip())
-        return data
+        return _parse_json(response.text)
     except Exception as e:
         logger.error(f"Error calling Gemini: {e}")
         return None
+
+def _token_counts(response, prompt):
+    """(prompt, output, estimated) token counts from the response metadata if present."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None and getattr(usage, 'prompt_token_count', None):
+        return usage.prompt_token_count, usage.candidates_token_count, False
+    # Older client versions report no usage; ~4 characters per token
+    return len(prompt) // 4, len(response.text) // 4, True
+
+def analyze_concerns_batch(reports, model=None):
+    """
+    Analyze many reports with one model call (on ``model`` if given).
+
+    ``reports`` is a list of ``(id, title, description)``. Returns
+    ``(analyses, metrics)``: analyses maps each id the model answered for to
+    a dict like ``analyze_concern`` returns; metrics holds ``latency_ms``,
+    ``prompt_tokens``, ``output_tokens``, ``estimated`` and ``error``.
+    """
+    metrics = {'latency_ms': 0.0, 'prompt_tokens': 0, 'output_tokens': 0, 'estimated': False, 'error': ''}
+    model = model or get_gemini_model()
+    if not model:
+        metrics['error'] = 'AI model is not configured.'
+        return {}, metrics
+
+    report_lines = json.dumps(
+        [{'id': report_id, 'title': title, 'description': description} for report_id, title, description in reports],
+        ensure_ascii=False, indent=1,
+    )
+    prompt = f"""
+    You are an intelligent assistant for a Barangay Concern Reporting System.
+    Analyze EACH of the following reports and suggest the best Category and Priority.
+    {ANALYSIS_GUIDE}
+    Reports (JSON array):
+    {report_lines}
+
+    Respond STRICTLY with a JSON array holding one object per report, in any order:
+    [
+        {{"id": REPORT_ID, "category": "CATEGORY_CODE", "priority": "PRIORITY_CODE", "reasoning": "Short explanation why"}}
+    ]
+    """
+
+    start = time.perf_counter()
+    try:
+        response = model.generate_content(prompt)
+        metrics['latency_ms'] = (time.perf_counter() - start) * 1000
+        metrics['prompt_tokens'], metrics['output_tokens'], metrics['estimated'] = _token_counts(response, prompt)
+        items = _parse_json(response.text)
+    except Exception as e:
+        metrics['latency_ms'] = (time.perf_counter() - start) * 1000
+        metrics['error'] = str(e)
+        logger.error(f"Error calling Gemini: {e}")
+        return {}, metrics
+
+    if not isinstance(items, list):
+        metrics['error'] = 'Model did not return a JSON array.'
+        return {}, metrics
+    wanted = {str(report_id): report_id for report_id, _, _ in reports}
+    analyses = {}
+    for item in items:
+        if isinstance(item, dict) and str(item.get('id')) in wanted:
+            analyses[wanted[str(item['id'])]] = item
+    return analyses, metrics
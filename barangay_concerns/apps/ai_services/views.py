@@ -1,9 +1,14 @@
 
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import user_passes_test
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 import json
-from .chatbot import generate_chat_response
+from config.streaming import stream_until_disconnect
+from .chatbot import astream_chat_response, generate_chat_response, stream_chat_response
+from .faq_cache import get_faq_cache
+from apps.security_management.views import is_staff_or_admin
 
 @require_POST
 def chat_api(request):
@@ -15,10 +20,74 @@ def chat_api(request):
         if not user_message:
             return JsonResponse({'error': 'Message is required'}, status=400)
             
-        response_text = generate_chat_response(user_message)
+        response_text = generate_chat_response(user_message, request.user)
         return JsonResponse({'response': response_text})
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+def _sse(data, event=None):
+    frame = f"event: {event}\n" if event else ""
+    return f"{frame}data: {json.dumps(data)}\n\n"
+
+
+def _chat_events(message, user):
+    """The answer to ``message`` as Server-Sent Events, ending with ``done``."""
+    chunks = stream_chat_response(message, user)
+    try:
+        for chunk in chunks:
+            yield _sse({'text': chunk})
+        yield _sse({}, event='done')
+    finally:
+        # Closing the response (e.g. the client disconnected) cancels the model call
+        chunks.close()
+
+
+async def _achat_events(message, user):
+    """``_chat_events`` for ASGI, yielding each piece as soon as it arrives."""
+    chunks = astream_chat_response(message, user)
+    try:
+        async for chunk in chunks:
+            yield _sse({'text': chunk})
+        yield _sse({}, event='done')
+    finally:
+        await chunks.aclose()
+
+
+def _chat_user(request):
+    return request.user if request.user.is_authenticated else None
+
+
+async def chat_stream(request):
+    """Streaming variant of ``chat_api``: text/event-stream of ``{"text": ...}`` pieces."""
+    # require_POST does not wrap async views in Django 4.2
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        user_message = json.loads(request.body).get('message', '')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not user_message:
+        return JsonResponse({'error': 'Message is required'}, status=400)
+
+    user = await sync_to_async(_chat_user)(request)
+    if isinstance(request, ASGIRequest):
+        # A client that disconnects cancels the model call (config/streaming.py)
+        events = stream_until_disconnect(request, _achat_events(user_message, user))
+    else:
+        # WSGI (runserver) would buffer an async iterator; it closes this one on disconnect
+        events = _chat_events(user_message, user)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@user_passes_test(is_staff_or_admin)
+def chat_cache_stats(request):
+    """Hit-rate metrics of this worker's chatbot FAQ cache."""
+    return JsonResponse(get_faq_cache().stats())
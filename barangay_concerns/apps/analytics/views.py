@@ -7,6 +7,7 @@ from datetime import timedelta
 from django.http import HttpResponse
 import csv
 from apps.concerns.models import Concern
+from config.caching import ANALYTICS
 
 def is_lgu(user):
     return user.is_authenticated and user.is_lgu()
@@ -15,8 +16,13 @@ def is_lgu(user):
 @user_passes_test(is_lgu)
 def dashboard_view(request):
     """
-    Main analytics dashboard for LGU staff.
+    Main analytics dashboard for LGU staff. The numbers are the same for every
+    staff member, so they are computed once and kept in the shared cache until
+    concerns are added, removed, or change status, category or archive state.
     """
+    return render(request, 'analytics/dashboard.html', ANALYTICS.get_or_set(('dashboard',), _dashboard_context))
+
+def _dashboard_context():
     # 1. Overview Cards
     total_concerns = Concern.objects.count()
     pending_count = Concern.objects.filter(status='PENDING').count()
@@ -66,8 +72,7 @@ def dashboard_view(request):
         'trend_labels': trend_labels,
         'trend_data': trend_data,
     }
-    
-    return render(request, 'analytics/dashboard.html', context)
+    return context
 
 @login_required
 @user_passes_test(is_lgu)
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class ConcernsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.concerns'
\ No newline at end of file
+    name = 'apps.concerns'
+
+    def ready(self):
+        # Import signals when app is ready
+        import apps.concerns.signals  # noqa
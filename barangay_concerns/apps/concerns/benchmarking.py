@@ -0,0 +1,182 @@
+# apps/concerns/benchmarking.py
+"""
+Helpers shared by the ``benchmark_*`` management commands.
+
+Seeded rows are tagged with ``BENCHMARK_ALIAS`` (concern alias, emergency
+unit contact number) so they can be removed afterwards. Run benchmarks against a throwaway database: seeding a million
+concerns into production is never what you want.
+"""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.db import connection
+
+from .geo import encode_geohash
+from .models import Concern, EmergencyUnit
+
+BENCHMARK_ALIAS = 'benchmark-seed'
+
+WORDS = (
+    'flood', 'flooding', 'drainage', 'canal', 'clogged', 'pothole', 'road', 'bridge',
+    'garbage', 'trash', 'uncollected', 'streetlight', 'brownout', 'power', 'outage',
+    'water', 'leak', 'pipe', 'pressure', 'crime', 'loitering', 'fight', 'stray', 'dogs',
+    'dengue', 'mosquito', 'noise', 'karaoke', 'traffic', 'tricycle', 'sidewalk', 'market',
+    'school', 'church', 'plaza', 'highway', 'river', 'creek', 'typhoon', 'landslide',
+)
+# Filler vocabulary so topic words stay as selective as they are in real reports
+SYLLABLES = ('ba', 'ka', 'la', 'ma', 'na', 'pa', 'sa', 'ta', 'ga', 'da', 'bi', 'ki', 'li', 'mi', 'ni', 'pi', 'si', 'ti', 'bu', 'ku', 'lu', 'mu', 'nu', 'pu', 'su', 'tu', 'go', 'do', 'ro', 'yo')
+FILLER = tuple(a + b + c for a in SYLLABLES for b in SYLLABLES for c in ('', 'n', 'ng', 'y'))
+PLACES = (
+    ('Barasoain', 'Malolos', 'Bulacan', 'Region III'),
+    ('Ciudad Real', 'San Jose del Monte', 'Bulacan', 'Region III'),
+    ('Calvario', 'Meycauayan', 'Bulacan', 'Region III'),
+    ('Poblacion', 'Makati', 'Metro Manila', 'NCR'),
+    ('Bagong Silang', 'Caloocan', 'Metro Manila', 'NCR'),
+    ('Lahug', 'Cebu City', 'Cebu', 'Region VII'),
+    ('Talamban', 'Cebu City', 'Cebu', 'Region VII'),
+    ('Buhangin', 'Davao City', 'Davao del Sur', 'Region XI'),
+    ('Session Road', 'Baguio', 'Benguet', 'CAR'),
+    ('Jaro', 'Iloilo City', 'Iloilo', 'Region VI'),
+)
+CATEGORIES = [code for code, _ in Concern.CATEGORY_CHOICES]
+STATUSES = [code for code, _ in Concern.STATUS_CHOICES]
+PRIORITIES = [code for code, _ in Concern.PRIORITY_CHOICES]
+
+
+def _sentence(rng, length, topical=0.15):
+    return ' '.join(
+        rng.choice(WORDS) if rng.random() < topical else rng.choice(FILLER)
+        for _ in range(length)
+    )
+
+
+def build_concern(rng):
+    """Return an unsaved, randomised Concern tagged as benchmark data."""
+    barangay, municipality, province, region = rng.choice(PLACES)
+    has_coordinates = rng.random() < 0.8
+    return Concern(
+        title=_sentence(rng, 5, topical=0.4).capitalize(),
+        description=_sentence(rng, 40).capitalize() + '.',
+        category=rng.choice(CATEGORIES),
+        location=f'{_sentence(rng, 2).title()} Street, {barangay}',
+        barangay=barangay,
+        municipality=municipality,
+        province=province,
+        region=region,
+        latitude=Decimal(f'{rng.uniform(4.6, 21.4):.6f}') if has_coordinates else None,
+        longitude=Decimal(f'{rng.uniform(116.1, 126.9):.6f}') if has_coordinates else None,
+        status=rng.choice(STATUSES),
+        priority=rng.choice(PRIORITIES),
+        is_archived=rng.random() < 0.05,
+        is_anonymous=True,
+        alias=BENCHMARK_ALIAS,
+    )
+
+
+def seed_concerns(count, batch_size=5000, seed=42, stdout=None):
+    """
+    Bulk insert ``count`` benchmark concerns. ``bulk_create`` skips signals,
+    so callers must rebuild any derived index afterwards.
+    """
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        batch = [build_concern(rng) for _ in range(size)]
+        Concern.objects.bulk_create(batch, batch_size=size)
+        created += size
+        if stdout and created % (batch_size * 20) == 0:
+            stdout.write(f'  seeded {created}/{count}')
+    # auto_now_add stamps every row with "now"; spread them over two years instead
+    _spread_created_at()
+    return created
+
+
+def _spread_created_at():
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "UPDATE concerns_concern SET created_at = NOW() - (random() * INTERVAL '730 days') "
+                "WHERE alias = %s", [BENCHMARK_ALIAS]
+            )
+        else:
+            cursor.execute(
+                "UPDATE concerns_concern SET created_at = "
+                "datetime('now', '-' || (abs(random()) %% 63072000) || ' seconds') "
+                "WHERE alias = %s", [BENCHMARK_ALIAS]
+            )
+
+
+# Tables whose rows benchmark runs may attach to seeded concerns
+DEPENDENT_TABLES = ('ai_services_triagejob', 'concerns_comment')
+
+
+def remove_seeded_concerns():
+    """Delete benchmark rows with plain statements (no per-row signals)."""
+    with connection.cursor() as cursor:
+        for table in DEPENDENT_TABLES:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE concern_id IN (SELECT id FROM concerns_concern WHERE alias = %s)',
+                [BENCHMARK_ALIAS],
+            )
+        cursor.execute('DELETE FROM concerns_concern WHERE alias = %s', [BENCHMARK_ALIAS])
+        return cursor.rowcount
+
+
+def seeded_count():
+    return Concern.objects.filter(alias=BENCHMARK_ALIAS).count()
+
+
+def seed_emergency_units(count, batch_size=5000, seed=42):
+    """Bulk insert ``count`` benchmark emergency units spread over the Philippines."""
+    rng = random.Random(seed)
+    unit_types = [code for code, _ in EmergencyUnit.UNIT_TYPES]
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        batch = []
+        for _ in range(size):
+            lat, lng = rng.uniform(4.6, 21.4), rng.uniform(116.1, 126.9)
+            batch.append(EmergencyUnit(
+                name=f'{_sentence(rng, 2).title()} Station',
+                unit_type=rng.choice(unit_types),
+                contact_number=BENCHMARK_ALIAS,
+                latitude=Decimal(f'{lat:.6f}'),
+                longitude=Decimal(f'{lng:.6f}'),
+                # bulk_create skips save(), which normally fills this in
+                geohash=encode_geohash(lat, lng),
+            ))
+        EmergencyUnit.objects.bulk_create(batch, batch_size=size)
+        created += size
+    return created
+
+
+def remove_seeded_units():
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM concerns_emergencyunit WHERE contact_number = %s', [BENCHMARK_ALIAS])
+        return cursor.rowcount
+
+
+def measure(func, repeat=30, warmup=2):
+    """
+    Call ``func`` ``repeat`` times and return latency stats in milliseconds.
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'p50': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        'mean': statistics.fmean(samples),
+    }
+
+
+def format_stats(label, stats):
+    return f"{label:<32} p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms  mean={stats['mean']:8.2f}ms"
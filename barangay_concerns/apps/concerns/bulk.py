@@ -0,0 +1,168 @@
+# apps/concerns/bulk.py
+"""
+Status, priority and archive changes applied to many concerns at once.
+
+Saving concerns one by one costs an UPDATE plus signal work and a
+notification (with its counter update and queued email) per row. Here each
+chunk of ``BULK_UPDATE_CHUNK_SIZE`` concerns is read once (locked), changed
+with a single ``update()``, and the reporters' notifications are written
+with ``create_notifications_bulk`` at the end, all in one transaction.
+Map caches are invalidated once per affected tile, the changed concerns'
+detail fragments in one cache write, and the cached list pages, map data
+and analytics once, after commit.
+
+Signals do not fire, so anything hooked on Concern post_save must be
+handled here; the search document does not change.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.notifications.services import (
+    archived_notification,
+    create_notifications_bulk,
+    priority_change_notification,
+    status_change_notification,
+)
+from config.caching import ANALYTICS, CONCERN_LIST, MAP_DATA
+
+from . import clustering, fragments, tiles
+from .models import Concern
+from .ranking import hot_score
+
+# What the change checks and the notification texts and emails read
+LOADED_FIELDS = (
+    'title', 'category', 'status', 'priority', 'is_archived', 'resolved_at', 'latitude', 'longitude',
+    'reporter__username', 'reporter__first_name', 'reporter__last_name', 'reporter__email', 'reporter__email_frequency',
+)
+
+
+def select_concerns(ids=None, status=None, category=None, priority=None, barangay=None,
+                    municipality=None, reported_before=None, archived=False):
+    """Concerns matching every given filter (archived ones only if ``archived``)."""
+    concerns = Concern.objects.filter(is_archived=archived)
+    if ids:
+        concerns = concerns.filter(pk__in=ids)
+    if status:
+        concerns = concerns.filter(status=status)
+    if category:
+        concerns = concerns.filter(category=category)
+    if priority:
+        concerns = concerns.filter(priority=priority)
+    if barangay:
+        concerns = concerns.filter(barangay__iexact=barangay)
+    if municipality:
+        concerns = concerns.filter(municipality__iexact=municipality)
+    if reported_before:
+        concerns = concerns.filter(created_at__lt=reported_before)
+    return concerns
+
+
+def _changes(status, priority, archive, changed_by, now):
+    """The ``update()`` keyword arguments for the requested changes."""
+    changes = {'updated_at': now}
+    if status:
+        changes['status'] = status
+        if status != 'PENDING':
+            # Auto-lock, as Concern.save does, when leaving PENDING
+            changes['is_locked'] = Case(When(status='PENDING', then=Value(True)), default=F('is_locked'))
+        if status in ('RESOLVED', 'CLOSED'):
+            changes['resolved_at'] = Coalesce(F('resolved_at'), Value(now))
+    if priority:
+        changes['priority'] = priority
+    if archive is not None:
+        changes['is_archived'] = archive
+        changes['archived_at'] = now if archive else None
+        changes['archived_by'] = changed_by if archive else None
+    return changes
+
+
+def _apply(concern, status, priority, archive, changed_by, now):
+    """Make the in-memory concern match the row after ``update()`` (for notification texts)."""
+    if status:
+        if concern.status == 'PENDING' and status != 'PENDING':
+            concern.is_locked = True
+        if status in ('RESOLVED', 'CLOSED') and not concern.resolved_at:
+            concern.resolved_at = now
+        concern.status = status
+    if priority:
+        concern.priority = priority
+    if archive is not None:
+        concern.is_archived = archive
+        concern.archived_at = now if archive else None
+        concern.archived_by = changed_by if archive else None
+    concern.updated_at = now
+
+
+def bulk_update_concerns(concerns, status=None, priority=None, archive=None, changed_by=None, chunk_size=None):
+    """
+    Set ``status``, ``priority`` and/or ``archive`` (True to archive, False
+    to restore) on every concern in the ``concerns`` queryset, and notify
+    the reporters of what changed.
+
+    Returns a dict with the ``matched``, ``changed`` and ``notified`` counts.
+    """
+    chunk_size = chunk_size or settings.BULK_UPDATE_CHUNK_SIZE
+    now = timezone.now()
+    changes = _changes(status, priority, archive, changed_by, now)
+    changed = 0
+    changed_concern_ids = []
+    entries = []
+    map_points = set()
+
+    with transaction.atomic():
+        ids = list(concerns.order_by('pk').values_list('pk', flat=True))
+        matched = len(ids)
+        for start in range(0, len(ids), chunk_size):
+            rows = Concern.objects.filter(pk__in=ids[start:start + chunk_size]).select_related('reporter').only(*LOADED_FIELDS)
+            rows = list(rows.select_for_update(of=('self',)))
+            to_change = [
+                concern for concern in rows
+                if (status and concern.status != status)
+                or (priority and concern.priority != priority)
+                or (archive is not None and concern.is_archived != archive)
+            ]
+            if not to_change:
+                continue
+            changed_ids = [concern.pk for concern in to_change]
+            Concern.objects.filter(pk__in=changed_ids).update(**changes)
+            if priority:
+                # hot_score() reads the stored priority, so after the UPDATE above
+                Concern.objects.filter(pk__in=changed_ids).update(hot_score=hot_score())
+            changed += len(to_change)
+            changed_concern_ids.extend(changed_ids)
+
+            for concern in to_change:
+                old_status, old_priority, old_archived = concern.status, concern.priority, concern.is_archived
+                _apply(concern, status, priority, archive, changed_by, now)
+                if (status and old_status != status) or (archive is not None and old_archived != archive):
+                    map_points.add((concern.latitude, concern.longitude))
+                if not concern.reporter:
+                    continue
+                if status and old_status != status:
+                    entries.append((concern.reporter, concern, *status_change_notification(concern, old_status, status, changed_by)))
+                if priority and old_priority != priority:
+                    entries.append((concern.reporter, concern, *priority_change_notification(concern, old_priority, priority)))
+                if archive and not old_archived:
+                    entries.append((concern.reporter, concern, *archived_notification(concern)))
+
+        create_notifications_bulk(entries, batch_size=chunk_size)
+        if changed_concern_ids:
+            transaction.on_commit(lambda: fragments.bump_versions(changed_concern_ids))
+            CONCERN_LIST.invalidate_on_commit()
+            if status or archive is not None:
+                ANALYTICS.invalidate_on_commit()
+        if map_points:
+            def invalidate_map():
+                clustering.invalidate_points(map_points)
+                if len(map_points) > chunk_size:
+                    # Dropping the whole tile cache beats deleting thousands of tiles one by one
+                    tiles.clear_tiles()
+                else:
+                    tiles.invalidate_points(map_points)
+                MAP_DATA.invalidate()
+            transaction.on_commit(invalidate_map)
+
+    return {'matched': matched, 'changed': changed, 'notified': len(entries)}
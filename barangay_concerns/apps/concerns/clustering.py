@@ -0,0 +1,152 @@
+# apps/concerns/clustering.py
+"""
+Server-side marker clustering for the concerns map.
+
+Below ``MAP_CLUSTER_MAX_ZOOM`` the map asks for clusters instead of points.
+Concerns are bucketed into a fixed grid of ``CELLS_PER_TILE`` x
+``CELLS_PER_TILE`` cells inside each Web Mercator tile (64px cells for 256px
+tiles), and each cell becomes one cluster: its centroid plus per-status and
+per-category counts.
+
+Results are cached per (zoom, tile, filter). Every tile also has a version
+counter in the cache; a concern whose location, status, category or archive
+flag changes bumps the counters of the tiles it left and entered, which
+orphans every cached filter variant of those tiles at once.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .geo import bbox_filter, lnglat_to_tile, tile_bounds, tiles_for_bbox
+
+CELLS_PER_TILE = 4
+# Most tiles clustered per request; wider viewports are clustered on coarser tiles
+MAX_TILES = 100
+CACHE_PREFIX = 'concern-clusters'
+CACHE_TIMEOUT = 60 * 60
+
+
+def _version_key(zoom, x, y):
+    return f'{CACHE_PREFIX}:version:{zoom}:{x}:{y}'
+
+
+def _new_version():
+    # Time-based so a version key that was evicted never comes back with a
+    # value some stale cluster entry is still stored under.
+    return time.time_ns() // 1000
+
+
+def _tile_versions(zoom, tiles):
+    keys = {tile: _version_key(zoom, *tile) for tile in tiles}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tile, key in keys.items():
+        if key not in found:
+            cache.add(key, _new_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[tile] = found[key]
+    return versions
+
+
+def cluster_tile(queryset, zoom, x, y):
+    """
+    Cluster the concerns of ``queryset`` inside tile ``x, y``. Returns a list of
+    dicts with ``lat``, ``lng``, ``count``, ``status`` and ``category`` counts,
+    ``breakdown`` (category counts per status) and ``id`` when the cluster
+    holds a single concern.
+    """
+    # Cells are simply the tiles ``log2(CELLS_PER_TILE)`` zoom levels deeper
+    cell_zoom = zoom + CELLS_PER_TILE.bit_length() - 1
+    cells = {}
+    rows = queryset.filter(bbox_filter(tile_bounds(zoom, x, y))).order_by().values_list(
+        'id', 'latitude', 'longitude', 'status', 'category'
+    )
+    for pk, lat, lng, status, category in rows.iterator(chunk_size=5000):
+        lat, lng = float(lat), float(lng)
+        # Points on a shared edge match both tiles' bounds; keep them in one
+        if lnglat_to_tile(lng, lat, zoom) != (x, y):
+            continue
+        cell = cells.setdefault(lnglat_to_tile(lng, lat, cell_zoom), {
+            'lat': 0.0, 'lng': 0.0, 'count': 0, 'id': pk,
+            'status': Counter(), 'category': Counter(), 'breakdown': {},
+        })
+        cell['lat'] += lat
+        cell['lng'] += lng
+        cell['count'] += 1
+        cell['status'][status] += 1
+        cell['category'][category] += 1
+        cell['breakdown'].setdefault(status, Counter())[category] += 1
+
+    clusters = []
+    for cell in cells.values():
+        count = cell['count']
+        clusters.append({
+            'lat': cell['lat'] / count,
+            'lng': cell['lng'] / count,
+            'count': count,
+            'id': cell['id'] if count == 1 else None,
+            'status': dict(cell['status']),
+            'category': dict(cell['category']),
+            'breakdown': {status: dict(counts) for status, counts in cell['breakdown'].items()},
+        })
+    return clusters
+
+
+def get_clusters(queryset, filter_key, zoom, bbox):
+    """
+    Clusters for every tile intersecting ``bbox``, served from the cache where
+    possible. ``filter_key`` must identify the filters applied to ``queryset``
+    and come from a bounded set of values, as it is part of the cache keys.
+    When the viewport spans more than ``MAX_TILES`` tiles, tiles of a lower
+    zoom (and so larger clusters) are used until it fits.
+    """
+    tiles = tiles_for_bbox(bbox, zoom)
+    while len(tiles) > MAX_TILES and zoom > 0:
+        zoom -= 1
+        tiles = tiles_for_bbox(bbox, zoom)
+    versions = _tile_versions(zoom, tiles)
+    keys = {
+        tile: f'{CACHE_PREFIX}:{zoom}:{tile[0]}:{tile[1]}:{versions[tile]}:{filter_key}'
+        for tile in tiles
+    }
+    cached = cache.get_many(keys.values())
+
+    clusters, missing = [], {}
+    for tile, key in keys.items():
+        if key in cached:
+            clusters.extend(cached[key])
+        else:
+            missing[key] = cluster_tile(queryset, zoom, *tile)
+            clusters.extend(missing[key])
+    if missing:
+        cache.set_many(missing, timeout=CACHE_TIMEOUT)
+    return clusters
+
+
+def invalidate_point(latitude, longitude):
+    """Bump the version of every clustered tile containing the point."""
+    invalidate_points([(latitude, longitude)])
+
+
+def invalidate_points(points):
+    """Bump the version of every clustered tile containing any of the ``(latitude, longitude)`` points."""
+    points = [(float(lat), float(lng)) for lat, lng in points if lat is not None and lng is not None]
+    if len(points) == 1:
+        lat, lng = points[0]
+        for zoom in range(settings.MAP_CLUSTER_MAX_ZOOM):
+            key = _version_key(zoom, *lnglat_to_tile(lng, lat, zoom))
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, _new_version(), timeout=None)
+        return
+    # Many points: one write per tile with a fresh time-based version
+    version = _new_version()
+    keys = {
+        _version_key(zoom, x, y): version
+        for zoom in range(settings.MAP_CLUSTER_MAX_ZOOM)
+        for x, y in {lnglat_to_tile(lng, lat, zoom) for lat, lng in points}
+    }
+    cache.set_many(keys, timeout=None)
@@ -0,0 +1,159 @@
+# apps/concerns/comments.py
+"""
+Loading comment threads for display.
+
+Every comment stores a materialized ``path``: its ancestors' ids and its
+own, each as a fixed-width base-36 segment. Sorting by path lists a thread
+depth first (each reply right after its parent, siblings oldest first), and
+a subtree is every path starting with its root's, so the replies below a
+comment come from one range scan of the ``(concern, path)`` index.
+
+The detail page only renders ``first_page``: the first
+``COMMENT_PAGE_SIZE`` top-level comments, each followed by its replies when
+it has at most ``COMMENT_INLINE_REPLIES`` of them. Later pages and larger
+reply subtrees are fetched from the comments API as the reader asks for
+them, so the page costs the same however long the discussion gets.
+``layout_thread`` prepares the rendered list: indentation from the depth,
+and collapse groups so only the first ``COMMENT_REPLIES_SHOWN`` replies to
+a comment are shown until the reader asks for more.
+"""
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Comment
+from .pagination import CursorPaginator
+
+# Top-level comments page oldest first; replies in thread order
+ROOT_ORDERING = ('created_at', 'id')
+REPLY_ORDERING = ('path', 'id')
+
+
+def root_comments(concern):
+    return Comment.objects.filter(concern=concern, parent__isnull=True).select_related('author')
+
+
+def subtree_replies(root):
+    """Every reply below ``root``, at any depth; order by ``REPLY_ORDERING`` for thread order."""
+    return Comment.objects.filter(
+        concern_id=root.concern_id, path__startswith=root.path,
+    ).exclude(pk=root.pk).select_related('author')
+
+
+def first_page(concern, page_size=None, inline_replies=None):
+    """
+    Return ``(page, comments)``: the ``CursorPage`` of the concern's first
+    top-level comments, and those comments laid out for the template with
+    the replies of the ones that have at most ``inline_replies`` (default
+    ``COMMENT_INLINE_REPLIES``). Comments whose replies were left out get
+    ``replies_lazy = True``. Two queries whatever the thread size.
+    """
+    inline_replies = settings.COMMENT_INLINE_REPLIES if inline_replies is None else inline_replies
+    paginator = CursorPaginator(root_comments(concern), ROOT_ORDERING, page_size=page_size or settings.COMMENT_PAGE_SIZE)
+    page = paginator.page()
+    inline = [root for root in page if 0 < root.reply_count <= inline_replies]
+    replies = {}
+    if inline:
+        subtrees = reduce(or_, (Q(path__startswith=root.path) for root in inline))
+        rows = Comment.objects.filter(subtrees, concern=concern, parent__isnull=False).select_related('author')
+        for reply in rows.order_by(*REPLY_ORDERING):
+            replies.setdefault(reply.ancestor_ids[0], []).append(reply)
+
+    comments = []
+    for root in page:
+        root.replies_lazy = root.reply_count > inline_replies
+        comments.append(root)
+        comments.extend(replies.get(root.pk, []))
+    return page, layout_thread(comments)
+
+
+def layout_thread(comments, replies_shown=None):
+    """
+    Annotate a thread-ordered comment list for flat rendering and return it.
+
+    Each comment gets ``indent`` (depth below the first comment, capped at
+    ``COMMENT_INDENT_LEVELS``) and ``collapsed_under``: the id of the
+    comment whose extra replies it is hidden with, or None if shown. The
+    first hidden reply of a comment also gets ``more_replies`` (how many are
+    hidden) and ``more_collapsed_under`` (where its "show more" button is
+    itself hidden, for collapses inside collapsed replies).
+    """
+    replies_shown = settings.COMMENT_REPLIES_SHOWN if replies_shown is None else replies_shown
+    if not comments:
+        return comments
+    base_depth = comments[0].depth
+    reply_counts = Counter(comment.parent_id for comment in comments)
+    seen = Counter()
+    collapsed = {}  # comment id -> collapsed_under
+    for comment in comments:
+        comment.indent = min(comment.depth - base_depth, settings.COMMENT_INDENT_LEVELS)
+        comment.more_replies = 0
+        parent_id = comment.parent_id if comment.parent_id in collapsed else None
+        if parent_id is None:
+            comment.collapsed_under = None
+        else:
+            seen[parent_id] += 1
+            if seen[parent_id] > replies_shown:
+                comment.collapsed_under = parent_id
+                if seen[parent_id] == replies_shown + 1:
+                    comment.more_replies = reply_counts[parent_id] - replies_shown
+                    comment.more_collapsed_under = collapsed[parent_id]
+            else:
+                comment.collapsed_under = collapsed[parent_id]
+        collapsed[comment.pk] = comment.collapsed_under
+    return comments
+
+
+def fill_paths(comments=None, batch_size=5000):
+    """
+    Give every comment without a path (old rows, ``bulk_create``) among
+    ``comments`` (default: all) its path, ``batch_size`` comments per UPDATE
+    round. Replies always have larger ids than their parents, so going in id
+    order finds each parent done. Returns the number of comments filled.
+    """
+    comments = Comment.objects.all() if comments is None else comments
+    filled = 0
+    while True:
+        batch = list(comments.filter(path='').order_by('pk').only('pk', 'parent_id')[:batch_size])
+        if not batch:
+            return filled
+        paths = dict(Comment.objects.filter(
+            pk__in={comment.parent_id for comment in batch if comment.parent_id}
+        ).exclude(path='').values_list('pk', 'path'))
+        for comment in batch:
+            if comment.parent_id and comment.parent_id not in paths:
+                raise ValueError(f'Parent #{comment.parent_id} of comment #{comment.pk} has no path')
+            comment.path = paths.get(comment.parent_id, '') + Comment.path_segment(comment.pk)
+            paths[comment.pk] = comment.path
+        Comment.objects.bulk_update(batch, ['path'], batch_size=batch_size)
+        filled += len(batch)
+
+
+def recount_replies(comments=None, batch_size=5000):
+    """
+    Recompute the ``reply_count`` of ``comments`` (default: all) from the
+    paths, reading replies ``batch_size`` at a time in path order. Pass
+    whole threads (e.g. filter by concern), as replies are only counted if
+    they are among ``comments``. Returns the number of comments that have
+    replies.
+    """
+    comments = Comment.objects.all() if comments is None else comments
+    counts = Counter()
+    last_path = ''
+    while True:
+        paths = list(
+            comments.filter(parent__isnull=False, path__gt=last_path).order_by('path').values_list('path', flat=True)[:batch_size]
+        )
+        if not paths:
+            break
+        for path in paths:
+            counts.update(Comment.path_ids(path)[:-1])
+        last_path = paths[-1]
+
+    comments.filter(reply_count__gt=0).update(reply_count=0)
+    rows = [Comment(pk=pk, reply_count=count) for pk, count in counts.items()]
+    Comment.objects.bulk_update(rows, ['reply_count'], batch_size=batch_size)
+    return len(rows)
@@ -0,0 +1,124 @@
+# apps/concerns/fragments.py
+"""
+Cached fragments of the concern detail page.
+
+The parts of ``detail.html`` that look the same to every visitor (the
+header, the description and image, the comment list) are rendered once per
+concern version and then served from the cache. Each concern has a version
+counter in the cache that is bumped after commit when the concern is saved,
+a comment is added or deleted, or a vote is cast. The version is part of
+every fragment key, so a bump orphans all of the concern's fragments at
+once, as the tile versions do for map clusters. Anything that depends on the
+viewer (vote state, edit and moderation buttons, CSRF tokens) stays outside
+the fragments.
+
+Hits and misses are counted per worker process (see ``fragment_stats``)
+and added to the ``concern-detail`` namespace stats for ``cache_stats``.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.safestring import mark_safe
+
+from config.caching import CONCERN_DETAIL
+
+CACHE_PREFIX = 'concern-detail'
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def _version_key(concern_id):
+    return f'{CACHE_PREFIX}:version:{concern_id}'
+
+
+def _new_version():
+    # Time-based so an evicted version key never comes back with a value
+    # some stale fragment is still stored under
+    return time.time_ns() // 1000
+
+
+def concern_version(concern_id):
+    key = _version_key(concern_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(concern_id):
+    """Orphan every cached fragment of the concern."""
+    try:
+        cache.incr(_version_key(concern_id))
+    except ValueError:
+        cache.set(_version_key(concern_id), _new_version(), timeout=None)
+
+
+def bump_versions(concern_ids):
+    """``bump_version`` for many concerns, in one cache write."""
+    version = _new_version()
+    cache.set_many({_version_key(concern_id): version for concern_id in concern_ids}, timeout=None)
+
+
+def bump_on_commit(concern_id):
+    transaction.on_commit(lambda: bump_version(concern_id))
+
+
+def render_fragments(concern_id, renderers):
+    """
+    Return ``{name: html}`` for each ``name: render`` pair in ``renderers``.
+    Cached fragments come from one ``get_many``; missing ones are rendered
+    by calling ``render()`` (which should do all the queries the fragment
+    needs) and stored with one ``set_many``. With
+    ``DETAIL_FRAGMENT_CACHE_SECONDS = 0`` everything is rendered every time.
+    """
+    if not settings.DETAIL_FRAGMENT_CACHE_SECONDS:
+        return {name: mark_safe(render()) for name, render in renderers.items()}
+
+    version = concern_version(concern_id)
+    keys = {name: f'{CACHE_PREFIX}:{name}:{concern_id}:{version}' for name in renderers}
+    cached = cache.get_many(keys.values())
+    fragments, missing = {}, {}
+    for name, render in renderers.items():
+        if keys[name] in cached:
+            fragments[name] = cached[keys[name]]
+        else:
+            fragments[name] = missing[keys[name]] = render()
+    if missing:
+        cache.set_many(missing, timeout=settings.DETAIL_FRAGMENT_CACHE_SECONDS)
+
+    with _lock:
+        for name in renderers:
+            _counters[(name, 'misses' if keys[name] in missing else 'hits')] += 1
+    CONCERN_DETAIL.record(hits=len(renderers) - len(missing), misses=len(missing))
+    return {name: mark_safe(html) for name, html in fragments.items()}
+
+
+def fragment_stats():
+    """Hit and miss counts of this worker, overall and per fragment."""
+    with _lock:
+        counters = dict(_counters)
+    names = sorted({name for name, _ in counters})
+    fragments = {}
+    for name in names:
+        hits, misses = counters.get((name, 'hits'), 0), counters.get((name, 'misses'), 0)
+        fragments[name] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0}
+    hits = sum(fragment['hits'] for fragment in fragments.values())
+    misses = sum(fragment['misses'] for fragment in fragments.values())
+    return {
+        'lookups': hits + misses,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        'fragments': fragments,
+    }
+
+
+def reset_stats():
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,163 @@
+# apps/concerns/geo.py
+"""
+Geometry helpers for the map endpoints: viewport parsing and zoom-aware
+coordinate precision.
+"""
+import math
+
+from django.db.models import Q
+
+
+class InvalidBBox(ValueError):
+    """The ``bbox`` parameter is not ``west,south,east,north`` in degrees."""
+
+
+def parse_bbox(value):
+    """
+    Parse ``"west,south,east,north"`` into floats. Returns None for an empty
+    value; raises ``InvalidBBox`` for anything else that is not a viewport.
+    """
+    if not value:
+        return None
+    try:
+        west, south, east, north = (float(part) for part in value.split(','))
+    except ValueError:
+        raise InvalidBBox('bbox must be "west,south,east,north".')
+    if not (-90 <= south <= north <= 90) or not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise InvalidBBox('bbox is outside the valid latitude/longitude range.')
+    return west, south, east, north
+
+
+def parse_zoom(value, default=6):
+    """Leaflet zoom level from a query parameter, clamped to 0..20."""
+    try:
+        return max(0, min(int(value), 20))
+    except (TypeError, ValueError):
+        return default
+
+
+def bbox_filter(bbox):
+    """Q object selecting concerns whose coordinates fall inside ``bbox``."""
+    west, south, east, north = bbox
+    condition = Q(latitude__gte=south, latitude__lte=north)
+    if west <= east:
+        return condition & Q(longitude__gte=west, longitude__lte=east)
+    # Viewport crosses the antimeridian
+    return condition & (Q(longitude__gte=west) | Q(longitude__lte=east))
+
+
+def coordinate_precision(zoom):
+    """
+    Decimal places needed so rounding moves a point by less than one screen
+    pixel at ``zoom`` (a 256px tile spans 360 / 2**zoom degrees).
+    """
+    degrees_per_pixel = 360 / (256 * 2 ** zoom)
+    return max(1, min(6, math.ceil(-math.log10(degrees_per_pixel))))
+
+
+# Web Mercator tiles (the Leaflet/OSM z/x/y scheme) stop short of the poles.
+MAX_LATITUDE = 85.05112878
+
+
+def lnglat_to_tile(lng, lat, zoom):
+    """Tile ``(x, y)`` containing the point at ``zoom``."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    n = 2 ** zoom
+    x = int((lng + 180) / 360 * n)
+    lat_rad = math.radians(lat)
+    y = int((1 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """``(west, south, east, north)`` of tile ``x, y`` at ``zoom``."""
+    n = 2 ** zoom
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+
+def tiles_for_bbox(bbox, zoom):
+    """All ``(x, y)`` tiles at ``zoom`` that intersect ``bbox``."""
+    west, south, east, north = bbox
+    x_min, y_min = lnglat_to_tile(west, north, zoom)
+    x_max, y_max = lnglat_to_tile(east, south, zoom)
+    if west <= east:
+        columns = range(x_min, x_max + 1)
+    else:
+        # Viewport crosses the antimeridian
+        columns = list(range(x_min, 2 ** zoom)) + list(range(0, x_max + 1))
+    return [(x, y) for x in columns for y in range(y_min, y_max + 1)]
+
+
+def snap_bbox(bbox, zoom):
+    """
+    ``bbox`` grown to the edges of the tiles at ``zoom`` that it touches, so
+    viewports panned within those tiles share one box (and cache key).
+    """
+    west, south, east, north = bbox
+    x_min, y_min = lnglat_to_tile(west, north, zoom)
+    x_max, y_max = lnglat_to_tile(east, south, zoom)
+    snapped_west, _, _, snapped_north = tile_bounds(zoom, x_min, y_min)
+    _, snapped_south, snapped_east, _ = tile_bounds(zoom, x_max, y_max)
+    # Tiles stop at MAX_LATITUDE; the outermost rows reach the poles
+    if y_min == 0:
+        snapped_north = 90.0
+    if y_max == 2 ** zoom - 1:
+        snapped_south = -90.0
+    return snapped_west, snapped_south, snapped_east, snapped_north
+
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def encode_geohash(lat, lng, precision=9):
+    """Geohash of the point; nearby points share long prefixes."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, interval = (lng, lng_range) if even else (lat, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision):
+    """``(lat_degrees, lng_degrees)`` covered by one geohash cell."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+
+
+def geohash_neighbourhood(lat, lng, precision):
+    """The point's geohash cell and its eight neighbours."""
+    lat_step, lng_step = geohash_cell_size(precision)
+    cells = set()
+    for d_lat in (-lat_step, 0, lat_step):
+        for d_lng in (-lng_step, 0, lng_step):
+            neighbour_lat = lat + d_lat
+            if not -90 <= neighbour_lat <= 90:
+                continue
+            neighbour_lng = (lng + d_lng + 180) % 360 - 180
+            cells.add(encode_geohash(neighbour_lat, neighbour_lng, precision))
+    return cells
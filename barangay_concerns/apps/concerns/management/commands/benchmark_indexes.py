@@ -0,0 +1,64 @@
+# apps/concerns/management/commands/benchmark_indexes.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.concerns.benchmarking import measure, remove_seeded_concerns, seed_concerns, seeded_count
+from apps.concerns.models import Concern
+from apps.concerns.query_audit import hot_querysets
+from apps.concerns.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Times the hot Concern querysets with and without the Meta indexes on a seeded table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded concerns afterwards')
+
+    def _time_all(self, repeat):
+        results = {}
+        for label, queryset in hot_querysets():
+            # The map querysets are unbounded; a few runs are plenty for those
+            runs = repeat if queryset.query.high_mark is not None else min(repeat, 3)
+            results[label] = measure(lambda queryset=queryset: list(queryset.all()), repeat=runs, warmup=1)
+        return results
+
+    def handle(self, *args, **options):
+        missing = options['rows'] - seeded_count()
+        if missing > 0:
+            self.stdout.write(f'Seeding {missing} concerns...')
+            seed_concerns(missing, stdout=self.stdout)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('ANALYZE concerns_concern')
+            else:
+                cursor.execute('ANALYZE')
+
+        indexes = Concern._meta.indexes
+        try:
+            with_indexes = self._time_all(options['repeat'])
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Concern, index)
+            without_indexes = self._time_all(options['repeat'])
+        finally:
+            existing = connection.introspection.get_constraints(connection.cursor(), Concern._meta.db_table)
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    if index.name not in existing:
+                        editor.add_index(Concern, index)
+            if not options['keep']:
+                remove_seeded_concerns()
+            get_search_backend().rebuild()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{"queryset":<28} {"before p50":>11} {"before p95":>11} {"after p50":>10} {"after p95":>10} {"speedup":>8}'
+        ))
+        for label, after in with_indexes.items():
+            before = without_indexes[label]
+            speedup = before['p50'] / after['p50'] if after['p50'] else float('inf')
+            self.stdout.write(
+                f'{label:<28} {before["p50"]:>9.2f}ms {before["p95"]:>9.2f}ms '
+                f'{after["p50"]:>8.2f}ms {after["p95"]:>8.2f}ms {speedup:>7.1f}x'
+            )
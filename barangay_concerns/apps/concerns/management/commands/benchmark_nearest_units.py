@@ -0,0 +1,87 @@
+# apps/concerns/management/commands/benchmark_nearest_units.py
+import heapq
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.concerns.benchmarking import (
+    BENCHMARK_ALIAS,
+    format_stats,
+    measure,
+    remove_seeded_units,
+    seed_emergency_units,
+)
+from apps.concerns.geo import haversine_km
+from apps.concerns.models import EmergencyUnit
+from apps.concerns.spatial import UnitIndex, invalidate_unit_index, load_units, nearest_units_db
+
+
+class Command(BaseCommand):
+    help = 'Compares nearest-emergency-unit lookups: table scan, geohash queries and the KD-tree index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=200, help='Timed lookups per strategy')
+        parser.add_argument('--k', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded units afterwards')
+
+    def handle(self, *args, **options):
+        k = options['k']
+        missing = options['units'] - EmergencyUnit.objects.filter(contact_number=BENCHMARK_ALIAS).count()
+        if missing > 0:
+            self.stdout.write(f'Seeding {missing} emergency units...')
+            seed_emergency_units(missing)
+
+        try:
+            total = EmergencyUnit.objects.count()
+            start = time.perf_counter()
+            index = UnitIndex(load_units())
+            build_ms = (time.perf_counter() - start) * 1000
+
+            rng = random.Random(7)
+            points = [(rng.uniform(5, 21), rng.uniform(117, 126)) for _ in range(options['repeat'])]
+
+            def scan(lat, lng, unit_types=None):
+                units = load_units()
+                return heapq.nsmallest(k, (
+                    (unit, haversine_km(lat, lng, unit.latitude, unit.longitude))
+                    for unit in units if not unit_types or unit.unit_type in unit_types
+                ), key=lambda pair: pair[1])
+
+            def cycle(lookup, **kwargs):
+                iterator = iter(points * 2)
+                return lambda: lookup(*next(iterator), **kwargs)
+
+            # The same answer from every strategy, or the timings mean nothing
+            mismatches = 0
+            for lat, lng in points[:20]:
+                expected = [unit.id for unit, _ in scan(lat, lng)]
+                if [unit.id for unit, _ in index.nearest(lat, lng, k=k)] != expected:
+                    mismatches += 1
+                if [unit.id for unit, _ in nearest_units_db(lat, lng, k=k)] != expected:
+                    mismatches += 1
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{total} emergency units, k={k}'))
+            self.stdout.write(f'KD-tree build: {build_ms:.0f}ms')
+            scan_runs = min(options['repeat'], 10)
+            self.stdout.write(format_stats('table scan', measure(cycle(scan), repeat=scan_runs, warmup=1)))
+            self.stdout.write(format_stats('geohash (database)', measure(cycle(nearest_units_db, k=k), repeat=options['repeat'])))
+            self.stdout.write(format_stats('kd-tree', measure(cycle(index.nearest, k=k), repeat=options['repeat'])))
+            self.stdout.write(format_stats(
+                'kd-tree, POLICE only',
+                measure(cycle(index.nearest, k=k, unit_types=['POLICE']), repeat=options['repeat']),
+            ))
+            self.stdout.write(format_stats(
+                'kd-tree, within 5 km',
+                measure(cycle(index.nearest, k=k, radius_km=5), repeat=options['repeat']),
+            ))
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f'{mismatches} lookups disagreed with the table scan.'))
+            else:
+                self.stdout.write(self.style.SUCCESS('All strategies agreed with the table scan.'))
+        finally:
+            if not options['keep']:
+                removed = remove_seeded_units()
+                self.stdout.write(f'\nRemoved {removed} seeded units.')
+            invalidate_unit_index()
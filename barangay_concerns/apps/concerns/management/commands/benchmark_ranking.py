@@ -0,0 +1,43 @@
+# apps/concerns/management/commands/benchmark_ranking.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.concerns.benchmarking import format_stats, measure, remove_seeded_concerns, seed_concerns, seeded_count
+from apps.concerns.models import ACTIVE_OPEN, Concern
+from apps.concerns.ranking import HOT_ORDERING, recompute_hot_scores
+
+
+class Command(BaseCommand):
+    help = 'Times a full hot-score recompute over seeded concerns against a time budget, and the hot list queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1_000_000, help='Concerns to rank (default 1M)')
+        parser.add_argument('--budget', type=float, default=120.0, help='Seconds the full recompute may take (default 120)')
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per list query')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded concerns afterwards')
+
+    def handle(self, *args, **options):
+        try:
+            missing = options['size'] - seeded_count()
+            if missing > 0:
+                self.stdout.write(f'Seeding {missing} concerns...')
+                seed_concerns(missing, seed=options['size'], stdout=self.stdout)
+
+            rows, seconds = recompute_hot_scores(batch_size=options['batch_size'], stdout=self.stdout)
+            self.stdout.write(f'Recomputed {rows} hot scores in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)')
+
+            open_concerns = Concern.objects.filter(ACTIVE_OPEN)
+            barangay = open_concerns.values_list('barangay', flat=True).first()
+            queries = {
+                'hot, first page': open_concerns.order_by(*HOT_ORDERING),
+                'hot in one barangay': open_concerns.filter(barangay=barangay).order_by(*HOT_ORDERING),
+            }
+            for label, queryset in queries.items():
+                self.stdout.write(format_stats(label, measure(lambda: list(queryset[:20].values_list('id', flat=True)), repeat=options['repeat'])))
+        finally:
+            if not options['keep']:
+                self.stdout.write(f'Removed {remove_seeded_concerns()} seeded concerns')
+
+        if seconds > options['budget']:
+            raise CommandError(f'Recompute took {seconds:.1f}s, over the {options["budget"]:.0f}s budget')
+        self.stdout.write(self.style.SUCCESS(f'Within the {options["budget"]:.0f}s budget'))
@@ -0,0 +1,59 @@
+# apps/concerns/management/commands/benchmark_search.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.concerns.benchmarking import (
+    format_stats,
+    measure,
+    remove_seeded_concerns,
+    seed_concerns,
+    seeded_count,
+)
+from apps.concerns.models import Concern
+from apps.concerns.search import SEARCH_ORDERING, BasicSearchBackend, get_search_backend
+
+QUERIES = ('flood', 'garbage uncollected', 'streetlight brownout', 'pothole highway', 'dengue mosquito creek')
+
+
+class Command(BaseCommand):
+    help = 'Compares list-view search latency of the icontains scan and the full-text index at several table sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded concerns afterwards')
+
+    def handle(self, *args, **options):
+        indexed = get_search_backend()
+        if indexed.name == 'basic':
+            raise CommandError('No full-text index available; run migrations on PostgreSQL or SQLite with FTS5.')
+
+        backends = [BasicSearchBackend(), indexed]
+        page_size = options['page_size']
+        base = Concern.objects.filter(is_archived=False).exclude(status='CLOSED')
+
+        try:
+            for size in sorted(options['sizes']):
+                missing = size - seeded_count()
+                if missing > 0:
+                    self.stdout.write(f'Seeding {missing} concerns...')
+                    seed_concerns(missing, seed=size, stdout=self.stdout)
+                    indexed.rebuild()
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{size} seeded concerns'))
+                for backend in backends:
+                    samples = {'p50': [], 'p95': [], 'mean': []}
+                    for query in QUERIES:
+                        def run(query=query):
+                            qs = backend.search(base, query).order_by(*SEARCH_ORDERING)
+                            return list(qs[:page_size])
+                        stats = measure(run, repeat=options['repeat'])
+                        for key in samples:
+                            samples[key].append(stats[key])
+                    averaged = {key: sum(values) / len(values) for key, values in samples.items()}
+                    self.stdout.write(format_stats(f'  {backend.name}', averaged))
+        finally:
+            if not options['keep']:
+                removed = remove_seeded_concerns()
+                indexed.rebuild()
+                self.stdout.write(f'\nRemoved {removed} seeded concerns.')
@@ -0,0 +1,35 @@
+# apps/concerns/management/commands/cache_stats.py
+from django.core.management.base import BaseCommand
+
+from config.caching import backend_description, namespaces
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports hits, misses and the hit ratio of every cache namespace, counted by all '
+        'workers that share the cache'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after reporting')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Cache backend: {backend_description()}')
+        if 'LocMemCache' in backend_description():
+            self.stdout.write(self.style.WARNING(
+                'The local-memory cache is private to each process; these are only the counts of this command.'
+            ))
+
+        self.stdout.write(f'{"namespace":<16} {"timeout":>8} {"hits":>10} {"misses":>10} {"hit ratio":>10}')
+        for namespace in namespaces():
+            stats = namespace.stats()
+            timeout = f'{namespace.timeout}s' if namespace.timeout else '-'
+            ratio = f'{stats["hit_rate"]:.1%}' if stats['lookups'] else '-'
+            self.stdout.write(
+                f'{namespace.name:<16} {timeout:>8} {stats["hits"]:>10} {stats["misses"]:>10} {ratio:>10}'
+            )
+            if options['reset']:
+                namespace.reset_stats()
+
+        if options['reset']:
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
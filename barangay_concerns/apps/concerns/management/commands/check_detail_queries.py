@@ -0,0 +1,94 @@
+# apps/concerns/management/commands/check_detail_queries.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.concerns.benchmarking import BENCHMARK_ALIAS
+from apps.concerns.comments import fill_paths, recount_replies
+from apps.concerns.models import Comment, Concern
+from apps.concerns.views import concern_detail_view
+
+USERNAME_PREFIX = 'detail-queries-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Renders the concern detail page for a three-comment thread and a large thread, as an '
+        'anonymous visitor and as a signed-in user, and fails if the query counts differ'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=500, help='Comments in the large thread (default 500)')
+        parser.add_argument('--verbose-queries', action='store_true', help='Print the queries of the large thread')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        # Everything the check writes is rolled back at the end
+        with transaction.atomic():
+            try:
+                failures = self._check(User, options)
+            finally:
+                transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('The detail page query count does not depend on the thread size'))
+
+    def _check(self, User, options):
+        """Seed the two threads and compare their query counts; returns the failures."""
+        # Official and regular authors, so both branches of the template run
+        authors = [
+            User.objects.create(username=f'{USERNAME_PREFIX}{i}', password='!', role='LGU' if i == 0 else 'USER')
+            for i in range(5)
+        ]
+        small = self._thread(authors, 3)
+        large = self._thread(authors, options['comments'])
+        # Fill site-wide caches (the announcements banner) so an expired entry
+        # is not counted against whichever render happens to come first
+        self._render(small, AnonymousUser())
+        failures = []
+        for label, user in (('anonymous', AnonymousUser()), ('signed in', authors[1])):
+            small_count = len(self._render(small, user))
+            large_queries = self._render(large, user)
+            self.stdout.write(f'{label:<10} 3 comments: {small_count} queries, '
+                              f'{options["comments"]} comments: {len(large_queries)} queries')
+            if len(large_queries) != small_count:
+                failures.append(f'{label}: {len(large_queries)} queries for {options["comments"]} comments, '
+                                f'{small_count} for 3')
+            if options['verbose_queries']:
+                for query in large_queries:
+                    self.stdout.write(f'  {query["sql"]}')
+        return failures
+
+    def _thread(self, authors, size):
+        """A concern with ``size`` comments, every third one a reply."""
+        concern = Concern.objects.create(
+            title=f'Detail queries ({size})', description='Query count check', category='OTHER',
+            location='Check', reporter=authors[0], alias=BENCHMARK_ALIAS,
+        )
+        roots = Comment.objects.bulk_create(
+            Comment(concern=concern, author=authors[i % len(authors)], content=f'Comment {i}')
+            for i in range(size) if i % 3 != 2
+        )
+        Comment.objects.bulk_create(
+            Comment(concern=concern, author=authors[i % len(authors)], parent=roots[i % len(roots)], content=f'Reply {i}')
+            for i in range(size) if i % 3 == 2
+        )
+        # Only this thread's rows, never the rest of the table
+        thread = Comment.objects.filter(concern=concern)
+        fill_paths(thread)
+        recount_replies(thread)
+        return concern
+
+    def _render(self, concern, user):
+        request = RequestFactory().get(f'/concerns/{concern.pk}/')
+        request.user = user
+        # Measure a full render, not a fragment cache hit
+        with override_settings(DETAIL_FRAGMENT_CACHE_SECONDS=0), CaptureQueriesContext(connection) as queries:
+            response = concern_detail_view(request, pk=concern.pk)
+        if response.status_code != 200:
+            raise CommandError(f'Detail page of concern #{concern.pk} answered {response.status_code}')
+        return queries.captured_queries
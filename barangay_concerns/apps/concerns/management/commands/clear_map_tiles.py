@@ -0,0 +1,30 @@
+# apps/concerns/management/commands/clear_map_tiles.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.concerns.geo import lnglat_to_tile
+from apps.concerns.tiles import clear_tiles, get_tile, tile_queryset, tile_root
+
+
+class Command(BaseCommand):
+    help = 'Deletes the on-disk concern map tiles (needed after bulk updates that skip signals)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--warm', type=int, metavar='ZOOM',
+            help='Re-render every non-empty tile from zoom 0 up to ZOOM afterwards',
+        )
+
+    def handle(self, *args, **options):
+        clear_tiles()
+        self.stdout.write(self.style.SUCCESS(f'Cleared {tile_root()}'))
+        if options['warm'] is None:
+            return
+
+        points = [(float(lng), float(lat)) for lat, lng in tile_queryset().values_list('latitude', 'longitude')]
+        rendered = 0
+        for zoom in range(min(options['warm'], settings.MAP_TILE_MAX_ZOOM) + 1):
+            for x, y in {lnglat_to_tile(lng, lat, zoom) for lng, lat in points}:
+                get_tile(zoom, x, y)
+                rendered += 1
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} tiles.'))
@@ -0,0 +1,30 @@
+# apps/concerns/management/commands/explain_concern_queries.py
+from django.core.management.base import BaseCommand
+
+from apps.concerns.query_audit import has_full_scan, hot_querysets, indexes_used
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN on the hot Concern querysets of the list, map and archive views and reports index usage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full query plans')
+
+    def handle(self, *args, **options):
+        missing = 0
+        for label, queryset in hot_querysets():
+            plan = queryset.explain()
+            used = indexes_used(plan)
+            if used and not has_full_scan(plan):
+                self.stdout.write(self.style.SUCCESS(f'[index] {label:<28} {", ".join(used)}'))
+            else:
+                missing += 1
+                note = f'partial: {", ".join(used)}' if used else 'full table scan'
+                self.stdout.write(self.style.WARNING(f'[scan]  {label:<28} {note}'))
+            if options['verbose_plans']:
+                self.stdout.write(plan + '\n')
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f'\n{missing} queryset(s) do not use an index.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nAll hot querysets use an index.'))
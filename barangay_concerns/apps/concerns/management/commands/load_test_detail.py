@@ -0,0 +1,154 @@
+# apps/concerns/management/commands/load_test_detail.py
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.test import Client, override_settings
+
+from apps.concerns.benchmarking import BENCHMARK_ALIAS
+from apps.concerns.comments import fill_paths, recount_replies
+from apps.concerns.fragments import fragment_stats, reset_stats
+from apps.concerns.models import Comment, Concern
+from apps.concerns.voting import VoteError, cast_vote
+
+USERNAME_PREFIX = 'detail-load-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the concern detail page with a read-heavy mix of anonymous page views, '
+        'new comments and votes, once with the fragment cache off and once with it on. '
+        'Run it against a throwaway database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Operations per run (default 2000)')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients (default 8)')
+        parser.add_argument('--concerns', type=int, default=5, help='Concerns viewed (default 5)')
+        parser.add_argument('--comments', type=int, default=200, help='Comments seeded per concern (default 200)')
+        parser.add_argument('--write-ratio', type=float, default=0.02, help='Share of operations that comment or vote (default 0.02)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError(f'Leftover "{USERNAME_PREFIX}*" users found; delete them before running again.')
+
+        users = [User.objects.create(username=f'{USERNAME_PREFIX}{i}', password='!') for i in range(20)]
+        try:
+            concern_ids = self._seed(users, options['concerns'], options['comments'])
+            results = {}
+            for label, seconds in (('cache off', 0), ('cache on', 600)):
+                with override_settings(DETAIL_FRAGMENT_CACHE_SECONDS=seconds):
+                    reset_stats()
+                    results[label] = self._run(concern_ids, users, options)
+                self._report(label, results[label])
+        finally:
+            Concern.objects.filter(alias=BENCHMARK_ALIAS, reporter__username__startswith=USERNAME_PREFIX).delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+        speedup = results['cache on']['throughput'] / results['cache off']['throughput']
+        self.stdout.write(self.style.SUCCESS(f'Throughput with the fragment cache: {speedup:.2f}x'))
+
+    def _seed(self, users, concerns, comments):
+        concern_ids = []
+        for i in range(concerns):
+            concern = Concern.objects.create(
+                title=f'Detail load test {i}', description='Detail page load test ' * 20, category='OTHER',
+                location='Load test', reporter=users[0], alias=BENCHMARK_ALIAS,
+            )
+            roots = Comment.objects.bulk_create(
+                Comment(concern=concern, author=users[j % len(users)], content=f'Comment {j} ' * 10)
+                for j in range(comments) if j % 3 != 2
+            )
+            Comment.objects.bulk_create(
+                Comment(concern=concern, author=users[j % len(users)], parent=roots[j % len(roots)], content=f'Reply {j}')
+                for j in range(comments) if j % 3 == 2
+            )
+            concern_ids.append(concern.pk)
+        seeded = Comment.objects.filter(concern_id__in=concern_ids)
+        fill_paths(seeded)
+        recount_replies(seeded)
+        return concern_ids
+
+    def _run(self, concern_ids, users, options):
+        rng = random.Random(options['seed'])
+        plan = []
+        for _ in range(options['requests']):
+            concern_id = rng.choice(concern_ids)
+            if rng.random() >= options['write_ratio']:
+                plan.append(('view', concern_id, None))
+            else:
+                plan.append((rng.choice(('comment', 'vote')), concern_id, rng.choice(users[1:])))
+
+        outcomes = Counter()
+        latencies = []
+        lock = threading.Lock()
+        local = threading.local()
+
+        def operate(step):
+            kind, concern_id, user = step
+            start = time.perf_counter()
+            try:
+                if kind == 'view':
+                    if not hasattr(local, 'client'):
+                        local.client = Client(HTTP_HOST='localhost')
+                    outcome = f'view {local.client.get(f"/concerns/{concern_id}/").status_code}'
+                elif kind == 'comment':
+                    Comment.objects.create(concern_id=concern_id, author=user, content='Load test comment')
+                    outcome = 'comment'
+                else:
+                    cast_vote(concern_id, user.pk, 1)
+                    outcome = 'vote'
+            except VoteError:
+                outcome = f'{kind} refused'
+            except DatabaseError:
+                outcome = f'{kind} failed'
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                outcomes[outcome] += 1
+                if kind == 'view':
+                    latencies.append(elapsed)
+
+        def client_thread(steps):
+            # One database connection per simulated client, closed at the end
+            try:
+                for step in steps:
+                    operate(step)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=client_thread, args=(plan[i::options['threads']],))
+            for i in range(options['threads'])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'seconds': elapsed,
+            'throughput': len(plan) / elapsed,
+            'p50': statistics.median(latencies) if latencies else 0.0,
+            'p95': latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+            'outcomes': outcomes,
+            'cache': fragment_stats(),
+        }
+
+    def _report(self, label, result):
+        outcomes = ', '.join(f'{name}={count}' for name, count in sorted(result['outcomes'].items()))
+        self.stdout.write(
+            f'{label:<10} {result["throughput"]:8.1f} ops/s  view p50={result["p50"]:7.2f}ms  '
+            f'p95={result["p95"]:7.2f}ms  ({outcomes})'
+        )
+        cache = result['cache']
+        if cache['lookups']:
+            self.stdout.write(f'{"":<10} fragment hits={cache["hits"]} misses={cache["misses"]} hit rate={cache["hit_rate"]:.1%}')
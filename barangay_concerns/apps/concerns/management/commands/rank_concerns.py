@@ -0,0 +1,15 @@
+# apps/concerns/management/commands/rank_concerns.py
+from django.core.management.base import BaseCommand
+
+from apps.concerns.ranking import recompute_hot_scores
+
+
+class Command(BaseCommand):
+    help = 'Recomputes every concern hot score (needed after changing the HOT_* settings or bulk imports that skip signals)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000, help='Concern ids per UPDATE (default 50000)')
+
+    def handle(self, *args, **options):
+        rows, seconds = recompute_hot_scores(batch_size=options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Ranked {rows} concerns in {seconds:.1f}s'))
@@ -0,0 +1,17 @@
+# apps/concerns/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from apps.concerns.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the concern full-text search index (needed after bulk imports that skip signals)'
+
+    def handle(self, *args, **kwargs):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding search index using the "{backend.name}" backend...')
+        count = backend.rebuild()
+        if backend.name == 'postgres':
+            self.stdout.write(self.style.SUCCESS('PostgreSQL maintains the GIN index itself; nothing to rebuild.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} concerns.'))
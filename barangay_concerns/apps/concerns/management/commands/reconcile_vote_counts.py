@@ -0,0 +1,53 @@
+# apps/concerns/management/commands/reconcile_vote_counts.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.concerns.models import Concern, Vote
+
+
+def _per_concern(aggregate):
+    votes = Vote.objects.filter(concern=OuterRef('pk')).order_by().values('concern')
+    return Coalesce(Subquery(votes.annotate(total=aggregate).values('total')), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Concern.score/upvotes/downvotes from the Vote table and repairs drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Concerns per UPDATE (default 5000)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report concerns whose tally is wrong')
+
+    def handle(self, *args, **options):
+        actual = {
+            'score': _per_concern(Sum('value')),
+            'upvotes': _per_concern(Count('id', filter=Q(value=1))),
+            'downvotes': _per_concern(Count('id', filter=Q(value=-1))),
+        }
+        batch_size = options['batch_size']
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            # Primary-key ranges keep each UPDATE (and its locks) short
+            ids = list(Concern.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+            drifted = Concern.objects.filter(pk__in=ids).alias(
+                actual_score=actual['score'], actual_up=actual['upvotes'], actual_down=actual['downvotes'],
+            ).exclude(score=F('actual_score'), upvotes=F('actual_up'), downvotes=F('actual_down'))
+            if options['dry_run']:
+                rows = drifted.annotate(
+                    real_score=actual['score'], real_up=actual['upvotes'], real_down=actual['downvotes'],
+                ).values_list('pk', 'score', 'upvotes', 'downvotes', 'real_score', 'real_up', 'real_down')
+                for pk, score, up, down, real_score, real_up, real_down in rows:
+                    self.stdout.write(f'#{pk}: stored {score} (+{up}/-{down}), actual {real_score} (+{real_up}/-{real_down})')
+                    repaired += 1
+                continue
+            with transaction.atomic():
+                repaired += drifted.update(**actual)
+
+        verb = 'would be repaired' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} concerns; {repaired} tally(ies) {verb}'))
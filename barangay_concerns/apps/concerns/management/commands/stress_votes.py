@@ -0,0 +1,114 @@
+# apps/concerns/management/commands/stress_votes.py
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import Count, Q, Sum
+
+from apps.concerns.benchmarking import BENCHMARK_ALIAS
+from apps.concerns.models import Concern, Vote
+from apps.concerns.voting import VoteError, cast_vote
+
+USERNAME_PREFIX = 'vote-stress-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Fires many concurrent votes through the vote service and checks that tallies '
+        'and reporter karma come out exact. Run it against a throwaway database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=5000, help='Votes to cast (default 5000)')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent voters (default 16)')
+        parser.add_argument('--voters', type=int, default=200, help='Distinct voting users (default 200)')
+        parser.add_argument('--concerns', type=int, default=5, help='Concerns voted on, all by one reporter (default 5)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the stress users and concerns afterwards')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError(f'Leftover "{USERNAME_PREFIX}*" users found; delete them before running again.')
+
+        reporter = User.objects.create(username=f'{USERNAME_PREFIX}reporter', password='!')
+        User.objects.bulk_create(
+            User(username=f'{USERNAME_PREFIX}{i}', password='!') for i in range(options['voters'])
+        )
+        voter_ids = list(User.objects.filter(username__startswith=USERNAME_PREFIX).exclude(pk=reporter.pk).values_list('pk', flat=True))
+        concern_ids = [
+            Concern.objects.create(
+                title=f'Vote stress {i}', description='Vote stress test', category='OTHER', location='Stress',
+                reporter=reporter, alias=BENCHMARK_ALIAS,
+            ).pk
+            for i in range(options['concerns'])
+        ]
+
+        rng = random.Random(options['seed'])
+        # Far more votes than voter/concern pairs, so toggles and changes are frequent, not just inserts
+        plan = [(rng.choice(concern_ids), rng.choice(voter_ids), rng.choice((1, -1))) for _ in range(options['votes'])]
+        statuses = Counter()
+        statuses_lock = threading.Lock()
+
+        def vote(args):
+            try:
+                status = cast_vote(*args).status
+            except VoteError as e:
+                status = f'refused ({e})'
+            except DatabaseError as e:
+                # A rolled-back vote must leave no trace, so this is still checked below
+                status = f'failed ({e})'
+            finally:
+                connection.close()
+            with statuses_lock:
+                statuses[status] += 1
+
+        self.stdout.write(f'Casting {len(plan)} votes from {len(voter_ids)} users on {len(concern_ids)} concerns '
+                          f'with {options["threads"]} threads...')
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite runs one writer at a time; expect lock timeouts with many threads. Use PostgreSQL for a real test.'
+            ))
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                list(pool.map(vote, plan))
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{len(plan)} votes in {elapsed:.2f}s ({len(plan) / elapsed:.0f}/s): '
+                              + ', '.join(f'{status}={count}' for status, count in sorted(statuses.items())))
+            failures = self._check(reporter, concern_ids)
+        finally:
+            if not options['keep']:
+                Concern.objects.filter(pk__in=concern_ids).delete()
+                User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Tallies and karma are exact'))
+
+    def _check(self, reporter, concern_ids):
+        failures = []
+        tallies = {
+            row['concern']: (row['score'], row['up'], row['down'])
+            for row in Vote.objects.filter(concern_id__in=concern_ids).values('concern').order_by().annotate(
+                score=Sum('value'), up=Count('id', filter=Q(value=1)), down=Count('id', filter=Q(value=-1)),
+            )
+        }
+        for pk, *stored in Concern.objects.filter(pk__in=concern_ids).values_list('pk', 'score', 'upvotes', 'downvotes'):
+            expected = tallies.get(pk, (0, 0, 0))
+            if tuple(stored) != expected:
+                failures.append(f'Concern #{pk}: stored {tuple(stored)}, votes say {expected}')
+
+        reporter.refresh_from_db()
+        karma = sum(score for score, _, _ in tallies.values())
+        if reporter.points != karma:
+            failures.append(f'Reporter karma is {reporter.points}, votes say {karma}')
+        if reporter.is_active and reporter.points <= settings.KARMA_BAN_THRESHOLD:
+            failures.append(f'Reporter is still active at {reporter.points} points')
+        return failures
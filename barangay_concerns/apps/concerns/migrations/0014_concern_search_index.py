@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Frozen copies of apps.concerns.search as of this migration; migrations must
+# not follow later edits of app code.
+FTS_TABLE = 'concerns_concern_fts'
+DOCUMENT_FIELDS = ('title', 'description', 'location', 'barangay', 'municipality')
+POSTGRES_INDEX_SQL = "CREATE INDEX IF NOT EXISTS concern_search_gin ON concerns_concern USING GIN (to_tsvector('simple', {}))".format(
+    " || ' ' || ".join(DOCUMENT_FIELDS)
+)
+SQLITE_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(DOCUMENT_FIELDS)}, tokenize='unicode61 remove_diacritics 2')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """GIN index on PostgreSQL, populated FTS5 shadow table on SQLite."""
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_INDEX_SQL)
+    elif connection.vendor == 'sqlite':
+        columns = ', '.join(DOCUMENT_FIELDS)
+        schema_editor.execute(SQLITE_CREATE_SQL)
+        schema_editor.execute(f'INSERT INTO {FTS_TABLE} (rowid, {columns}) SELECT id, {columns} FROM concerns_concern')
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS concern_search_gin')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerns', '0013_comment_parent'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
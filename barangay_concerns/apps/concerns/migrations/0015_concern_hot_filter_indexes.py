@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerns', '0014_concern_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False), models.Q(('status', 'CLOSED'), _negated=True)), fields=['-created_at', '-id'], name='concern_open_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['status', '-created_at', '-id'], name='concern_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False), models.Q(('status', 'CLOSED'), _negated=True)), fields=['category', '-created_at', '-id'], name='concern_category_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False), models.Q(('status', 'CLOSED'), _negated=True)), fields=['region', '-created_at', '-id'], name='concern_region_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False), models.Q(('status', 'CLOSED'), _negated=True)), fields=['province', '-created_at', '-id'], name='concern_province_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False), models.Q(('status', 'CLOSED'), _negated=True), ('latitude__isnull', False), ('longitude__isnull', False)), fields=['latitude', 'longitude'], name='concern_map_coords_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', True)), fields=['-created_at', '-id'], name='concern_archived_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(lat, lng, precision=9):
+    """Frozen copy of apps.concerns.geo.encode_geohash."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, interval = (lng, lng_range) if even else (lat, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    EmergencyUnit = apps.get_model('concerns', 'EmergencyUnit')
+    units = list(EmergencyUnit.objects.only('latitude', 'longitude'))
+    for unit in units:
+        unit.geohash = encode_geohash(float(unit.latitude), float(unit.longitude))
+    EmergencyUnit.objects.bulk_update(units, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerns', '0015_concern_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emergencyunit',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
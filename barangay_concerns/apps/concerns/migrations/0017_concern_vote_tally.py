@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def tally_votes(apps, schema_editor):
+    Concern = apps.get_model('concerns', 'Concern')
+    Vote = apps.get_model('concerns', 'Vote')
+
+    def per_concern(aggregate):
+        votes = Vote.objects.filter(concern=OuterRef('pk')).order_by().values('concern')
+        return Coalesce(Subquery(votes.annotate(total=aggregate).values('total')), Value(0))
+
+    Concern.objects.filter(pk__in=Vote.objects.values('concern')).update(
+        score=per_concern(Sum('value')),
+        upvotes=per_concern(Count('id', filter=Q(value=1))),
+        downvotes=per_concern(Count('id', filter=Q(value=-1))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerns', '0016_emergencyunit_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='concern',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='concern',
+            name='score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='concern',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False), models.Q(('status', 'CLOSED'), _negated=True)), fields=['-score', '-created_at', '-id'], name='concern_open_top_idx'),
+        ),
+        migrations.RunPython(tally_votes, migrations.RunPython.noop),
+    ]
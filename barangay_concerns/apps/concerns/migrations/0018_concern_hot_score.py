@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:57
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Frozen copies of apps.concerns.ranking.HOT_EPOCH and the HOT_* settings as of
+# this migration; after changing the settings run ``manage.py rank_concerns``
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc).timestamp()
+HOT_DECAY_SECONDS = 45000
+HOT_COMMENT_WEIGHT = 2
+HOT_PRIORITY_POINTS = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 3, 'URGENT': 10}
+
+
+def rank_concerns(apps, schema_editor):
+    """The hot score formula of apps.concerns.ranking, computed row by row."""
+    Concern = apps.get_model('concerns', 'Concern')
+    ranked = Concern.objects.annotate(comment_total=Count('comments')).order_by('pk').only('score', 'priority', 'created_at')
+    batch = []
+    for concern in ranked.iterator(chunk_size=2000):
+        engagement = (
+            concern.score
+            + concern.comment_total * HOT_COMMENT_WEIGHT
+            + HOT_PRIORITY_POINTS.get(concern.priority, 0)
+        )
+        sign = (engagement > 0) - (engagement < 0)
+        age = (concern.created_at.timestamp() - HOT_EPOCH) / HOT_DECAY_SECONDS
+        concern.hot_score = sign * math.log10(max(abs(engagement), 1)) + age
+        batch.append(concern)
+        if len(batch) == 2000:
+            Concern.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    Concern.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerns', '0017_concern_vote_tally'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='concern',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='concern',
+            index=models.Index(condition=models.Q(('is_archived', False), models.Q(('status', 'CLOSED'), _negated=True)), fields=['-hot_score', '-id'], name='concern_open_hot_idx'),
+        ),
+        migrations.RunPython(rank_concerns, migrations.RunPython.noop),
+    ]
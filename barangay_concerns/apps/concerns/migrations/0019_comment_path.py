@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+PATH_STEP = 8  # Comment.PATH_STEP
+
+
+def path_segment(pk):
+    """Comment.path_segment: the id in base 36, zero-padded to PATH_STEP."""
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+    return digits.rjust(PATH_STEP, '0')
+
+
+def fill_comment_paths(apps, schema_editor):
+    """
+    Batched, so large comment tables are not rewritten in one statement.
+    Replies have larger ids than their parents, so going in id order finds
+    each parent's path already set.
+    """
+    Comment = apps.get_model('concerns', 'Comment')
+    while True:
+        batch = list(Comment.objects.filter(path='').order_by('pk').only('pk', 'parent_id')[:5000])
+        if not batch:
+            return
+        paths = dict(Comment.objects.filter(
+            pk__in={comment.parent_id for comment in batch if comment.parent_id}
+        ).exclude(path='').values_list('pk', 'path'))
+        for comment in batch:
+            comment.path = paths.get(comment.parent_id, '') + path_segment(comment.pk)
+            paths[comment.pk] = comment.path
+        Comment.objects.bulk_update(batch, ['path'], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerns', '0018_concern_hot_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['concern', 'path'], name='comment_thread_idx'),
+        ),
+        migrations.RunPython(fill_comment_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:11
+
+from collections import Counter
+
+from django.db import migrations, models
+
+PATH_STEP = 8  # Comment.PATH_STEP
+
+
+def count_replies(apps, schema_editor):
+    """Count each comment's replies from the paths, read 5000 at a time in path order."""
+    Comment = apps.get_model('concerns', 'Comment')
+    counts = Counter()
+    last_path = ''
+    while True:
+        paths = list(
+            Comment.objects.filter(parent__isnull=False, path__gt=last_path).order_by('path').values_list('path', flat=True)[:5000]
+        )
+        if not paths:
+            break
+        for path in paths:
+            # Every ancestor segment of the path, i.e. all but the last
+            counts.update(int(path[i:i + PATH_STEP], 36) for i in range(0, len(path) - PATH_STEP, PATH_STEP))
+        last_path = paths[-1]
+
+    rows = [Comment(pk=pk, reply_count=count) for pk, count in counts.items()]
+    Comment.objects.bulk_update(rows, ['reply_count'], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerns', '0019_comment_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('parent__isnull', True)), fields=['concern', 'created_at', 'id'], name='comment_root_page_idx'),
+        ),
+        migrations.RunPython(count_replies, migrations.RunPython.noop),
+    ]
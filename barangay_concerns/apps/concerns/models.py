@@ -1,9 +1,93 @@
 # apps/concerns/models.py
 from django.db import models
+from django.db.models import F, Q
 from django.conf import settings
 from django.utils import timezone
 
-class Concern(models.Model):
+from .fragments import bump_on_commit
+from .geo import encode_geohash
+
+# Concerns shown on the public list and map: not archived and not closed.
+ACTIVE_OPEN = Q(is_archived=False) & ~Q(status='CLOSED')
+
+
+class ChangeTrackingMixin:
+    """
+    Remember the field values an instance was loaded with, so code can ask
+    what changed without fetching the row again.
+
+    ``previous(attname)`` is the stored value (None for unsaved instances)
+    and ``get_dirty_fields()`` maps each changed field's attname to it. Both
+    stay valid in pre_save and post_save receivers; the snapshot moves on
+    once ``save()`` returns. Saving a loaded instance without
+    ``update_fields`` writes only the changed fields (and ``auto_now`` ones).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def _tracked_fields(self):
+        return [field for field in self._meta.concrete_fields if not field.primary_key]
+
+    def _stored_values(self):
+        """The snapshot; fetched once for instances built by hand with a pk."""
+        if getattr(self, '_loaded_values', None) is None and self.pk is not None:
+            attnames = [field.attname for field in self._tracked_fields()]
+            self._loaded_values = type(self)._base_manager.filter(pk=self.pk).values(*attnames).first()
+        return getattr(self, '_loaded_values', None)
+
+    def previous(self, attname):
+        return (self._stored_values() or {}).get(attname)
+
+    def get_dirty_fields(self):
+        stored = self._stored_values()
+        if stored is None:
+            return {}
+        dirty = {}
+        for field in self._tracked_fields():
+            if field.attname not in self.__dict__:
+                continue  # deferred and never set
+            value = self.__dict__[field.attname]
+            if field.attname not in stored:
+                dirty[field.attname] = None
+            elif value != stored[field.attname] or getattr(value, '_committed', True) is False:
+                # An uncommitted FieldFile is a new upload even under the old name
+                dirty[field.attname] = stored[field.attname]
+        return dirty
+
+    def save(self, *args, **kwargs):
+        if self._stored_values() is None:
+            # Being inserted: nothing is stored yet
+            self._loaded_values = {}
+        elif not self._state.adding and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            dirty = list(self.get_dirty_fields())
+            auto_now = [field.attname for field in self._tracked_fields() if getattr(field, 'auto_now', False)]
+            kwargs['update_fields'] = dirty + [attname for attname in auto_now if attname not in dirty]
+        super().save(*args, **kwargs)
+        self._snapshot(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot(fields)
+
+    def _snapshot(self, fields=None):
+        """Record the current values (of ``fields`` only, if given) as stored."""
+        attnames = {field.name: field.attname for field in self._tracked_fields()}
+        if fields is None:
+            self._loaded_values = {}
+            fields = attnames
+        elif getattr(self, '_loaded_values', None) is None:
+            return
+        for name in fields:
+            attname = attnames.get(name, name)
+            if attname in self.__dict__:
+                self._loaded_values[attname] = self.__dict__[attname]
+
+
+class Concern(ChangeTrackingMixin, models.Model):
     CATEGORY_CHOICES = (
         ('FLOOD', 'Flooding'),
         ('ROAD', 'Road Infrastructure'),
@@ -65,8 +149,34 @@ class Concern(models.Model):
     is_anonymous = models.BooleanField(default=False, help_text="Hide my identity from public view")
     alias = models.CharField(max_length=50, blank=True, null=True, help_text="Display name if anonymous (optional)")
     
+    # Vote tally kept in step with the Vote table (see record_vote);
+    # `manage.py reconcile_vote_counts` repairs drift
+    score = models.IntegerField(default=0, editable=False)
+    upvotes = models.PositiveIntegerField(default=0, editable=False)
+    downvotes = models.PositiveIntegerField(default=0, editable=False)
+    # Time-decayed rank for ?sort=hot, rewritten on vote, comment and priority
+    # changes (see ranking.py); `manage.py rank_concerns` recomputes all rows
+    hot_score = models.FloatField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
+        # Partial indexes matched to the read paths of the list, map and archive
+        # views (see the explain_concern_queries command).
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=ACTIVE_OPEN, name='concern_open_recent_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], condition=Q(is_archived=False), name='concern_status_recent_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], condition=ACTIVE_OPEN, name='concern_category_recent_idx'),
+            models.Index(fields=['region', '-created_at', '-id'], condition=ACTIVE_OPEN, name='concern_region_recent_idx'),
+            models.Index(fields=['province', '-created_at', '-id'], condition=ACTIVE_OPEN, name='concern_province_recent_idx'),
+            models.Index(
+                fields=['latitude', 'longitude'],
+                condition=ACTIVE_OPEN & Q(latitude__isnull=False, longitude__isnull=False),
+                name='concern_map_coords_idx',
+            ),
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_archived=True), name='concern_archived_recent_idx'),
+            models.Index(fields=['-score', '-created_at', '-id'], condition=ACTIVE_OPEN, name='concern_open_top_idx'),
+            models.Index(fields=['-hot_score', '-id'], condition=ACTIVE_OPEN, name='concern_open_hot_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
@@ -94,6 +204,25 @@ class Concern(models.Model):
         }
         return colors.get(self.status, 'red')
     
+    @classmethod
+    def record_vote(cls, pk, old_value=0, new_value=0):
+        """
+        Move the tally of concern ``pk`` from a voter's ``old_value`` to
+        ``new_value`` (1, -1, or 0 for no vote) in a single UPDATE, which
+        also rewrites the hot score from the new tally.
+        """
+        from .ranking import hot_score
+
+        if old_value == new_value:
+            return
+        new_score = F('score') + new_value - old_value
+        cls.objects.filter(pk=pk).update(
+            score=new_score,
+            hot_score=hot_score(score=new_score),
+            upvotes=F('upvotes') + (new_value == 1) - (old_value == 1),
+            downvotes=F('downvotes') + (new_value == -1) - (old_value == -1),
+        )
+    
     def can_be_edited(self):
         """Check if concern can be edited"""
         # Once in progress or beyond, it's locked for regular users
@@ -104,21 +233,19 @@ class Concern(models.Model):
         self.is_archived = True
         self.archived_at = timezone.now()
         self.archived_by = user
-        self.save()
+        self.save(update_fields=['is_archived', 'archived_at', 'archived_by', 'updated_at'])
     
     def unarchive(self):
         """Unarchive the concern"""
         self.is_archived = False
         self.archived_at = None
         self.archived_by = None
-        self.save()
+        self.save(update_fields=['is_archived', 'archived_at', 'archived_by', 'updated_at'])
     
     def save(self, *args, **kwargs):
-        # Auto-lock when status changes from PENDING
-        if self.pk:  # Only for existing objects
-            old_concern = Concern.objects.filter(pk=self.pk).first()
-            if old_concern and old_concern.status == 'PENDING' and self.status != 'PENDING':
-                self.is_locked = True
+        # Auto-lock when status changes from PENDING (previous() needs no query)
+        if self.pk and self.previous('status') == 'PENDING' and self.status != 'PENDING':
+            self.is_locked = True
         
         # Set resolved_at when status changes to RESOLVED or CLOSED
         if self.status in ['RESOLVED', 'CLOSED'] and not self.resolved_at:
@@ -128,15 +255,28 @@ class Concern(models.Model):
 
 
 class Comment(models.Model):
+    # Width of one path segment: a comment's id in base 36, zero padded
+    PATH_STEP = 8
+
     concern = models.ForeignKey(Concern, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Ancestors' segments then this comment's own, so sorting by path lists a
+    # thread depth first and a subtree is every path starting with its root's
+    path = models.CharField(max_length=255, db_index=True, blank=True, editable=False)
+    # Replies at any depth below this comment, kept up to date on insert and delete
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['concern', 'path'], name='comment_thread_idx'),
+            # Keyset pages of a concern's top-level comments
+            models.Index(fields=['concern', 'created_at', 'id'], condition=Q(parent__isnull=True), name='comment_root_page_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.concern.title}"
@@ -145,6 +285,46 @@ class Comment(models.Model):
     def is_reply(self):
         return self.parent is not None
 
+    @property
+    def depth(self):
+        """0 for a top-level comment, 1 for a reply to it, and so on."""
+        return max(len(self.path) // self.PATH_STEP - 1, 0)
+
+    @property
+    def ancestor_ids(self):
+        """Ids of the comments above this one, top-level comment first."""
+        return self.path_ids(self.path)[:-1]
+
+    @classmethod
+    def path_ids(cls, path):
+        return [int(path[i:i + cls.PATH_STEP], 36) for i in range(0, len(path), cls.PATH_STEP)]
+
+    @classmethod
+    def path_segment(cls, pk):
+        digits = ''
+        while pk:
+            pk, digit = divmod(pk, 36)
+            digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+        return digits.rjust(cls.PATH_STEP, '0')
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.parent_id and not self.parent.path:
+            # A parent from bulk_create has its path in the database only
+            self.parent.refresh_from_db(fields=['path'])
+        if self._state.adding and self.parent_id and self.parent.depth + 1 >= settings.COMMENT_MAX_DEPTH:
+            # The path column has room for COMMENT_MAX_DEPTH levels; deeper
+            # replies join the conversation one level up
+            self.parent = self.parent.parent
+        super().save(*args, **kwargs)
+        if not self.path:
+            # The id is only known after the INSERT
+            self.path = (self.parent.path if self.parent_id else '') + self.path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            if self.parent_id:
+                Comment.objects.filter(pk__in=self.ancestor_ids).update(reply_count=F('reply_count') + 1)
+        # Here rather than in a post_save receiver, which runs before the path is set
+        bump_on_commit(self.concern_id)
+
 class EmergencyUnit(models.Model):
     UNIT_TYPES = (
         ('POLICE', 'Police Station'),
@@ -159,9 +339,15 @@ class EmergencyUnit(models.Model):
     contact_number = models.CharField(max_length=50, blank=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    # Derived from the coordinates on save; prefix searches find nearby units
+    geohash = models.CharField(max_length=12, db_index=True, editable=False, blank=True)
     
     def __str__(self):
         return f"{self.name} ({self.get_unit_type_display()})"
+    
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(float(self.latitude), float(self.longitude))
+        super().save(*args, **kwargs)
 
 class Vote(models.Model):
     VOTE_CHOICES = (
@@ -0,0 +1,181 @@
+# apps/concerns/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page remembers the ordering values of its first and
+last rows in an opaque cursor token and the next query starts right after
+them, so page 1000 costs the same as page 1. The ordering must end with a
+unique column (``id``) and its fields must not be NULL.
+"""
+import base64
+import datetime
+import decimal
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    """The cursor token is malformed or does not match the ordering."""
+
+
+class CursorEncoder(json.JSONEncoder):
+    """
+    Like DjangoJSONEncoder but keeps full microsecond precision, which the
+    equality part of the seek condition depends on.
+    """
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date)):
+            return o.isoformat()
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        return super().default(o)
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    def __init__(self, queryset, ordering=DEFAULT_ORDERING, page_size=None):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or settings.PAGINATION_PAGE_SIZE
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, field) for field in self.fields]
+        payload = json.dumps({'v': values, 'd': direction}, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values, direction = data['v'], data['d']
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor('Malformed cursor.')
+        if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor('Cursor does not match this listing.')
+        return values, direction
+
+    def _seek_filter(self, values, forward):
+        """
+        Build ``(a, b, id) < (x, y, z)`` as nested OR/AND conditions so it also
+        works for mixed ascending/descending orderings.
+        """
+        condition = Q()
+        for position, ordering_field in enumerate(self.ordering):
+            descending = ordering_field.startswith('-')
+            # Moving forward through a descending column means smaller values
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{self.fields[position]}__{lookup}': values[position]})
+            for previous in range(position):
+                step &= Q(**{self.fields[previous]: values[previous]})
+            condition |= step
+        return condition
+
+    @staticmethod
+    def _reverse(ordering):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+    def page(self, cursor=None):
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.page_size + 1])
+            has_more = len(rows) > self.page_size
+            rows = rows[:self.page_size]
+            return CursorPage(
+                rows,
+                next_cursor=self.encode_cursor(rows[-1], 'next') if has_more else None,
+                previous_cursor=None,
+            )
+
+        values, direction = self.decode_cursor(cursor)
+        forward = direction == 'next'
+        ordering = self.ordering if forward else self._reverse(self.ordering)
+        try:
+            queryset = self.queryset.filter(self._seek_filter(values, forward))
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor('Cursor values do not fit this listing.')
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows, next_cursor=None, previous_cursor=None)
+
+        # We arrived from the other side, so that side certainly has rows.
+        has_next = has_more if forward else True
+        has_previous = True if forward else has_more
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1], 'next') if has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], 'prev') if has_previous else None,
+        )
+
+
+def get_page_size(request):
+    """Read ``?page_size=`` clamped to ``PAGINATION_MAX_PAGE_SIZE``."""
+    try:
+        size = int(request.GET.get('page_size', settings.PAGINATION_PAGE_SIZE))
+    except ValueError:
+        size = settings.PAGINATION_PAGE_SIZE
+    return max(1, min(size, settings.PAGINATION_MAX_PAGE_SIZE))
+
+
+def paginate(request, queryset, ordering=DEFAULT_ORDERING, strict=False):
+    """
+    Return the ``CursorPage`` selected by ``?cursor=``. A bad cursor falls back
+    to the first page, unless ``strict`` is set (JSON APIs), where it raises
+    ``InvalidCursor``.
+    """
+    paginator = CursorPaginator(queryset, ordering, page_size=get_page_size(request))
+    try:
+        return paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        if strict:
+            raise
+        return paginator.page()
+
+
+def cursor_querystring(request, cursor):
+    """Current query string with ``cursor`` swapped in, for next/previous links."""
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return params.urlencode()
+
+
+def page_links(request, page, ordering=DEFAULT_ORDERING):
+    """
+    Template context for the next/previous links of ``page``, paginated by
+    ``ordering``. The links read Newer/Older only for newest-first pages.
+    """
+    return {
+        'page': page,
+        'chronological': tuple(ordering) == DEFAULT_ORDERING,
+        'next_query': cursor_querystring(request, page.next_cursor) if page.has_next else '',
+        'previous_query': cursor_querystring(request, page.previous_cursor) if page.has_previous else '',
+    }
@@ -0,0 +1,69 @@
+# apps/concerns/query_audit.py
+"""
+The hot Concern querysets of the public views, built through the views' own
+filter helpers so the audit always matches what the views run.
+Used by the explain_concern_queries and benchmark_indexes commands.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from .models import Concern
+from .pagination import DEFAULT_ORDERING
+
+INDEX_NAME_RE = re.compile(r'(?:USING (?:COVERING )?INDEX|Index (?:Only )?Scan(?: Backward)? using|Bitmap Index Scan on) "?(\w+)"?')
+FULL_SCAN_RE = re.compile(r'Seq Scan on concerns_concern\b|SCAN concerns_concern\s*$', re.MULTILINE)
+
+
+def _request(params, user=None):
+    request = RequestFactory().get('/', params)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def _located_user(region, province):
+    """Unsaved user with a location profile, for the geo-scoped list tabs."""
+    return get_user_model()(username='query-audit', region=region, province=province)
+
+
+def hot_querysets(page_size=20):
+    """
+    Yield ``(label, queryset)`` for the first page of each hot read path.
+    """
+    from . import views
+
+    sample = Concern.objects.exclude(region='').exclude(province='').values('region', 'province').first()
+    region = sample['region'] if sample else 'NCR'
+    province = sample['province'] if sample else 'Metro Manila'
+    user = _located_user(region, province)
+
+    list_cases = [
+        ('list: national', {}, None),
+        ('list: status=PENDING', {'status': 'PENDING'}, None),
+        ('list: category=FLOOD', {'category': 'FLOOD'}, None),
+        ('list: regional scope', {'scope': 'regional'}, user),
+        ('list: provincial scope', {'scope': 'provincial'}, user),
+    ]
+    for label, params, as_user in list_cases:
+        concerns, ordering, _ = views._filter_concern_list(_request(params, as_user))
+        yield label, concerns.order_by(*ordering)[:page_size + 1]
+
+    concerns, _, _ = views._filter_map_concerns(_request({}))
+    yield 'map: all geotagged', concerns
+    concerns, _, _ = views._filter_map_concerns(_request({'status': 'IN_PROGRESS'}))
+    yield 'map: status=IN_PROGRESS', concerns
+
+    archived = Concern.objects.filter(is_archived=True).order_by(*DEFAULT_ORDERING)
+    yield 'archive list', archived[:page_size + 1]
+
+
+def indexes_used(plan):
+    """Names of the indexes mentioned in an EXPLAIN plan."""
+    return sorted(set(INDEX_NAME_RE.findall(plan)))
+
+
+def has_full_scan(plan):
+    """True when the plan reads the whole concern table without an index."""
+    return bool(FULL_SCAN_RE.search(plan))
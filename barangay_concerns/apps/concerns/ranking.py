@@ -0,0 +1,106 @@
+# apps/concerns/ranking.py
+"""
+"Hot" ranking of concerns (``?sort=hot``).
+
+A concern's engagement is its vote score plus ``HOT_COMMENT_WEIGHT`` points
+per comment plus ``HOT_PRIORITY_POINTS`` for its priority. As on Reddit,
+
+    hot_score = sign(engagement) * log10(max(|engagement|, 1))
+                + seconds since HOT_EPOCH / HOT_DECAY_SECONDS
+
+so a report ``HOT_DECAY_SECONDS`` newer needs ten times less engagement to
+rank level with an older one. Age is measured from a fixed epoch rather
+than from "now", so the order of two scores never changes just because time
+passed: the column only needs rewriting when a concern's own engagement
+changes, and it can be indexed.
+
+``Concern.record_vote`` and the comment and concern signals rewrite one
+row with ``hot_score()``; ``recompute_hot_scores`` rewrites every row in
+primary-key batches after the weights change or a bulk load that skipped
+signals (``manage.py rank_concerns``).
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Case, Count, F, FloatField, Func, Max, Min, OuterRef, Subquery, Value, When
+from django.db.models.functions import Abs, Coalesce, Greatest, Log, Sign
+
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc).timestamp()
+HOT_ORDERING = ('-hot_score', '-id')
+
+
+class EpochSeconds(Func):
+    """Seconds since 1970 of a datetime column, as a float."""
+    output_field = FloatField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='EXTRACT(EPOCH FROM %(expressions)s)', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='UNIX_TIMESTAMP(%(expressions)s)', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Julian day 2440587.5 is 1970-01-01 00:00 UTC
+        return self.as_sql(
+            compiler, connection, template='((julianday(%(expressions)s) - 2440587.5) * 86400.0)', **extra_context
+        )
+
+
+def _comment_count():
+    from .models import Comment
+
+    counts = Comment.objects.filter(concern=OuterRef('pk')).order_by().values('concern').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def _priority_points():
+    return Case(
+        *[When(priority=priority, then=Value(float(points))) for priority, points in settings.HOT_PRIORITY_POINTS.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def hot_score(score=None):
+    """
+    SQL expression for a concern's hot score, for use in ``update()``.
+    ``score`` overrides the vote score column, e.g. with the value an
+    UPDATE is about to set it to.
+    """
+    engagement = (
+        (F('score') if score is None else score)
+        + _comment_count() * settings.HOT_COMMENT_WEIGHT
+        + _priority_points()
+    )
+    magnitude = Log(Value(10.0), Greatest(Abs(engagement), Value(1.0), output_field=FloatField()))
+    age = (EpochSeconds('created_at') - Value(HOT_EPOCH)) / Value(float(settings.HOT_DECAY_SECONDS))
+    return Sign(engagement, output_field=FloatField()) * magnitude + age
+
+
+def refresh_hot_score(concern_id):
+    """Recompute one concern's hot score (a single UPDATE)."""
+    from .models import Concern
+
+    Concern.objects.filter(pk=concern_id).update(hot_score=hot_score())
+
+
+def recompute_hot_scores(batch_size=50000, stdout=None):
+    """
+    Recompute every concern's hot score in primary-key ranges of
+    ``batch_size`` so no single statement holds locks for long.
+    Returns ``(rows, seconds)``.
+    """
+    from .models import Concern
+
+    start = time.perf_counter()
+    bounds = Concern.objects.aggregate(first=Min('id'), last=Max('id'))
+    rows = 0
+    if bounds['first'] is None:
+        return rows, 0.0
+    first, last = bounds['first'], bounds['last']
+    for batch, low in enumerate(range(first, last + 1, batch_size), start=1):
+        rows += Concern.objects.filter(pk__gte=low, pk__lt=low + batch_size).update(hot_score=hot_score())
+        if stdout and batch % 10 == 0:
+            stdout.write(f'  ranked {rows} concerns')
+    return rows, time.perf_counter() - start
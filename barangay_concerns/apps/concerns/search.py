@@ -0,0 +1,183 @@
+# apps/concerns/search.py
+"""
+Full-text search for concerns.
+
+Every concern has a search document made of its title, description,
+location, barangay and municipality. On PostgreSQL the document is an
+expression covered by a GIN index (see migration 0014), so the database
+keeps it up to date by itself. On SQLite it lives in an FTS5 shadow table
+that is refreshed from the concern save/delete signals.
+
+Views should only call ``search_concerns(queryset, query)``; it picks the
+right backend for the active database and returns the filtered queryset
+annotated with ``search_rank`` (higher is more relevant).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+CONCERN_TABLE = 'concerns_concern'
+FTS_TABLE = 'concerns_concern_fts'
+DOCUMENT_FIELDS = ('title', 'description', 'location', 'barangay', 'municipality')
+
+# Must stay identical to the expression in the GIN index of migration 0014,
+# otherwise PostgreSQL will not use the index.
+POSTGRES_DOCUMENT_SQL = "to_tsvector('simple', {})".format(
+    " || ' ' || ".join(f'"{CONCERN_TABLE}"."{field}"' for field in DOCUMENT_FIELDS)
+)
+POSTGRES_INDEX_SQL = "CREATE INDEX IF NOT EXISTS concern_search_gin ON {} USING GIN (to_tsvector('simple', {}))".format(
+    CONCERN_TABLE, " || ' ' || ".join(DOCUMENT_FIELDS)
+)
+
+# bm25() weights per FTS column, in DOCUMENT_FIELDS order. Title hits count most.
+FTS_WEIGHTS = (10.0, 1.0, 3.0, 2.0, 2.0)
+SQLITE_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(DOCUMENT_FIELDS)}, tokenize='unicode61 remove_diacritics 2')"
+)
+
+# Ordering of search results; also the keyset used to paginate them.
+SEARCH_ORDERING = ('-search_rank', '-created_at', '-id')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_document(concern):
+    """Return the searchable text of a concern, one entry per document field."""
+    return [getattr(concern, field) or '' for field in DOCUMENT_FIELDS]
+
+
+class BasicSearchBackend:
+    """
+    Case-insensitive substring search. This is the original list view
+    behaviour; it needs no index but scans every row.
+    """
+    name = 'basic'
+
+    def search(self, queryset, query):
+        condition = Q()
+        for field in ('title', 'description', 'location'):
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    def index_concern(self, concern):
+        pass
+
+    def remove_concern(self, pk):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+    """tsvector search backed by the ``concern_search_gin`` expression index."""
+    name = 'postgres'
+
+    def search(self, queryset, query):
+        tsquery = "websearch_to_tsquery('simple', %s)"
+        return queryset.filter(
+            RawSQL(f'{POSTGRES_DOCUMENT_SQL} @@ {tsquery}', [query], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank_cd({POSTGRES_DOCUMENT_SQL}, {tsquery})', [query], output_field=FloatField())
+        )
+
+
+class SQLiteFTSSearchBackend(BasicSearchBackend):
+    """FTS5 search over the ``concerns_concern_fts`` shadow table."""
+    name = 'sqlite_fts'
+
+    @staticmethod
+    def to_match_expression(query):
+        """
+        Turn free text into a safe FTS5 MATCH expression: every word is quoted
+        (so operators in user input are ignored) and prefix-matched.
+        """
+        tokens = _TOKEN_RE.findall(query)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset, query):
+        match = self.to_match_expression(query)
+        if not match:
+            return queryset.none()
+
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        # FTS5 tables are not Django models, so join through extra(). bm25() is
+        # lower for better matches; negate it to keep "higher is more relevant".
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = "{CONCERN_TABLE}"."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        ).annotate(
+            search_rank=RawSQL(f'-bm25({FTS_TABLE}, {weights})', [], output_field=FloatField())
+        )
+
+    def index_concern(self, concern):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [concern.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(DOCUMENT_FIELDS)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(DOCUMENT_FIELDS))})",
+                [concern.pk, *build_search_document(concern)],
+            )
+
+    def remove_concern(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+    def rebuild(self):
+        columns = ', '.join(DOCUMENT_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, {columns}) '
+                f'SELECT id, {columns} FROM {CONCERN_TABLE}'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+            return cursor.fetchone()[0]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (BasicSearchBackend, PostgresSearchBackend, SQLiteFTSSearchBackend)
+}
+
+
+_fts_available = None
+
+
+def sqlite_fts_available():
+    """True when the FTS5 shadow table exists in the current SQLite database."""
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available
+
+
+def get_search_backend():
+    """
+    Pick the search backend for the default database.
+
+    ``CONCERN_SEARCH_BACKEND`` can force one of ``basic``, ``postgres`` or
+    ``sqlite_fts``; when empty the backend follows the database vendor.
+    """
+    forced = getattr(settings, 'CONCERN_SEARCH_BACKEND', '')
+    if forced:
+        return BACKENDS[forced]()
+
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if connection.vendor == 'sqlite' and sqlite_fts_available():
+        return SQLiteFTSSearchBackend()
+    return BasicSearchBackend()
+
+
+def search_concerns(queryset, query):
+    """Filter ``queryset`` to concerns matching ``query``, best matches first."""
+    return get_search_backend().search(queryset, query).order_by(*SEARCH_ORDERING)
@@ -0,0 +1,128 @@
+# apps/concerns/signals.py
+"""
+Keep derived data (search index, map cluster cache, map tiles, emergency unit
+index, hot scores, comment reply counts, detail page fragments, cached list
+pages, map data and analytics) in sync with the Concern, Comment and
+EmergencyUnit tables.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.caching import ANALYTICS, CONCERN_LIST, MAP_DATA
+
+from . import clustering, fragments, ranking, spatial, tiles
+from .models import Comment, Concern, EmergencyUnit
+from .search import DOCUMENT_FIELDS, get_search_backend
+
+# Fields that decide where, and whether, a concern shows up on the map
+MAP_FIELDS = ('latitude', 'longitude', 'status', 'category', 'is_archived')
+# Fields the analytics dashboard counts by
+ANALYTICS_FIELDS = ('status', 'category', 'is_archived')
+# Fields that decide which concerns a cached list page holds, and in what
+# order (only ids are cached; see concerns.views._cached_list_page)
+LIST_FIELDS = ('status', 'category', 'is_archived', 'region', 'province', 'created_at', *DOCUMENT_FIELDS)
+
+
+def invalidate_map_point(latitude, longitude):
+    """
+    Drop cached clusters and tiles at a point once the change is committed,
+    so a request in between cannot re-cache the old data.
+    """
+    def invalidate():
+        clustering.invalidate_point(latitude, longitude)
+        tiles.invalidate_point(latitude, longitude)
+        MAP_DATA.invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Concern)
+def concern_index_on_save(sender, instance, created, **kwargs):
+    """Refresh the concern's search document if its text changed."""
+    if created or set(DOCUMENT_FIELDS) & set(instance.get_dirty_fields()):
+        get_search_backend().index_concern(instance)
+
+
+@receiver(post_save, sender=Concern)
+def concern_invalidate_map(sender, instance, created, **kwargs):
+    """Drop cached clusters and tiles the concern left and entered."""
+    if not created and not set(MAP_FIELDS) & set(instance.get_dirty_fields()):
+        return
+    if not created:
+        invalidate_map_point(instance.previous('latitude'), instance.previous('longitude'))
+    invalidate_map_point(instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=Concern)
+def concern_rank_on_save(sender, instance, created, **kwargs):
+    """Score new concerns and rescore when the priority changed."""
+    if created or instance.previous('priority') != instance.priority:
+        ranking.refresh_hot_score(instance.pk)
+
+
+@receiver(post_save, sender=Concern)
+def concern_refresh_detail(sender, instance, created, **kwargs):
+    """Drop the cached detail page fragments of an edited concern."""
+    if not created:
+        fragments.bump_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Concern)
+def concern_refresh_cached_lists(sender, instance, created, **kwargs):
+    """Drop cached list pages and dashboard numbers the concern now belongs in differently."""
+    dirty = set(instance.get_dirty_fields())
+    if created or set(LIST_FIELDS) & dirty:
+        CONCERN_LIST.invalidate_on_commit()
+    if created or set(ANALYTICS_FIELDS) & dirty:
+        ANALYTICS.invalidate_on_commit()
+
+
+@receiver(post_delete, sender=Concern)
+def concern_unindex_on_delete(sender, instance, **kwargs):
+    """Drop the concern from the search index."""
+    get_search_backend().remove_concern(instance.pk)
+
+
+@receiver(post_delete, sender=Concern)
+def concern_invalidate_map_on_delete(sender, instance, **kwargs):
+    """Drop cached clusters and tiles the concern was in."""
+    invalidate_map_point(instance.latitude, instance.longitude)
+
+
+@receiver(post_delete, sender=Concern)
+def concern_refresh_cached_lists_on_delete(sender, instance, **kwargs):
+    CONCERN_LIST.invalidate_on_commit()
+    ANALYTICS.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Comment)
+def comment_rank_on_save(sender, instance, created, **kwargs):
+    """A new comment raises its concern's hot score; edits do not change it."""
+    if created:
+        ranking.refresh_hot_score(instance.concern_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_rank_on_delete(sender, instance, **kwargs):
+    ranking.refresh_hot_score(instance.concern_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_count_on_delete(sender, instance, **kwargs):
+    """
+    Take the comment off its ancestors' reply counts. Deleting a comment
+    deletes its replies too, each with its own signal, so every surviving
+    ancestor loses exactly the number of comments removed.
+    """
+    if instance.parent_id:
+        Comment.objects.filter(pk__in=instance.ancestor_ids).update(reply_count=Greatest(F('reply_count') - 1, 0))
+    fragments.bump_on_commit(instance.concern_id)
+
+
+@receiver(post_save, sender=EmergencyUnit)
+@receiver(post_delete, sender=EmergencyUnit)
+def emergency_unit_changed(sender, **kwargs):
+    """Have every worker rebuild its nearest-unit index."""
+    transaction.on_commit(spatial.invalidate_unit_index)
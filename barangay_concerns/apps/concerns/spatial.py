@@ -0,0 +1,229 @@
+# apps/concerns/spatial.py
+"""
+Nearest emergency units.
+
+Two ways to answer "which units are closest to this point":
+
+* ``get_unit_index()`` - an in-process KD-tree per unit type, built from the
+  EmergencyUnit table on first use. Points live on the unit sphere in 3D, so
+  straight-line distance ranks exactly like great-circle distance with no
+  distortion near the poles or the antimeridian. A version counter in the
+  Django cache is bumped whenever a unit changes, and every worker rebuilds
+  its tree the next time it sees a new version.
+* ``nearest_units_db()`` - geohash prefix queries against the database,
+  widening the search area until the answer is provably complete. Needs no
+  warm-up, so it suits one-off scripts.
+"""
+import heapq
+import math
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .geo import EARTH_RADIUS_KM, geohash_cell_size, geohash_neighbourhood, haversine_km
+from .models import EmergencyUnit
+
+INDEX_VERSION_KEY = 'emergency-units:version'
+
+NearbyUnit = namedtuple('NearbyUnit', 'id name unit_type type_display contact_number latitude longitude')
+
+
+def _to_xyz(lat, lng):
+    lat, lng = math.radians(lat), math.radians(lng)
+    return math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat)
+
+
+def _chord_squared(radius_km):
+    """Squared straight-line distance on the unit sphere for an arc of ``radius_km``."""
+    angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+    return (2 * math.sin(angle / 2)) ** 2
+
+
+def _arc_km(chord_squared):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+class KDTree:
+    """
+    Static 3D KD-tree kept implicitly in one list: the median of every slice
+    is the node, the halves on either side are its subtrees.
+    """
+
+    def __init__(self, items, points):
+        order = list(range(len(points)))
+        self._sort(order, points, 0, len(order), 0)
+        self.items = [items[i] for i in order]
+        self.points = [points[i] for i in order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def _sort(self, order, points, lo, hi, depth):
+        # Explicit stack instead of recursion: slices shrink by half each step
+        stack = [(lo, hi, depth)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= 1:
+                continue
+            axis = depth % 3
+            order[lo:hi] = sorted(order[lo:hi], key=lambda i: points[i][axis])
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+
+    def nearest(self, point, k, max_chord_squared=float('inf')):
+        """Up to ``k`` ``(chord_squared, item)`` pairs, closest first."""
+        heap = []  # max-heap of (-distance, position)
+        points = self.points
+
+        def search(lo, hi, depth):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            node = points[mid]
+            distance = (point[0] - node[0]) ** 2 + (point[1] - node[1]) ** 2 + (point[2] - node[2]) ** 2
+            bound = -heap[0][0] if len(heap) == k else max_chord_squared
+            if distance <= bound:
+                if len(heap) == k:
+                    heapq.heapreplace(heap, (-distance, mid))
+                else:
+                    heapq.heappush(heap, (-distance, mid))
+
+            axis = depth % 3
+            diff = point[axis] - node[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            search(near[0], near[1], depth + 1)
+            bound = -heap[0][0] if len(heap) == k else max_chord_squared
+            if diff * diff <= bound:
+                search(far[0], far[1], depth + 1)
+
+        search(0, len(points), 0)
+        return [(-distance, self.items[position]) for distance, position in sorted(heap, reverse=True)]
+
+
+class UnitIndex:
+    """KD-trees of emergency units, one per unit type."""
+
+    def __init__(self, units):
+        by_type = {}
+        for unit in units:
+            by_type.setdefault(unit.unit_type, []).append(unit)
+        self.trees = {
+            unit_type: KDTree(members, [_to_xyz(unit.latitude, unit.longitude) for unit in members])
+            for unit_type, members in by_type.items()
+        }
+
+    def __len__(self):
+        return sum(len(tree) for tree in self.trees.values())
+
+    def nearest(self, lat, lng, k=5, unit_types=None, radius_km=None):
+        """
+        The ``k`` closest units as ``(NearbyUnit, distance_km)`` pairs, closest
+        first, optionally limited to ``unit_types`` and to ``radius_km``.
+        """
+        point = _to_xyz(lat, lng)
+        max_chord = _chord_squared(radius_km) if radius_km is not None else float('inf')
+        found = []
+        for unit_type, tree in self.trees.items():
+            if unit_types and unit_type not in unit_types:
+                continue
+            found.extend(tree.nearest(point, k, max_chord))
+        found.sort(key=lambda pair: pair[0])
+        return [(unit, _arc_km(chord)) for chord, unit in found[:k]]
+
+
+def load_units(queryset=None):
+    """EmergencyUnit rows as ``NearbyUnit`` records."""
+    queryset = EmergencyUnit.objects.all() if queryset is None else queryset
+    type_display = dict(EmergencyUnit.UNIT_TYPES)
+    return [
+        NearbyUnit(pk, name, unit_type, type_display.get(unit_type, unit_type), contact, float(lat), float(lng))
+        for pk, name, unit_type, contact, lat, lng in queryset.values_list(
+            'id', 'name', 'unit_type', 'contact_number', 'latitude', 'longitude'
+        ).iterator(chunk_size=5000)
+    ]
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(INDEX_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(INDEX_VERSION_KEY)
+    return version
+
+
+def get_unit_index():
+    """This process's ``UnitIndex``, rebuilt when the units changed."""
+    global _index, _index_version
+    version = _current_version()
+    if _index is not None and _index_version == version:
+        return _index
+    with _index_lock:
+        if _index is None or _index_version != version:
+            _index = UnitIndex(load_units())
+            _index_version = version
+    return _index
+
+
+def invalidate_unit_index():
+    """Make every process rebuild its index on its next lookup."""
+    try:
+        cache.incr(INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(INDEX_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def nearest_units(lat, lng, k=5, unit_types=None, radius_km=None):
+    """``get_unit_index().nearest(...)``; see ``UnitIndex.nearest``."""
+    return get_unit_index().nearest(lat, lng, k=k, unit_types=unit_types, radius_km=radius_km)
+
+
+def nearest_units_db(lat, lng, k=5, unit_types=None, radius_km=None, start_precision=7):
+    """
+    Same answer as ``nearest_units`` from geohash range queries. Each round
+    reads the 3x3 block of cells around the point; any unit closer than the
+    block's inner margin is guaranteed to be in it, so a round is final once
+    ``k`` units fall inside that margin (or the radius does).
+    """
+    queryset = EmergencyUnit.objects.all()
+    if unit_types:
+        queryset = queryset.filter(unit_type__in=unit_types)
+
+    for precision in range(start_precision, 0, -1):
+        lat_step, lng_step = geohash_cell_size(precision)
+        # The block reaches at least one cell beyond the point on every side:
+        # lat_step along the meridian, and the distance to the meridian
+        # lng_step away (exact great-circle distance from a point to a meridian)
+        safe_km = EARTH_RADIUS_KM * min(
+            math.radians(lat_step),
+            math.asin(math.cos(math.radians(lat)) * math.sin(math.radians(min(lng_step, 90)))),
+        )
+        condition = Q()
+        for cell in geohash_neighbourhood(lat, lng, precision):
+            # '{' sorts right after 'z', so this is a prefix match an index can serve
+            condition |= Q(geohash__gte=cell, geohash__lt=cell + '{')
+        units = load_units(queryset.filter(condition))
+        found = sorted(
+            ((unit, haversine_km(lat, lng, unit.latitude, unit.longitude)) for unit in units),
+            key=lambda pair: pair[1],
+        )
+        limit = safe_km if radius_km is None else min(safe_km, radius_km)
+        settled = [pair for pair in found if pair[1] <= limit]
+        if len(settled) >= k or (radius_km is not None and radius_km <= safe_km):
+            return settled[:k]
+
+    found = sorted(
+        ((unit, haversine_km(lat, lng, unit.latitude, unit.longitude)) for unit in load_units(queryset)),
+        key=lambda pair: pair[1],
+    )
+    if radius_km is not None:
+        found = [pair for pair in found if pair[1] <= radius_km]
+    return found[:k]
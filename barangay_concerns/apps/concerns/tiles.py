@@ -0,0 +1,155 @@
+# apps/concerns/tiles.py
+"""
+Pre-rendered GeoJSON tiles of the concerns map.
+
+``/concerns/api/tiles/{z}/{x}/{y}.geojson`` holds every active, geotagged
+concern inside a Web Mercator tile: server-side clusters below
+``MAP_CLUSTER_MAX_ZOOM``, individual points above it. Tiles carry no
+filters, so one file serves every visitor and can sit in a CDN; the map
+filters by the status/category properties (``counts`` maps status to
+category counts for a cluster).
+
+Rendered tiles are written under ``MEDIA_ROOT/tiles/concerns``, with a
+generation in the file name. Every tile has a generation counter in the
+cache, and there is one for the whole tile set; when a concern is created,
+moved, changes status or is archived, the tiles containing its old and new
+position (one per zoom level) get a new generation and their files are
+deleted. A render that started before the change was committed can still
+write its file afterwards, but under the old generation, where nobody reads
+it, as with the versioned cluster keys.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .clustering import cluster_tile
+from .geo import bbox_filter, coordinate_precision, lnglat_to_tile, tile_bounds
+from .models import ACTIVE_OPEN, Concern
+
+TILE_DIRECTORY = Path('tiles') / 'concerns'
+CACHE_PREFIX = 'concern-tiles'
+_ALL_TILES_KEY = f'{CACHE_PREFIX}:generation'
+
+
+def tile_root():
+    return Path(settings.MEDIA_ROOT) / TILE_DIRECTORY
+
+
+def tile_path(zoom, x, y, generation):
+    return tile_root() / str(zoom) / str(x) / f'{y}.{generation}.geojson'
+
+
+def _generation_key(zoom, x, y):
+    return f'{CACHE_PREFIX}:generation:{zoom}:{x}:{y}'
+
+
+def _new_generation():
+    # Time-based so an evicted counter never comes back with a value some
+    # stale tile file is still stored under
+    return time.time_ns() // 1000
+
+
+def tile_generation(zoom, x, y):
+    """The tile's current generation: the tile set's and the tile's own counter."""
+    keys = (_ALL_TILES_KEY, _generation_key(zoom, x, y))
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_generation(), timeout=None)
+            found[key] = cache.get(key)
+    return f'{found[keys[0]]}-{found[keys[1]]}'
+
+
+def is_valid_tile(zoom, x, y):
+    return 0 <= zoom <= settings.MAP_TILE_MAX_ZOOM and 0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom
+
+
+def tile_queryset():
+    return Concern.objects.filter(ACTIVE_OPEN, latitude__isnull=False, longitude__isnull=False)
+
+
+def _point(lng, lat, precision, properties):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [round(lng, precision), round(lat, precision)]},
+        'properties': properties,
+    }
+
+
+def render_tile(zoom, x, y):
+    """GeoJSON FeatureCollection for one tile, as compact UTF-8 bytes."""
+    precision = coordinate_precision(zoom)
+    features = []
+    if zoom < settings.MAP_CLUSTER_MAX_ZOOM:
+        for cluster in cluster_tile(tile_queryset(), zoom, x, y):
+            features.append(_point(cluster['lng'], cluster['lat'], precision, {
+                'id': cluster['id'],
+                'count': cluster['count'],
+                'counts': cluster['breakdown'],
+            }))
+    else:
+        rows = tile_queryset().filter(bbox_filter(tile_bounds(zoom, x, y))).order_by().values_list(
+            'id', 'latitude', 'longitude', 'status', 'category'
+        )
+        for pk, lat, lng, status, category in rows.iterator(chunk_size=5000):
+            lat, lng = float(lat), float(lng)
+            # Points on a shared edge match both tiles' bounds; keep them in one
+            if lnglat_to_tile(lng, lat, zoom) != (x, y):
+                continue
+            features.append(_point(lng, lat, precision, {'id': pk, 'status': status, 'category': category}))
+    collection = {'type': 'FeatureCollection', 'features': features}
+    return json.dumps(collection, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def get_tile(zoom, x, y):
+    """Tile bytes from the disk cache, rendering and storing them on a miss."""
+    path = tile_path(zoom, x, y, tile_generation(zoom, x, y))
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    content = render_tile(zoom, x, y)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename so concurrent readers never see a partial tile
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as handle:
+        handle.write(content)
+    os.replace(temp_name, path)
+    # Files of older generations (late writes of stale renders) are never read again
+    for old_path in path.parent.glob(f'{y}.*.geojson'):
+        if old_path != path:
+            old_path.unlink(missing_ok=True)
+    return content
+
+
+def invalidate_point(latitude, longitude):
+    """Delete the cached tiles containing the point at every zoom level."""
+    invalidate_points([(latitude, longitude)])
+
+
+def invalidate_points(points):
+    """Start a new generation of, and delete, the tiles containing any of the ``(latitude, longitude)`` points."""
+    points = [(float(lat), float(lng)) for lat, lng in points if lat is not None and lng is not None]
+    # Nearby points share tiles, so each tile is handled once
+    tiles = {
+        (zoom, *lnglat_to_tile(lng, lat, zoom))
+        for zoom in range(settings.MAP_TILE_MAX_ZOOM + 1)
+        for lat, lng in points
+    }
+    generation = _new_generation()
+    cache.set_many({_generation_key(*tile): generation for tile in tiles}, timeout=None)
+    for zoom, x, y in tiles:
+        for path in (tile_root() / str(zoom) / str(x)).glob(f'{y}.*.geojson'):
+            path.unlink(missing_ok=True)
+
+
+def clear_tiles():
+    """Start a new generation of every tile and delete the tile cache (after bulk updates that skip signals)."""
+    cache.set(_ALL_TILES_KEY, _new_generation(), timeout=None)
+    shutil.rmtree(tile_root(), ignore_errors=True)
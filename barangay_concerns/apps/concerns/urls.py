@@ -7,14 +7,22 @@ app_name = 'concerns'
 urlpatterns = [
     path('', views.concern_list_view, name='list'),
     path('map/', views.concern_map_view, name='map'),
+    path('api/list/', views.concern_list_api, name='list_api'),
+    path('api/archive/', views.concern_archive_list_api, name='archive_list_api'),
     path('api/map-data/', views.concern_map_data, name='map_data'),
+    path('api/map-data/<int:pk>/', views.concern_map_popup, name='map_popup'),
+    path('api/tiles/<int:z>/<int:x>/<int:y>.geojson', views.concern_map_tile, name='map_tile'),
     path('api/emergency-units/', views.emergency_units_data, name='emergency_units_data'),
+    path('api/emergency-units/nearest/', views.nearest_emergency_units, name='nearest_emergency_units'),
+    path('api/detail-cache-stats/', views.concern_fragment_stats, name='fragment_stats'),
     path('archive/', views.concern_archive_list_view, name='archive_list'),
+    path('bulk-update/', views.concern_bulk_update_view, name='bulk_update'),
     path('<int:pk>/', views.concern_detail_view, name='detail'),
     path('<int:pk>/update/', views.concern_update_view, name='update'),
     path('<int:pk>/update-status/', views.concern_update_status_view, name='update_status'),
     path('<int:pk>/delete/', views.concern_delete_view, name='delete'),
     path('<int:pk>/comment/', views.concern_add_comment_view, name='add_comment'),
+    path('<int:pk>/comments/', views.concern_comments_api, name='comments_api'),
     path('<int:pk>/unarchive/', views.concern_unarchive_view, name='unarchive'),
     path('<int:pk>/permanent-delete/', views.concern_permanent_delete_view, name='permanent_delete'),
     path('<int:pk>/vote/', views.concern_vote_view, name='vote'),
@@ -1,25 +1,53 @@
 # apps/concerns/views.py
+import math
+from datetime import datetime, timedelta
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import models
-from django.db.models import Q
-from django.http import JsonResponse
-from .models import Concern, Comment, EmergencyUnit, Vote
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from .models import ACTIVE_OPEN, Concern, Comment, EmergencyUnit, Vote
 from .forms import ConcernForm, ConcernUpdateForm, CommentForm
 from .utils import generate_random_alias
+from .search import SEARCH_ORDERING, search_concerns
+from .clustering import get_clusters
+from .fragments import fragment_stats, render_fragments
+from .comments import REPLY_ORDERING, ROOT_ORDERING, first_page, root_comments, subtree_replies
+from .tiles import get_tile, is_valid_tile
+from .spatial import load_units, nearest_units
+from .geo import InvalidBBox, bbox_filter, coordinate_precision, parse_bbox, parse_zoom, snap_bbox
+from .bulk import bulk_update_concerns, select_concerns
+from .pagination import DEFAULT_ORDERING, CursorPage, CursorPaginator, InvalidCursor, get_page_size, page_links, paginate
+from .ranking import HOT_ORDERING
+from .voting import VoteError, cast_vote
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.ai_services.models import TriageJob
+from config.caching import CONCERN_LIST, MAP_DATA
 from apps.notifications.services import notify_new_comment, notify_vote
 
 
-def concern_list_view(request):
+TOP_ORDERING = ('-score', '-created_at', '-id')
+LIST_SORTS = ('hot', 'top', 'trending')
+LIST_SCOPES = ('national', 'regional', 'provincial', 'city', 'barangay')
+
+
+def _filter_concern_list(request):
+    """
+    Apply the list view's scope, status, category and search filters.
+    Returns the queryset, its keyset ordering and the filter values.
+    """
     # Exclude archived and closed concerns - show ALL to everyone
-    concerns = Concern.objects.filter(is_archived=False).exclude(status='CLOSED')
+    concerns = Concern.objects.filter(ACTIVE_OPEN)
     
     # Geographic Scope Filtering
     scope = request.GET.get('scope', 'national')
+    if scope not in LIST_SCOPES:
+        scope = 'national'
     
     # Only allow geo-filtering if user is logged in and has profile data
     user_location_set = False
@@ -46,117 +74,372 @@ def concern_list_view(request):
                 pass # Or could add a message asking them to complete profile
                 
     
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        concerns = concerns.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(location__icontains=search_query)
-        )
-    
-    # Filter by status
+    # Filter by status (unknown values are ignored, as on the map)
     status_filter = request.GET.get('status', '')
+    if status_filter not in dict(Concern.STATUS_CHOICES):
+        status_filter = ''
     if status_filter:
         concerns = concerns.filter(status=status_filter)
     
     # Filter by category
     category_filter = request.GET.get('category', '')
+    if category_filter not in dict(Concern.CATEGORY_CHOICES):
+        category_filter = ''
     if category_filter:
         concerns = concerns.filter(category=category_filter)
     
-    context = {
-        'concerns': concerns,
+    # Full-text search, ranked by relevance unless another sort is chosen
+    ordering = DEFAULT_ORDERING
+    search_query = request.GET.get('search', '').strip()
+    if search_query:
+        concerns = search_concerns(concerns, search_query)
+        ordering = SEARCH_ORDERING
+    
+    sort = request.GET.get('sort', '')
+    if sort not in LIST_SORTS:
+        sort = ''
+    if sort == 'hot':
+        # Served by concern_open_hot_idx, filtered by scope as it is walked
+        ordering = HOT_ORDERING
+    elif sort == 'top':
+        ordering = TOP_ORDERING
+    elif sort == 'trending':
+        # Top voted among recent reports (served by concern_open_top_idx)
+        since = timezone.now() - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+        concerns = concerns.filter(created_at__gte=since)
+        ordering = TOP_ORDERING
+    
+    concerns = concerns.select_related('reporter').annotate(comment_count=_comment_count())
+    
+    filters = {
         'search_query': search_query,
         'status_filter': status_filter,
         'category_filter': category_filter,
         'scope': scope,
+        'sort': sort,
         'user_location_set': user_location_set,
     }
+    return concerns, ordering, filters
+
+
+def _comment_count():
+    """Per-concern comment count as a subquery (keeps the list free of GROUP BY)."""
+    counts = Comment.objects.filter(concern=OuterRef('pk')).order_by().values('concern').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def _concern_card_data(concern):
+    """JSON shape of a concern card for the infinite-scroll list APIs."""
+    if concern.reporter and not concern.is_anonymous:
+        reporter = concern.reporter.alias or concern.reporter.first_name or concern.reporter.username
+    else:
+        reporter = concern.alias or 'Anonymous'
+    return {
+        'id': concern.id,
+        'url': reverse('concerns:detail', args=[concern.pk]),
+        'title': concern.title,
+        'description': concern.description[:150],
+        'category': concern.category,
+        'category_display': concern.get_category_display(),
+        'status': concern.status,
+        'status_display': concern.get_status_display(),
+        'priority': concern.priority,
+        'location': concern.location,
+        'barangay': concern.barangay,
+        'municipality': concern.municipality,
+        'image': concern.image.url if concern.image else None,
+        'reporter': reporter,
+        'comment_count': getattr(concern, 'comment_count', None),
+        'score': concern.score,
+        'upvotes': concern.upvotes,
+        'downvotes': concern.downvotes,
+        'created_at': concern.created_at.isoformat(),
+        'archived_at': concern.archived_at.isoformat() if concern.archived_at else None,
+    }
+
+
+def _page_json(page, items):
+    return JsonResponse({
+        'results': items,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+def _cached_list_page(request, kind, concerns, ordering, filters, strict=False):
+    """
+    ``paginate`` the concern list through ``CONCERN_LIST``.
+
+    Only the page's ids and cursors are cached, never model instances (they
+    would carry the reporters' user rows into the shared cache); the rows
+    are then loaded by primary key, so counts and titles are always fresh.
+    Entries are keyed on the parsed filters, so stray query parameters
+    share them. Sorts by votes are not cached: votes change their order
+    all the time without invalidating anything.
+    """
+    if filters['sort']:
+        return paginate(request, concerns, ordering, strict=strict)
+
+    place = None
+    if filters['user_location_set'] and filters['scope'] != 'national':
+        user = request.user
+        place = (user.region, user.province, user.city or user.municipality, user.barangay)
+    cursor = request.GET.get('cursor', '')
+    if cursor:
+        try:
+            CursorPaginator(concerns, ordering).decode_cursor(cursor)
+        except InvalidCursor:
+            if strict:
+                raise
+            # paginate() serves the first page for it
+            cursor = ''
+    parts = (
+        kind, filters['scope'], filters['status_filter'], filters['category_filter'], filters['search_query'],
+        place, get_page_size(request), cursor,
+    )
+    computed = []
+
+    def compute():
+        page = paginate(request, concerns, ordering, strict=strict)
+        computed.append(page)
+        return {'ids': [concern.pk for concern in page], 'next': page.next_cursor, 'previous': page.previous_cursor}
+
+    cached = CONCERN_LIST.get_or_set(parts, compute)
+    if computed:
+        return computed[0]
+    rows = concerns.in_bulk(cached['ids'])
+    # Rows that stopped matching the filters since are left out
+    return CursorPage([rows[pk] for pk in cached['ids'] if pk in rows], cached['next'], cached['previous'])
+
+
+def concern_list_view(request):
+    concerns, ordering, filters = _filter_concern_list(request)
+    page = _cached_list_page(request, 'page', concerns, ordering, filters)
+    
+    context = {
+        'concerns': page,
+        **filters,
+        **page_links(request, page, ordering),
+    }
     return render(request, 'concerns/list.html', context)
 
-def concern_map_view(request):
-    """Display all concerns on an interactive map - exclude closed and archived"""
+
+def concern_list_api(request):
+    """JSON variant of the concern list (same filters), one cursor page at a time."""
+    concerns, ordering, filters = _filter_concern_list(request)
+    try:
+        page = _cached_list_page(request, 'api', concerns, ordering, filters, strict=True)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return _page_json(page, [_concern_card_data(concern) for concern in page])
+
+def _filter_map_concerns(request):
+    """Geotagged, non-archived, non-closed concerns with the map's status/category filters."""
     concerns = Concern.objects.filter(
+        ACTIVE_OPEN,
         latitude__isnull=False, 
         longitude__isnull=False,
-        is_archived=False
-    ).exclude(status='CLOSED')
+    )
     
     # MAP SHOWS EVERYTHING - No User Filtering as requested ("map shows everything")
     
-    # Apply same filters as list view
+    # Apply same filters as list view. Unknown values are ignored: they
+    # end up in cluster and map data cache keys, which must stay bounded
     status_filter = request.GET.get('status', '')
+    if status_filter not in dict(Concern.STATUS_CHOICES):
+        status_filter = ''
     if status_filter:
         concerns = concerns.filter(status=status_filter)
     
     category_filter = request.GET.get('category', '')
+    if category_filter not in dict(Concern.CATEGORY_CHOICES):
+        category_filter = ''
     if category_filter:
         concerns = concerns.filter(category=category_filter)
     
+    return concerns, status_filter, category_filter
+
+def concern_map_view(request):
+    """Display all concerns on an interactive map - exclude closed and archived"""
+    concerns, status_filter, category_filter = _filter_map_concerns(request)
+    
     context = {
         'concerns': concerns,
         'status_filter': status_filter,
         'category_filter': category_filter,
+        'cluster_max_zoom': settings.MAP_CLUSTER_MAX_ZOOM,
+        'tile_max_zoom': settings.MAP_TILE_MAX_ZOOM,
+        'map_lookups': _map_lookups(),
     }
     return render(request, 'concerns/map.html', context)
 
+def _map_lookups():
+    """Display tables sent once per map payload; rows refer to them by index."""
+    concern = Concern()
+    statuses = []
+    for code, label in Concern.STATUS_CHOICES:
+        concern.status = code
+        statuses.append({'code': code, 'label': label, 'color': concern.get_marker_color()})
+    categories = []
+    for code, label in Concern.CATEGORY_CHOICES:
+        concern.category = code
+        categories.append({'code': code, 'label': label, 'icon': concern.get_category_icon()})
+    return {'status': statuses, 'category': categories}
+
 def concern_map_data(request):
-    """API endpoint to get data for map - exclude closed and archived"""
-    concerns = Concern.objects.filter(
-        latitude__isnull=False, 
-        longitude__isnull=False,
-        is_archived=False
-    ).exclude(status='CLOSED')
-    
-    # Apply filters
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        concerns = concerns.filter(status=status_filter)
-    
-    category_filter = request.GET.get('category', '')
-    if category_filter:
-        concerns = concerns.filter(category=category_filter)
-    
-    data = []
-    for concern in concerns:
-        data.append({
-            'id': concern.id,
-            'title': concern.title,
-            'description': concern.description[:100] + '...' if len(concern.description) > 100 else concern.description,
-            'category': concern.category,
-            'category_display': concern.get_category_display(),
-            'category_icon': concern.get_category_icon(),
-            'status': concern.status,
-            'status_display': concern.get_status_display(),
-            'priority': concern.priority,
-            'latitude': float(concern.latitude),
-            'longitude': float(concern.longitude),
-            'location': concern.location,
-            'barangay': concern.barangay,
-            'marker_color': concern.get_marker_color(),
-            'created_at': concern.created_at.strftime('%B %d, %Y'),
+    """
+    Viewport-aware map API - exclude closed and archived.
+    
+    Accepts ``bbox=west,south,east,north`` and ``zoom``. Below
+    ``MAP_CLUSTER_MAX_ZOOM`` (with a bbox) it returns server-side clusters,
+    otherwise individual concerns. Both are columnar: parallel arrays with
+    status/category given as indexes into (or counts aligned with) the
+    ``lookups`` tables. Popup details are fetched per marker from
+    ``concern_map_popup``.
+    """
+    concerns, status_filter, category_filter = _filter_map_concerns(request)
+    
+    try:
+        bbox = parse_bbox(request.GET.get('bbox'))
+    except InvalidBBox as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    zoom = parse_zoom(request.GET.get('zoom'))
+    precision = coordinate_precision(zoom)
+    
+    lookups = _map_lookups()
+    status_codes = [row['code'] for row in lookups['status']]
+    category_codes = [row['code'] for row in lookups['category']]
+    
+    if bbox and zoom < settings.MAP_CLUSTER_MAX_ZOOM:
+        clusters = get_clusters(concerns, f'{status_filter}|{category_filter}', zoom, bbox)
+        return JsonResponse({
+            'zoom': zoom,
+            'mode': 'clusters',
+            'lookups': lookups,
+            'ids': [cluster['id'] for cluster in clusters],
+            'lat': [round(cluster['lat'], precision) for cluster in clusters],
+            'lng': [round(cluster['lng'], precision) for cluster in clusters],
+            'count': [cluster['count'] for cluster in clusters],
+            'status': [[cluster['status'].get(code, 0) for code in status_codes] for cluster in clusters],
+            'category': [[cluster['category'].get(code, 0) for code in category_codes] for cluster in clusters],
         })
     
-    return JsonResponse({'concerns': data})
+    if bbox:
+        # Nearby viewports share an entry: points of the tiles two zoom levels
+        # up that the viewport touches (off-screen points are harmless)
+        bbox = snap_bbox(bbox, max(zoom - 2, 0))
+        concerns = concerns.filter(bbox_filter(bbox))
+    
+    def points():
+        status_index = {code: i for i, code in enumerate(status_codes)}
+        category_index = {code: i for i, code in enumerate(category_codes)}
+        ids, lats, lngs, statuses, categories = [], [], [], [], []
+        rows = concerns.order_by().values_list('id', 'latitude', 'longitude', 'status', 'category')
+        for pk, lat, lng, status, category in rows.iterator(chunk_size=5000):
+            ids.append(pk)
+            lats.append(round(float(lat), precision))
+            lngs.append(round(float(lng), precision))
+            statuses.append(status_index.get(status, -1))
+            categories.append(category_index.get(category, -1))
+        return {
+            'zoom': zoom,
+            'mode': 'points',
+            'lookups': lookups,
+            'ids': ids,
+            'lat': lats,
+            'lng': lngs,
+            'status': statuses,
+            'category': categories,
+        }
+    
+    return JsonResponse(MAP_DATA.get_or_set(('points', status_filter, category_filter, bbox, zoom), points))
+
+@cache_control(public=True, max_age=settings.MAP_TILE_CACHE_SECONDS)
+def concern_map_tile(request, z, x, y):
+    """Concerns of one map tile as GeoJSON, served from the on-disk tile cache."""
+    if not is_valid_tile(z, x, y):
+        raise Http404('No such tile.')
+    return HttpResponse(get_tile(z, x, y), content_type='application/geo+json')
+
+def concern_map_popup(request, pk):
+    """Popup details for a single map marker."""
+    concern = get_object_or_404(Concern.objects.filter(ACTIVE_OPEN), pk=pk)
+    return JsonResponse({
+        'id': concern.id,
+        'url': reverse('concerns:detail', args=[concern.pk]),
+        'title': concern.title,
+        'description': concern.description[:100] + '...' if len(concern.description) > 100 else concern.description,
+        'category_display': concern.get_category_display(),
+        'status_display': concern.get_status_display(),
+        'priority': concern.priority,
+        'location': concern.location,
+        'barangay': concern.barangay,
+        'created_at': concern.created_at.strftime('%B %d, %Y'),
+    })
+
+def _unit_data(unit, distance_km=None):
+    """JSON for a ``spatial.NearbyUnit``."""
+    data = {
+        'id': unit.id,
+        'name': unit.name,
+        'type': unit.unit_type,
+        'type_display': unit.type_display,
+        'lat': unit.latitude,
+        'lng': unit.longitude,
+        'contact': unit.contact_number,
+    }
+    if distance_km is not None:
+        data['distance_km'] = round(distance_km, 3)
+    return data
 
 def emergency_units_data(request):
-    """API endpoint to get emergency units"""
+    """API endpoint to get emergency units, limited to ``bbox`` when given"""
+    try:
+        bbox = parse_bbox(request.GET.get('bbox'))
+    except InvalidBBox as e:
+        return JsonResponse({'error': str(e)}, status=400)
     units = EmergencyUnit.objects.all()
-    data = []
-    for unit in units:
-        data.append({
-            'name': unit.name,
-            'type': unit.unit_type,
-            'type_display': unit.get_unit_type_display(),
-            'lat': float(unit.latitude),
-            'lng': float(unit.longitude),
-            'contact': unit.contact_number
-        })
-    return JsonResponse({'units': data})
+    if bbox:
+        units = units.filter(bbox_filter(bbox))
+    return JsonResponse({'units': [_unit_data(unit) for unit in load_units(units)]})
+
+def nearest_emergency_units(request):
+    """
+    The ``k`` emergency units closest to ``lat``/``lng`` (or to ``concern``),
+    optionally limited to ``type`` (repeatable) and ``radius_km``.
+    """
+    try:
+        if request.GET.get('concern'):
+            concern = get_object_or_404(Concern, pk=int(request.GET['concern']), latitude__isnull=False)
+            lat, lng = float(concern.latitude), float(concern.longitude)
+        else:
+            lat, lng = float(request.GET['lat']), float(request.GET['lng'])
+        k = max(1, min(int(request.GET.get('k', 5)), 50))
+        radius_km = float(request.GET['radius_km']) if request.GET.get('radius_km') else None
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Give lat and lng (or concern), and numeric k and radius_km.'}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return JsonResponse({'error': 'lat/lng out of range.'}, status=400)
+    if radius_km is not None and not (math.isfinite(radius_km) and radius_km > 0):
+        return JsonResponse({'error': 'radius_km must be a positive number.'}, status=400)
+    
+    unit_types = request.GET.getlist('type') or None
+    units = nearest_units(lat, lng, k=k, unit_types=unit_types, radius_km=radius_km)
+    return JsonResponse({'units': [_unit_data(unit, distance) for unit, distance in units]})
+
+def _render_comments_fragment(concern):
+    # First page of the thread only; the rest loads from the comments API
+    page, comments = first_page(concern)
+    return render_to_string('concerns/_detail_comments.html', {
+        'concern': concern,
+        'comments': comments,
+        'comment_count': concern.comments.count(),
+        'comments_next_cursor': page.next_cursor,
+    })
+
 
 def concern_detail_view(request, pk):
-    concern = get_object_or_404(Concern, pk=pk)
+    concern = get_object_or_404(Concern.objects.select_related('reporter'), pk=pk)
     
     # Only prevent viewing if archived AND user is not LGU
     if concern.is_archived and not request.user.is_lgu():
@@ -164,13 +447,17 @@ def concern_detail_view(request, pk):
         return redirect('concerns:list')
     
     
-    # Get root comments only (replies accessed via comment.replies)
-    comments = concern.comments.filter(parent__isnull=True)
+    # The parts every visitor sees alike come from the fragment cache; the
+    # comment queries only run when the comments fragment is re-rendered
+    fragments = render_fragments(concern.pk, {
+        'header': lambda: render_to_string('concerns/_detail_header.html', {'concern': concern}),
+        'content': lambda: render_to_string('concerns/_detail_content.html', {'concern': concern}),
+        'comments': lambda: _render_comments_fragment(concern),
+    })
     comment_form = CommentForm()
 
-    # Calculate votes
-    from django.db.models import Sum
-    total_votes = concern.votes.aggregate(total=Sum('value'))['total'] or 0
+    # Maintained tally, no aggregation over the Vote table
+    total_votes = concern.score
     
     user_vote = 0
     if request.user.is_authenticated:
@@ -178,10 +465,16 @@ def concern_detail_view(request, pk):
         if vote_obj:
             user_vote = vote_obj.value
 
+    # Closest unit of each type, from the in-process spatial index
+    nearest = []
+    if concern.latitude is not None and concern.longitude is not None:
+        for unit_type, _ in EmergencyUnit.UNIT_TYPES:
+            nearest += nearest_units(float(concern.latitude), float(concern.longitude), k=1, unit_types=[unit_type])
     
     context = {
         'concern': concern,
-        'comments': comments,
+        'fragments': fragments,
+        'comment_indent_levels': settings.COMMENT_INDENT_LEVELS,
         'comment_form': comment_form,
         'can_edit': concern.can_be_edited() or (request.user.is_authenticated and request.user.is_lgu()),
         'is_locked': concern.is_locked,
@@ -197,10 +490,62 @@ def concern_detail_view(request, pk):
         'is_priority_urgent': concern.priority == 'URGENT',
         'total_votes': total_votes,
         'user_vote': user_vote,
+        'nearest_units': sorted(nearest, key=lambda pair: pair[1]),
+        'triage_job': TriageJob.objects.filter(concern=concern).first(),
     }
     return render(request, 'concerns/detail.html', context)
 
 
+def _comment_data(comment):
+    """JSON shape of a comment for the comments API."""
+    return {
+        'id': comment.id,
+        'parent_id': comment.parent_id,
+        'depth': comment.depth,
+        'author': comment.author.alias or comment.author.username,
+        'author_id': comment.author_id,
+        'author_image': comment.author.profile_image.url if comment.author.profile_image else None,
+        'is_official': comment.author.is_lgu(),
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+        'reply_count': comment.reply_count,
+    }
+
+
+@login_required
+def concern_fragment_stats(request):
+    """Hit-rate metrics of this worker's detail page fragment cache - LGU only"""
+    if not request.user.is_lgu():
+        return JsonResponse({'error': 'Only LGU staff can view cache metrics.'}, status=403)
+    return JsonResponse(fragment_stats())
+
+
+def concern_comments_api(request, pk):
+    """
+    A concern's comments, one cursor page at a time: top-level comments
+    oldest first, or with ``?root=<comment id>`` every reply below that
+    comment in thread order.
+    """
+    concern = get_object_or_404(Concern.objects.only('pk', 'is_archived'), pk=pk)
+    if concern.is_archived and not (request.user.is_authenticated and request.user.is_lgu()):
+        return JsonResponse({'error': 'This concern has been archived.'}, status=404)
+
+    root_id = request.GET.get('root')
+    if root_id:
+        try:
+            root = Comment.objects.only('pk', 'concern_id', 'path').get(pk=int(root_id), concern=concern)
+        except (ValueError, Comment.DoesNotExist):
+            return JsonResponse({'error': 'No such comment on this concern.'}, status=404)
+        comments, ordering = subtree_replies(root), REPLY_ORDERING
+    else:
+        comments, ordering = root_comments(concern), ROOT_ORDERING
+    try:
+        page = paginate(request, comments, ordering, strict=True)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return _page_json(page, [_comment_data(comment) for comment in page])
+
+
 @login_required
 def concern_add_comment_view(request, pk):
     """Add a comment or reply to a concern"""
@@ -281,46 +626,12 @@ def concern_create_view(request):
                 if not concern.alias:
                     concern.alias = generate_random_alias()
             
-            # AI Analysis
-            try:
-                from apps.ai_services.utils import analyze_concern
-                messages.info(request, "AI is analyzing your report...")
-                
-                # Call Gemini
-                analysis = analyze_concern(concern.title, concern.description)
-                
-                if analysis:
-                    suggested_priority = analysis.get('priority', 'LOW')
-                    concern.priority = suggested_priority
-                    
-                    suggested_category = analysis.get('category')
-                    if concern.category == 'OTHER' and suggested_category:
-                        concern.category = suggested_category
-                    
-                    ai_message = f"AI analyzed this report. Suggested Category: {suggested_category}, Priority: {suggested_priority}. {analysis.get('reasoning', '')}"
-            except Exception as e:
-                print(f"AI Error: {e}")
-                ai_message = None
-
             concern.save()
             
-            # Add AI reasoning as a comment
-            if 'ai_message' in locals() and ai_message:
-                from .models import Comment
-                
-                # Determine comment author (System/Admin if anon)
-                if request.user.is_authenticated:
-                    comment_author = request.user
-                else:
-                    User = get_user_model()
-                    comment_author = User.objects.filter(is_superuser=True).first()
-                
-                if comment_author:
-                    Comment.objects.create(
-                        concern=concern,
-                        author=comment_author, 
-                        content=f"🤖 [System AI] {ai_message}"
-                    )
+            # AI triage runs in the background so the LLM call never blocks this request
+            from apps.ai_services.triage import enqueue
+            enqueue(concern)
+            messages.info(request, "AI is analyzing your report...")
 
             messages.success(request, 'Concern reported successfully!')
             return redirect('concerns:detail', pk=concern.pk)
@@ -395,12 +706,26 @@ def concern_archive_list_view(request):
         return redirect('concerns:list')
     
     archived_concerns = Concern.objects.filter(is_archived=True)
+    page = paginate(request, archived_concerns)
     
     context = {
-        'concerns': archived_concerns,
+        'concerns': page,
+        **page_links(request, page),
     }
     return render(request, 'concerns/archive.html', context)
 
+@login_required
+def concern_archive_list_api(request):
+    """JSON variant of the archive list - LGU only"""
+    if not request.user.is_lgu():
+        return JsonResponse({'error': 'Only LGU staff can view archived concerns.'}, status=403)
+    
+    try:
+        page = paginate(request, Concern.objects.filter(is_archived=True).select_related('reporter'), strict=True)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return _page_json(page, [_concern_card_data(concern) for concern in page])
+
 @login_required
 def concern_unarchive_view(request, pk):
     """Unarchive a concern - LGU only"""
@@ -457,13 +782,13 @@ def concern_update_status_view(request, pk):
             concern.status = 'RESOLVED'
             concern.resolved_at = timezone.now()
             concern.is_locked = True
-            concern.save()
+            concern.save(update_fields=['status', 'resolved_at', 'is_locked', 'updated_at'])
             messages.success(request, f'Concern "{concern.title}" marked as RESOLVED.')
         elif quick_action == 'close':
             concern.status = 'CLOSED'
             concern.resolved_at = timezone.now()
             concern.is_locked = True
-            concern.save()
+            concern.save(update_fields=['status', 'resolved_at', 'is_locked', 'updated_at'])
             messages.success(request, f'Concern "{concern.title}" has been CLOSED. It will no longer appear on the map or list.')
         else:
             # Regular status/priority update
@@ -489,7 +814,9 @@ def concern_update_status_view(request, pk):
             if new_priority:
                 concern.priority = new_priority
             
-            concern.save()
+            # Only the edited fields: a full save would write back the vote
+            # counters as loaded and undo votes cast in the meantime
+            concern.save(update_fields=['status', 'priority', 'is_locked', 'resolved_at', 'updated_at'])
             
             # You could save admin_notes to a separate model if you want to track them
             # For now, just show success message
@@ -501,90 +828,80 @@ def concern_update_status_view(request, pk):
     return redirect('concerns:detail', pk=pk)
 
 
+@login_required
+def concern_bulk_update_view(request):
+    """
+    Apply a status, priority and/or archive change to every concern that
+    matches the posted filters - LGU only. JSON in and out, e.g. after a
+    typhoon: filter_status=IN_PROGRESS, category=FLOOD, status=RESOLVED.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST request required'}, status=405)
+    if not request.user.is_lgu():
+        return JsonResponse({'error': 'Only LGU staff can update concerns.'}, status=403)
+
+    statuses, priorities = dict(Concern.STATUS_CHOICES), dict(Concern.PRIORITY_CHOICES)
+    status = request.POST.get('status') or None
+    priority = request.POST.get('priority') or None
+    archive = {'true': True, 'false': False}.get(request.POST.get('archive', '').lower())
+    if (status and status not in statuses) or (priority and priority not in priorities):
+        return JsonResponse({'error': 'Invalid status or priority'}, status=400)
+    if not (status or priority or archive is not None):
+        return JsonResponse({'error': 'Nothing to change: give status, priority or archive'}, status=400)
+
+    try:
+        ids = [int(pk) for value in request.POST.getlist('ids') for pk in value.split(',') if pk.strip()]
+        reported_before = request.POST.get('reported_before') or None
+        if reported_before:
+            reported_before = timezone.make_aware(datetime.strptime(reported_before, '%Y-%m-%d'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid ids or reported_before (YYYY-MM-DD)'}, status=400)
+    filters = {
+        'ids': ids,
+        'status': request.POST.get('filter_status') or None,
+        'category': request.POST.get('category') or None,
+        'priority': request.POST.get('filter_priority') or None,
+        'barangay': request.POST.get('barangay') or None,
+        'municipality': request.POST.get('municipality') or None,
+        'reported_before': reported_before,
+    }
+    if not any(filters.values()):
+        # Never touch every concern because a filter was left out
+        return JsonResponse({'error': 'Give ids or at least one filter'}, status=400)
+
+    concerns = select_concerns(**filters, archived=request.POST.get('archived') == 'true' or archive is False)
+    result = bulk_update_concerns(concerns, status=status, priority=priority, archive=archive, changed_by=request.user)
+    return JsonResponse({'status': 'updated', **result})
+
+
 @login_required
 def concern_vote_view(request, pk):
     if request.method != 'POST':
         return JsonResponse({'error': 'POST request required'}, status=405)
-        
-    concern = get_object_or_404(Concern, pk=pk)
-    
-    # Prevent self-voting
-    if concern.reporter == request.user:
-        return JsonResponse({'error': 'You cannot vote on your own report.'}, status=403)
-        
-    vote_val = int(request.POST.get('value', 0))
-    
-    if vote_val not in [1, -1]:
-        return JsonResponse({'error': 'Invalid vote value'}, status=400)
-        
-    vote, created = Vote.objects.get_or_create(
-        voter=request.user,
-        concern=concern,
-        defaults={'value': vote_val}
-    )
-    
-    # If vote exists, check if user is changing their vote or toggling off
-    if not created:
-        if vote.value == vote_val:
-            # Toggle off (remove vote)
-            vote.delete()
-            # Revert points for reporter
-            if concern.reporter:
-                concern.reporter.points = models.F('points') - vote_val
-                concern.reporter.save(update_fields=['points'])
-            
-            # Re-fetch for updated count
-            concern.refresh_from_db()
-            
-            return JsonResponse({
-                'status': 'removed',
-                'points': concern.votes.aggregate(total=models.Sum('value'))['total'] or 0
-            })
-        else:
-            # Change vote (e.g., +1 to -1)
-            # Update reporter points: remove old value, add new value
-            if concern.reporter:
-                # e.g. was +1, now -1. Change is -2.
-                # was -1, now +1. Change is +2.
-                change = vote_val - vote.value
-                concern.reporter.points = models.F('points') + change
-                concern.reporter.save(update_fields=['points'])
-                
-            vote.value = vote_val
-            vote.save()
-            return JsonResponse({
-                'status': 'changed',
-                'points': concern.votes.aggregate(total=models.Sum('value'))['total'] or 0
-            })
-            
-    # New vote
-    if concern.reporter:
-        concern.reporter.points = models.F('points') + vote_val
-        concern.reporter.save(update_fields=['points'])
-        
+
+    try:
+        vote_val = int(request.POST.get('value', 0))
+    except ValueError:
+        vote_val = 0
+
+    # Vote, tally, reporter karma and the ban check in one transaction
+    try:
+        result = cast_vote(pk, request.user.pk, vote_val)
+    except Concern.DoesNotExist:
+        raise Http404('No Concern matches the given query.')
+    except VoteError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+    if result.status == 'voted' and result.reporter_id:
+        concern = Concern.objects.select_related('reporter').get(pk=pk)
         # Notify the reporter about the vote
         notify_vote(concern, request.user, vote_val)
-        
-        # Karma Moderation Check (Refresh to get actual value)
-        concern.reporter.refresh_from_db()
-        current_points = concern.reporter.points
-        
-        # BAN THRESHOLD: -10
-        if current_points <= -10 and concern.reporter.is_active:
-            concern.reporter.is_active = False
-            concern.reporter.save(update_fields=['is_active'])
-            # We can't log them out directly here easily as it's an AJAX request initiated by another user
-            # But they will be blocked on next request
-            print(f"User {concern.reporter.username} blocked due to low karma ({current_points})")
-            
-        # WARNING THRESHOLD: -5
-        elif current_points <= -5 and current_points > -10:
-             # In a real app, send a notification. For now, we just acknowledge logic is hit.
-             pass
-        
+
     return JsonResponse({
-        'status': 'voted',
-        'points': concern.votes.aggregate(total=models.Sum('value'))['total'] or 0
+        'status': result.status,
+        'points': result.points,
+        'upvotes': result.upvotes,
+        'downvotes': result.downvotes,
     })
 
 @login_required
@@ -0,0 +1,100 @@
+# apps/concerns/voting.py
+"""
+Casting votes on concerns.
+
+``cast_vote`` applies everything a vote changes in one transaction: the
+voter's ``Vote`` row, the concern's tally, the reporter's karma and the ban
+check. The concern row is locked first, so concurrent votes on the same
+concern run one after another and each sees the previous one's result,
+while votes on different concerns do not wait for each other. Karma and the
+ban are single conditional UPDATEs on the reporter row, so votes on two of
+the same reporter's concerns cannot lose an update either.
+
+The new tally is computed from the locked row, so no re-read is needed.
+Notifications are left to the caller, to keep the lock short.
+"""
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import fragments
+from .models import Concern, Vote
+
+logger = logging.getLogger(__name__)
+
+VoteResult = namedtuple('VoteResult', 'status value reporter_id points upvotes downvotes banned')
+
+
+class VoteError(Exception):
+    """The vote is not allowed; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _lock_concern(concern_id):
+    """Lock and return ``(reporter_id, score, upvotes, downvotes)`` of the concern."""
+    concerns = Concern.objects.filter(pk=concern_id)
+    if connection.features.has_select_for_update:
+        concerns = concerns.select_for_update()
+    else:
+        # SQLite: a read-then-write transaction can fail to upgrade its lock
+        # under contention, so take the write lock with the first statement
+        if not concerns.update(score=F('score')):
+            raise Concern.DoesNotExist
+    return concerns.values_list('reporter_id', 'score', 'upvotes', 'downvotes').get()
+
+
+def cast_vote(concern_id, voter_id, value):
+    """
+    Record ``voter_id``'s ``value`` (1 or -1) on a concern.
+
+    Voting the same way twice removes the vote; voting the other way
+    changes it. Returns a ``VoteResult`` whose ``status`` is ``voted``,
+    ``changed`` or ``removed`` and whose ``value`` is the voter's vote now
+    (0 if removed). Raises ``Concern.DoesNotExist`` or ``VoteError``.
+    """
+    if value not in (1, -1):
+        raise VoteError('Invalid vote value')
+
+    with transaction.atomic():
+        reporter_id, score, upvotes, downvotes = _lock_concern(concern_id)
+        if reporter_id == voter_id:
+            raise VoteError('You cannot vote on your own report.', status=403)
+
+        existing = Vote.objects.filter(concern_id=concern_id, voter_id=voter_id).values_list('pk', 'value').first()
+        if existing is None:
+            Vote.objects.create(concern_id=concern_id, voter_id=voter_id, value=value)
+            status, old_value, new_value = 'voted', 0, value
+        elif existing[1] == value:
+            Vote.objects.filter(pk=existing[0]).delete()
+            status, old_value, new_value = 'removed', value, 0
+        else:
+            Vote.objects.filter(pk=existing[0]).update(value=value)
+            status, old_value, new_value = 'changed', existing[1], value
+
+        Concern.record_vote(concern_id, old_value=old_value, new_value=new_value)
+        fragments.bump_on_commit(concern_id)
+        score += new_value - old_value
+        upvotes += (new_value == 1) - (old_value == 1)
+        downvotes += (new_value == -1) - (old_value == -1)
+
+        banned = False
+        delta = new_value - old_value
+        if reporter_id is not None:
+            users = get_user_model().objects.filter(pk=reporter_id)
+            users.update(points=F('points') + delta)
+            if delta < 0:
+                # Blocked on their next request; they cannot be logged out from here
+                banned = bool(users.filter(
+                    points__lte=settings.KARMA_BAN_THRESHOLD, is_active=True
+                ).update(is_active=False))
+
+    if banned:
+        logger.warning('User #%s blocked due to low karma (votes on concern #%s)', reporter_id, concern_id)
+    return VoteResult(status, new_value, reporter_id, score, upvotes, downvotes, banned)
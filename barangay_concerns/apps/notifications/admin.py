@@ -1,6 +1,7 @@
 # apps/notifications/admin.py
 from django.contrib import admin
-from .models import Notification
+from django.utils import timezone
+from .models import EmailOutbox, Notification
 
 
 @admin.register(Notification)
@@ -10,3 +11,19 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ['title', 'message', 'user__username']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'to_email']
+    readonly_fields = ['notification', 'last_error', 'created_at', 'sent_at']
+    actions = ['retry_emails']
+
+    @admin.action(description='Retry selected emails')
+    def retry_emails(self, request, queryset):
+        count = queryset.exclude(status='SENT').update(
+            status='PENDING', attempts=0, next_attempt_at=timezone.now(), locked_at=None
+        )
+        self.message_user(request, f'{count} email(s) queued again.')
@@ -0,0 +1,115 @@
+# apps/notifications/hub.py
+"""
+Per-process fan-out of notification changes to open push connections.
+
+Each SSE or long-poll connection (an asyncio task under ASGI) subscribes
+with its user id and gets a queue. ``publish(user_id)`` wakes only that
+user's queues and is safe to call from any thread, so
+``create_notification`` calls it on commit.
+
+Changes made in another process are found by a watcher thread that runs
+while this process has subscribers. Every ``NOTIFICATION_PUSH_WATCH_INTERVAL``
+seconds it runs one query for notifications of the subscribed users changed
+since its last look, so the database sees one cheap query per process
+instead of one COUNT per browser tab.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Re-read this far back so rows committed late by slow transactions are seen
+WATCH_OVERLAP = timedelta(seconds=5)
+
+_subscribers = {}  # user id -> {asyncio.Queue: event loop}
+_lock = threading.Lock()
+_watcher = None
+
+
+def subscribe(user_id):
+    """A queue that receives this user's notification events; call ``unsubscribe`` when done."""
+    queue = asyncio.Queue()
+    with _lock:
+        _subscribers.setdefault(user_id, {})[queue] = asyncio.get_running_loop()
+    if settings.NOTIFICATION_PUSH_WATCH_INTERVAL:
+        _start_watcher()
+    return queue
+
+
+def unsubscribe(user_id, queue):
+    with _lock:
+        queues = _subscribers.get(user_id, {})
+        queues.pop(queue, None)
+        if not queues:
+            _subscribers.pop(user_id, None)
+
+
+def subscriber_count():
+    with _lock:
+        return sum(len(queues) for queues in _subscribers.values())
+
+
+def publish(user_id, notification_id=None):
+    """Wake ``user_id``'s connections; ``notification_id`` is the new or updated row, if any."""
+    with _lock:
+        targets = list(_subscribers.get(user_id, {}).items())
+    for queue, loop in targets:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, notification_id)
+        except RuntimeError:
+            # The connection's event loop has closed
+            pass
+
+
+def publish_on_commit(user_id, notification_id=None):
+    """``publish`` once the current transaction commits."""
+    transaction.on_commit(lambda: publish(user_id, notification_id))
+
+
+def _watch():
+    """Publish changes made by other processes until nobody is subscribed."""
+    from .models import Notification
+
+    global _watcher
+    since = timezone.now()
+    seen = {}  # (id, updated_at) -> when it was seen, for overlap de-duplication
+    try:
+        while True:
+            time.sleep(settings.NOTIFICATION_PUSH_WATCH_INTERVAL)
+            with _lock:
+                user_ids = list(_subscribers)
+                if not user_ids:
+                    _watcher = None
+                    return
+            close_old_connections()
+            now = timezone.now()
+            rows = Notification.objects.filter(
+                user_id__in=user_ids, updated_at__gt=since - WATCH_OVERLAP
+            ).values_list('id', 'user_id', 'updated_at')
+            for notification_id, user_id, updated_at in rows:
+                if (notification_id, updated_at) not in seen:
+                    seen[(notification_id, updated_at)] = now
+                    publish(user_id, notification_id)
+            since = now
+            seen = {key: at for key, at in seen.items() if at > now - 2 * WATCH_OVERLAP}
+    except Exception:
+        logger.exception('Notification watcher crashed')
+        with _lock:
+            _watcher = None
+    finally:
+        connection.close()
+
+
+def _start_watcher():
+    global _watcher
+    with _lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name='notification-watcher', daemon=True)
+            _watcher.start()
@@ -0,0 +1,21 @@
+# apps/notifications/management/commands/dispatch_email_outbox.py
+from django.core.management.base import BaseCommand
+
+from apps.notifications.models import EmailOutbox
+from apps.notifications.outbox import run_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Sends queued notification emails (use with EMAIL_OUTBOX_IN_PROCESS=False)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no email is pending')
+        parser.add_argument('--batch-size', type=int, help='Emails per SMTP connection (default EMAIL_OUTBOX_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Pending emails: {EmailOutbox.objects.filter(status='PENDING').count()}")
+        run_dispatcher(exit_when_idle=options['once'], size=options['batch_size'])
+        counts = {status: EmailOutbox.objects.filter(status=status).count() for status, _ in EmailOutbox.STATUS_CHOICES}
+        self.stdout.write(self.style.SUCCESS(
+            'Outbox drained: ' + ', '.join(f'{count} {status.lower()}' for status, count in counts.items())
+        ))
@@ -0,0 +1,43 @@
+# apps/notifications/management/commands/reconcile_unread_counts.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.notifications.models import Notification
+from apps.security_management.models import User
+
+
+class Command(BaseCommand):
+    help = 'Recomputes User.unread_notifications from the notification table and repairs drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per UPDATE (default 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report users whose counter is wrong')
+
+    def handle(self, *args, **options):
+        unread = Coalesce(Subquery(
+            Notification.objects.filter(user=OuterRef('pk'), is_read=False)
+            .order_by().values('user').annotate(total=Count('id')).values('total')
+        ), Value(0))
+        batch_size = options['batch_size']
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            # Primary-key ranges keep each UPDATE (and its locks) short
+            ids = list(User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+            drifted = User.objects.filter(pk__in=ids).alias(actual=unread).exclude(unread_notifications=unread)
+            if options['dry_run']:
+                for username, stored, actual in drifted.annotate(actual=unread).values_list('username', 'unread_notifications', 'actual'):
+                    self.stdout.write(f'{username}: stored {stored}, actual {actual}')
+                    repaired += 1
+                continue
+            with transaction.atomic():
+                repaired += drifted.update(unread_notifications=unread)
+
+        verb = 'would be repaired' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} users; {repaired} counter(s) {verb}'))
@@ -0,0 +1,18 @@
+# apps/notifications/management/commands/send_notification_digests.py
+from django.core.management.base import BaseCommand
+
+from apps.notifications.services import DIGEST_PERIODS, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Queues digest emails for users who chose hourly or daily notification emails (run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('frequency', choices=[key.lower() for key in DIGEST_PERIODS])
+
+    def handle(self, *args, **options):
+        frequency = options['frequency'].upper()
+        users, notifications = send_digests(frequency)
+        self.stdout.write(self.style.SUCCESS(
+            f'Queued {users} {frequency.lower()} digest(s) covering {notifications} notification(s)'
+        ))
@@ -1,6 +1,10 @@
 # apps/notifications/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.conf import settings
+from django.utils import timezone
+from . import hub
 
 
 class Notification(models.Model):
@@ -36,28 +40,112 @@ class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
+    # How many events this row stands for (votes/comments are coalesced)
+    count = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
+        indexes = [
+            models.Index(fields=['user', 'concern', 'notification_type', '-created_at'], name='notification_coalesce_idx'),
+            models.Index(fields=['user', 'updated_at'], name='notification_digest_idx'),
+            # Keyset pages of a user's list (DEFAULT_ORDERING) are a range scan
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_page_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {'Read' if self.is_read else 'Unread'}"
 
     def mark_as_read(self):
         """Mark this notification as read."""
-        if not self.is_read:
-            self.is_read = True
-            self.save(update_fields=['is_read'])
+        if self.is_read:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            # Conditional, so two concurrent requests decrement the counter once
+            if Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True, updated_at=now):
+                adjust_unread_count(self.user_id, -1)
+        self.is_read = True
+        # updated_at lets other processes' push watchers see the change
+        self.updated_at = now
+        hub.publish_on_commit(self.user_id)
 
     @classmethod
     def get_unread_count(cls, user):
-        """Get the count of unread notifications for a user."""
-        return cls.objects.filter(user=user, is_read=False).count()
+        """
+        Get the count of unread notifications for a user (a user or an id).
+        Reads the counter kept on the user row, not a COUNT over this table.
+        """
+        from apps.security_management.models import User
+        user_id = getattr(user, 'pk', user)
+        return User.objects.filter(pk=user_id).values_list('unread_notifications', flat=True).first() or 0
 
     @classmethod
     def mark_all_as_read(cls, user):
         """Mark all notifications as read for a user."""
-        cls.objects.filter(user=user, is_read=False).update(is_read=True)
+        with transaction.atomic():
+            marked = cls.objects.filter(user=user, is_read=False).update(is_read=True, updated_at=timezone.now())
+            if marked:
+                adjust_unread_count(user.pk, -marked)
+        if marked:
+            hub.publish_on_commit(user.pk)
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Add ``delta`` to ``User.unread_notifications`` in SQL (never below 0).
+    ``user_id`` may be a list of ids that all get the same ``delta``.
+    ``reconcile_unread_counts`` repairs any drift.
+    """
+    from apps.security_management.models import User
+    users = User.objects.filter(pk__in=user_id) if isinstance(user_id, (list, tuple, set)) else User.objects.filter(pk=user_id)
+    users.update(
+        unread_notifications=Greatest(F('unread_notifications') + delta, Value(0))
+    )
+
+
+class EmailOutbox(models.Model):
+    """
+    An email waiting to be sent (see outbox.py). Rows are written in the
+    same transaction as their notification, and the dispatcher sends them
+    afterwards, so requests never wait on SMTP.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('DEAD', 'Dead letter'),
+    )
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails'
+    )
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'Outgoing email'
+        verbose_name_plural = 'Email outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} - {self.get_status_display()}"
@@ -0,0 +1,193 @@
+# apps/notifications/outbox.py
+"""
+Delivery of queued notification emails.
+
+``services.create_notification`` writes an ``EmailOutbox`` row in the same
+transaction as the notification. The dispatcher claims due rows in batches
+with a conditional UPDATE (safe across threads and gunicorn processes) and
+sends a whole batch over one mail connection from ``get_connection()``.
+Failed messages are retried with exponential backoff; after
+``EMAIL_OUTBOX_MAX_ATTEMPTS`` they are dead-lettered (status ``DEAD``) and
+can be re-queued from the admin.
+
+With ``EMAIL_OUTBOX_IN_PROCESS`` a dispatcher thread starts in the web
+process once a queued email is committed and exits when the outbox is
+empty. ``manage.py dispatch_email_outbox`` runs the same loop separately.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Never sleep longer than this while waiting for a retry to come due
+MAX_IDLE_SLEEP = 60
+# A row stuck in SENDING this long belonged to a dispatcher that died
+STALE_AFTER = timedelta(minutes=10)
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def queue_email(to_email, subject, body, html_body='', notification=None):
+    """Add an email to the outbox; call inside the transaction that caused it."""
+    email = EmailOutbox.objects.create(
+        notification=notification,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+    )
+    if settings.EMAIL_OUTBOX_IN_PROCESS:
+        transaction.on_commit(start_dispatcher)
+    return email
+
+
+def _requeue_stale():
+    cutoff = timezone.now() - STALE_AFTER
+    EmailOutbox.objects.filter(status='SENDING', locked_at__lt=cutoff).update(status='PENDING', locked_at=None)
+
+
+def claim_batch(size=None):
+    """Atomically take up to ``size`` due emails, oldest first."""
+    _requeue_stale()
+    size = size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(status='PENDING', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+    ids = list(due.values_list('id', flat=True)[:size])
+    if not ids:
+        return []
+    # Rows another dispatcher claimed in the meantime are no longer PENDING
+    EmailOutbox.objects.filter(id__in=ids, status='PENDING').update(status='SENDING', locked_at=now)
+    return list(EmailOutbox.objects.filter(id__in=ids, status='SENDING', locked_at=now).order_by('id'))
+
+
+def _message(email, mail_connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.to_email],
+        connection=mail_connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.locked_at = None
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'DEAD'
+        logger.error('Email #%s to %s dead-lettered after %s attempts: %s', email.pk, email.to_email, email.attempts, error)
+    else:
+        email.status = 'PENDING'
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        logger.warning('Email #%s to %s failed (attempt %s): %s', email.pk, email.to_email, email.attempts, error)
+    email.save(update_fields=['attempts', 'last_error', 'locked_at', 'status', 'next_attempt_at'])
+
+
+def send_batch(emails):
+    """
+    Send claimed ``emails`` over one connection. Returns the number sent;
+    failures are rescheduled or dead-lettered individually.
+    """
+    if not emails:
+        return 0
+    mail_connection = get_connection(fail_silently=False)
+    try:
+        mail_connection.open()
+    except Exception as e:
+        # The server is unreachable, so every message in the batch failed
+        for email in emails:
+            _failed(email, e)
+        return 0
+
+    sent_ids = []
+    try:
+        for email in emails:
+            try:
+                # One message per call so a bad address fails only its own row
+                mail_connection.send_messages([_message(email, mail_connection)])
+            except Exception as e:
+                _failed(email, e)
+            else:
+                sent_ids.append(email.pk)
+    finally:
+        try:
+            mail_connection.close()
+        except Exception:
+            pass
+        EmailOutbox.objects.filter(id__in=sent_ids).update(
+            status='SENT', attempts=F('attempts') + 1, locked_at=None, last_error='', sent_at=timezone.now()
+        )
+    return len(sent_ids)
+
+
+def dispatch_once(size=None):
+    """Claim and send one batch. Returns ``(claimed, sent)``."""
+    emails = claim_batch(size)
+    return len(emails), send_batch(emails)
+
+
+def seconds_until_next_email():
+    """Seconds until the earliest pending email is due, or None if none is pending."""
+    due = EmailOutbox.objects.filter(status='PENDING').order_by('next_attempt_at').values_list('next_attempt_at', flat=True).first()
+    if due is None:
+        return None
+    return max(0.0, (due - timezone.now()).total_seconds())
+
+
+def run_dispatcher(exit_when_idle=True, size=None):
+    """Send batches until the outbox is empty (or forever)."""
+    while True:
+        close_old_connections()
+        claimed, _ = dispatch_once(size)
+        if claimed:
+            continue
+        wait = seconds_until_next_email()
+        if wait is None and exit_when_idle:
+            return
+        time.sleep(min(wait if wait is not None else MAX_IDLE_SLEEP, MAX_IDLE_SLEEP) or 0.1)
+
+
+def _dispatcher_main():
+    global _dispatcher
+    try:
+        while True:
+            _wake.clear()
+            run_dispatcher()
+            with _dispatcher_lock:
+                # An email committed while the outbox looked empty sets _wake
+                if not _wake.is_set():
+                    _dispatcher = None
+                    return
+    except Exception:
+        logger.exception('Email outbox dispatcher crashed')
+        with _dispatcher_lock:
+            _dispatcher = None
+    finally:
+        connection.close()
+
+
+def start_dispatcher():
+    """Start the in-process dispatcher thread unless one is running."""
+    global _dispatcher
+    with _dispatcher_lock:
+        _wake.set()
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = threading.Thread(target=_dispatcher_main, name='email-outbox', daemon=True)
+            _dispatcher.start()
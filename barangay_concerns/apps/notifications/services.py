@@ -2,54 +2,88 @@
 """
 Service functions for creating and sending notifications.
 """
-from django.core.mail import send_mail
+from collections import Counter
+from datetime import timedelta
 from django.conf import settings
-from django.template.loader import render_to_string
-from .models import Notification
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import escape
+from . import hub
+from .models import EmailOutbox, Notification, adjust_unread_count
+from .outbox import queue_email, start_dispatcher
 
 
-def create_notification(user, concern, notification_type, title, message):
+def create_notification(user, concern, notification_type, title, message, coalesce_as=None):
     """
     Create a notification for a user.
     
+    The notification and its email (queued in the outbox, see outbox.py)
+    are saved in one transaction; the email is sent after the request.
+    
+    With ``coalesce_as``, an unread notification of the same type for the
+    same concern from the last ``NOTIFICATION_COALESCE_WINDOW`` seconds is
+    updated instead: its count goes up and its text is rewritten from the
+    ``(title, message)`` templates, which may use ``{count}``. No further
+    email is sent for it.
+    
     Args:
         user: The user to notify
         concern: The related concern
         notification_type: Type of notification (STATUS_CHANGE, COMMENT, etc.)
         title: Notification title
         message: Notification message
+        coalesce_as: Optional (title, message) templates for merged rows
     
     Returns:
-        The created Notification object
+        The created or updated Notification object
     """
-    notification = Notification.objects.create(
-        user=user,
-        concern=concern,
-        notification_type=notification_type,
-        title=title,
-        message=message
-    )
-    
-    # Send email notification if user has email
-    if user.email:
-        send_email_notification(user, notification)
+    with transaction.atomic():
+        if coalesce_as:
+            since = timezone.now() - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW)
+            existing = Notification.objects.select_for_update().filter(
+                user=user,
+                concern=concern,
+                notification_type=notification_type,
+                is_read=False,
+                created_at__gte=since,
+            ).order_by('-created_at').first()
+            if existing:
+                existing.count += 1
+                existing.title = coalesce_as[0].format(count=existing.count)
+                existing.message = coalesce_as[1].format(count=existing.count)
+                existing.save(update_fields=['count', 'title', 'message', 'updated_at'])
+                hub.publish_on_commit(user.pk, existing.pk)
+                return existing
+        
+        notification = Notification.objects.create(
+            user=user,
+            concern=concern,
+            notification_type=notification_type,
+            title=title,
+            message=message
+        )
+        adjust_unread_count(user.pk, 1)
+        
+        # Queue an email notification if user has email and wants it now;
+        # digest subscribers get it in their next digest instead
+        if user.email and user.email_frequency == 'IMMEDIATE':
+            queue_email_notification(user, notification)
+        hub.publish_on_commit(user.pk, notification.pk)
     
     return notification
 
 
-def send_email_notification(user, notification):
+def render_email_notification(user, notification):
     """
-    Send an email notification to the user.
+    Build the email for a notification.
     
-    Args:
-        user: The user to send email to
-        notification: The notification object with details
+    Returns:
+        (subject, plain_message, html_message)
     """
-    try:
-        subject = f"🔔 {notification.title}"
-        
-        # Plain text version
-        plain_message = f"""
+    subject = f"🔔 {notification.title}"
+    
+    # Plain text version
+    plain_message = f"""
 Hello {user.get_full_name() or user.username},
 
 {notification.message}
@@ -61,48 +95,194 @@ View details at: /concerns/{notification.concern.pk}/
 
 ---
 Barangay Concerns Platform
-        """
-        
-        # HTML version
-        html_message = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #2563eb;">🔔 {notification.title}</h2>
-                <p>{notification.message}</p>
-                
-                <div style="background: #f8fafc; padding: 15px; border-radius: 8px; margin: 20px 0;">
-                    <p><strong>Concern:</strong> {notification.concern.title}</p>
-                    <p><strong>Status:</strong> {notification.concern.get_status_display()}</p>
-                    <p><strong>Category:</strong> {notification.concern.get_category_display()}</p>
-                </div>
-                
-                <a href="/concerns/{notification.concern.pk}/" 
-                   style="display: inline-block; background: #2563eb; color: white; padding: 12px 24px; 
-                          text-decoration: none; border-radius: 8px; font-weight: bold;">
-                    View Details
-                </a>
-                
-                <hr style="margin-top: 30px; border: none; border-top: 1px solid #e2e8f0;">
-                <p style="color: #64748b; font-size: 12px;">
-                    Barangay Concerns Platform - Helping build better communities
-                </p>
+    """
+    
+    # HTML version
+    html_message = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <h2 style="color: #2563eb;">🔔 {notification.title}</h2>
+            <p>{notification.message}</p>
+            
+            <div style="background: #f8fafc; padding: 15px; border-radius: 8px; margin: 20px 0;">
+                <p><strong>Concern:</strong> {notification.concern.title}</p>
+                <p><strong>Status:</strong> {notification.concern.get_status_display()}</p>
+                <p><strong>Category:</strong> {notification.concern.get_category_display()}</p>
             </div>
-        </body>
-        </html>
-        """
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@barangay-concerns.local',
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=True  # Don't crash if email fails
+            
+            <a href="/concerns/{notification.concern.pk}/" 
+               style="display: inline-block; background: #2563eb; color: white; padding: 12px 24px; 
+                      text-decoration: none; border-radius: 8px; font-weight: bold;">
+                View Details
+            </a>
+            
+            <hr style="margin-top: 30px; border: none; border-top: 1px solid #e2e8f0;">
+            <p style="color: #64748b; font-size: 12px;">
+                Barangay Concerns Platform - Helping build better communities
+            </p>
+        </div>
+    </body>
+    </html>
+    """
+    return subject, plain_message, html_message
+
+
+def queue_email_notification(user, notification):
+    """
+    Add the email for a notification to the outbox.
+    
+    Args:
+        user: The user to send email to
+        notification: The notification object with details
+    """
+    subject, plain_message, html_message = render_email_notification(user, notification)
+    return queue_email(user.email, subject, plain_message, html_message, notification=notification)
+
+
+def _braces(text):
+    """Escape user text for use inside a ``str.format`` template."""
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def render_digest(user, notifications, period):
+    """
+    Build a digest email listing ``notifications``.
+    
+    Returns:
+        (subject, plain_message, html_message)
+    """
+    subject = f"🔔 Your {period} Barangay Concerns digest ({len(notifications)} updates)"
+    
+    lines = "\n".join(
+        f"- {n.title}: {n.message} (/concerns/{n.concern_id}/)" for n in notifications
+    )
+    plain_message = f"""
+Hello {user.get_full_name() or user.username},
+
+Here is what happened on your concerns:
+
+{lines}
+
+---
+Barangay Concerns Platform
+    """
+    
+    items = "".join(
+        f"""
+            <li style="margin-bottom: 12px;">
+                <a href="/concerns/{n.concern_id}/" style="color: #2563eb; font-weight: bold; text-decoration: none;">{escape(n.title)}</a>
+                <br>{escape(n.message)}
+            </li>"""
+        for n in notifications
+    )
+    html_message = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+            <h2 style="color: #2563eb;">🔔 Your {period} digest</h2>
+            <p>Here is what happened on your concerns:</p>
+            <ul style="padding-left: 20px;">{items}
+            </ul>
+            
+            <hr style="margin-top: 30px; border: none; border-top: 1px solid #e2e8f0;">
+            <p style="color: #64748b; font-size: 12px;">
+                Barangay Concerns Platform - Helping build better communities
+            </p>
+        </div>
+    </body>
+    </html>
+    """
+    return subject, plain_message, html_message
+
+
+DIGEST_PERIODS = {
+    'HOURLY': ('hourly', timedelta(hours=1)),
+    'DAILY': ('daily', timedelta(days=1)),
+}
+
+
+def send_digests(frequency, now=None):
+    """
+    Queue one digest email per ``frequency`` (HOURLY or DAILY) subscriber
+    with unread notifications created or updated since their last digest.
+    
+    Returns:
+        (users with a digest, notifications included)
+    """
+    from apps.security_management.models import User
+    
+    period, length = DIGEST_PERIODS[frequency]
+    now = now or timezone.now()
+    users = User.objects.filter(email_frequency=frequency, is_active=True).exclude(email='')
+    sent = included = 0
+    for user in users.iterator():
+        since = user.last_digest_at or now - length
+        notifications = list(
+            Notification.objects.filter(user=user, is_read=False, updated_at__gt=since, updated_at__lte=now)
+            .order_by('-updated_at')[:settings.NOTIFICATION_DIGEST_MAX_ITEMS]
         )
-    except Exception as e:
-        # Log the error but don't crash
-        print(f"Failed to send email notification: {e}")
+        with transaction.atomic():
+            if notifications:
+                subject, plain_message, html_message = render_digest(user, notifications, period)
+                queue_email(user.email, subject, plain_message, html_message)
+                sent += 1
+                included += len(notifications)
+            user.last_digest_at = now
+            user.save(update_fields=['last_digest_at'])
+    return sent, included
+
+
+def status_change_notification(concern, old_status, new_status, changed_by=None):
+    """(notification_type, title, message) for a status change."""
+    if new_status == 'RESOLVED':
+        # Special notification for resolved
+        title = "✅ Your concern has been resolved!"
+        message = f"Great news! Your reported concern \"{concern.title}\" has been marked as resolved. Thank you for helping improve our community!"
+        return 'RESOLVED', title, message
+
+    status_emojis = {
+        'PENDING': '⏳',
+        'IN_PROGRESS': '🔄',
+        'RESOLVED': '✅',
+        'CLOSED': '🔒'
+    }
+    
+    emoji = status_emojis.get(new_status, '📢')
+    old_display = dict(concern.STATUS_CHOICES).get(old_status, old_status)
+    new_display = dict(concern.STATUS_CHOICES).get(new_status, new_status)
+    
+    title = f"{emoji} Your concern status updated to {new_display}"
+    message = f"Your reported concern \"{concern.title}\" has been updated from {old_display} to {new_display}."
+    
+    if changed_by:
+        message += f" Updated by {changed_by.get_full_name() or changed_by.username}."
+    return 'STATUS_CHANGE', title, message
+
+
+def priority_change_notification(concern, old_priority, new_priority):
+    """(notification_type, title, message) for a priority change."""
+    priority_emojis = {
+        'LOW': '🟢',
+        'MEDIUM': '🟡',
+        'HIGH': '🟠',
+        'URGENT': '🔴'
+    }
+    
+    emoji = priority_emojis.get(new_priority, '📢')
+    old_display = dict(concern.PRIORITY_CHOICES).get(old_priority, old_priority)
+    new_display = dict(concern.PRIORITY_CHOICES).get(new_priority, new_priority)
+    
+    title = f"{emoji} Concern priority updated to {new_display}"
+    message = f"The priority of your concern \"{concern.title}\" has been changed from {old_display} to {new_display}."
+    return 'PRIORITY_CHANGE', title, message
+
+
+def archived_notification(concern):
+    """(notification_type, title, message) for an archived concern."""
+    title = "📦 Your concern has been archived"
+    message = f"Your concern \"{concern.title}\" has been archived by LGU staff."
+    return 'ARCHIVED', title, message
 
 
 def notify_status_change(concern, old_status, new_status, changed_by=None):
@@ -117,27 +297,11 @@ def notify_status_change(concern, old_status, new_status, changed_by=None):
     """
     # Notify the reporter
     if concern.reporter:
-        status_emojis = {
-            'PENDING': '⏳',
-            'IN_PROGRESS': '🔄',
-            'RESOLVED': '✅',
-            'CLOSED': '🔒'
-        }
-        
-        emoji = status_emojis.get(new_status, '📢')
-        old_display = dict(concern.STATUS_CHOICES).get(old_status, old_status)
-        new_display = dict(concern.STATUS_CHOICES).get(new_status, new_status)
-        
-        title = f"{emoji} Your concern status updated to {new_display}"
-        message = f"Your reported concern \"{concern.title}\" has been updated from {old_display} to {new_display}."
-        
-        if changed_by:
-            message += f" Updated by {changed_by.get_full_name() or changed_by.username}."
-        
+        notification_type, title, message = status_change_notification(concern, old_status, new_status, changed_by)
         create_notification(
             user=concern.reporter,
             concern=concern,
-            notification_type='STATUS_CHANGE',
+            notification_type=notification_type,
             title=title,
             message=message
         )
@@ -148,24 +312,11 @@ def notify_priority_change(concern, old_priority, new_priority, changed_by=None)
     Create a notification when a concern's priority changes.
     """
     if concern.reporter:
-        priority_emojis = {
-            'LOW': '🟢',
-            'MEDIUM': '🟡',
-            'HIGH': '🟠',
-            'URGENT': '🔴'
-        }
-        
-        emoji = priority_emojis.get(new_priority, '📢')
-        old_display = dict(concern.PRIORITY_CHOICES).get(old_priority, old_priority)
-        new_display = dict(concern.PRIORITY_CHOICES).get(new_priority, new_priority)
-        
-        title = f"{emoji} Concern priority updated to {new_display}"
-        message = f"The priority of your concern \"{concern.title}\" has been changed from {old_display} to {new_display}."
-        
+        notification_type, title, message = priority_change_notification(concern, old_priority, new_priority)
         create_notification(
             user=concern.reporter,
             concern=concern,
-            notification_type='PRIORITY_CHANGE',
+            notification_type=notification_type,
             title=title,
             message=message
         )
@@ -176,13 +327,11 @@ def notify_concern_resolved(concern):
     Create a notification when a concern is resolved.
     """
     if concern.reporter:
-        title = "✅ Your concern has been resolved!"
-        message = f"Great news! Your reported concern \"{concern.title}\" has been marked as resolved. Thank you for helping improve our community!"
-        
+        notification_type, title, message = status_change_notification(concern, None, 'RESOLVED')
         create_notification(
             user=concern.reporter,
             concern=concern,
-            notification_type='RESOLVED',
+            notification_type=notification_type,
             title=title,
             message=message
         )
@@ -193,18 +342,65 @@ def notify_concern_archived(concern):
     Create a notification when a concern is archived.
     """
     if concern.reporter:
-        title = "📦 Your concern has been archived"
-        message = f"Your concern \"{concern.title}\" has been archived by LGU staff."
-        
+        notification_type, title, message = archived_notification(concern)
         create_notification(
             user=concern.reporter,
             concern=concern,
-            notification_type='ARCHIVED',
+            notification_type=notification_type,
             title=title,
             message=message
         )
 
 
+def create_notifications_bulk(entries, batch_size=1000):
+    """
+    Create many notifications at once, for bulk actions.
+    
+    ``entries`` are ``(user, concern, notification_type, title, message)``
+    tuples. The notifications and their emails are each written with
+    batched INSERTs and unread counters with one UPDATE per distinct
+    increment, instead of several statements per notification. Entries
+    are never coalesced.
+    
+    Returns:
+        The created Notification objects
+    """
+    if not entries:
+        return []
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user=user, concern=concern, notification_type=notification_type, title=title, message=message)
+                for user, concern, notification_type, title, message in entries
+            ],
+            batch_size=batch_size,
+        )
+        
+        increments = Counter(notification.user_id for notification in notifications)
+        by_delta = {}
+        for user_id, delta in increments.items():
+            by_delta.setdefault(delta, []).append(user_id)
+        for delta, user_ids in by_delta.items():
+            adjust_unread_count(user_ids, delta)
+        
+        emails = []
+        for notification in notifications:
+            user = notification.user
+            if user.email and user.email_frequency == 'IMMEDIATE':
+                subject, plain_message, html_message = render_email_notification(user, notification)
+                emails.append(EmailOutbox(
+                    notification=notification, to_email=user.email, subject=subject, body=plain_message, html_body=html_message,
+                ))
+        if emails:
+            EmailOutbox.objects.bulk_create(emails, batch_size=batch_size)
+            if settings.EMAIL_OUTBOX_IN_PROCESS:
+                transaction.on_commit(start_dispatcher)
+        
+        for user_id in increments:
+            hub.publish_on_commit(user_id)
+    return notifications
+
+
 def notify_new_comment(concern, commenter):
     """
     Create a notification when someone comments on a concern.
@@ -225,7 +421,11 @@ def notify_new_comment(concern, commenter):
             concern=concern,
             notification_type='COMMENT',
             title=title,
-            message=message
+            message=message,
+            coalesce_as=(
+                "💬 {count} new comments on your concern",
+                f"Your concern \"{_braces(concern.title)}\" has {{count}} new comments, the latest from {_braces(commenter_name)}.",
+            )
         )
 
 
@@ -246,15 +446,24 @@ def notify_vote(concern, voter, vote_value):
             title = "👍 Someone upvoted your concern"
             message = f"{voter_name} upvoted your concern \"{concern.title}\"."
             notification_type = 'UPVOTE'
+            coalesce_as = (
+                "👍 {count} upvotes on your concern",
+                f"Your concern \"{_braces(concern.title)}\" got {{count}} upvotes, the latest from {_braces(voter_name)}.",
+            )
         else:
             title = "👎 Someone downvoted your concern"
             message = f"{voter_name} downvoted your concern \"{concern.title}\"."
             notification_type = 'DOWNVOTE'
+            coalesce_as = (
+                "👎 {count} downvotes on your concern",
+                f"Your concern \"{_braces(concern.title)}\" got {{count}} downvotes, the latest from {_braces(voter_name)}.",
+            )
         
         create_notification(
             user=concern.reporter,
             concern=concern,
             notification_type=notification_type,
             title=title,
-            message=message
+            message=message,
+            coalesce_as=coalesce_as
         )
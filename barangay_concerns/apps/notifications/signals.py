@@ -2,47 +2,26 @@
 """
 Django signals to automatically create notifications when concerns are updated.
 """
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from apps.concerns.models import Concern
-from . import services
-
-
-# Store the old values before save
-@receiver(pre_save, sender=Concern)
-def concern_pre_save(sender, instance, **kwargs):
-    """
-    Store the old status and priority before the concern is saved.
-    This allows us to compare and notify on changes.
-    """
-    if instance.pk:
-        try:
-            old_instance = Concern.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-            instance._old_priority = old_instance.priority
-            instance._old_is_archived = old_instance.is_archived
-        except Concern.DoesNotExist:
-            instance._old_status = None
-            instance._old_priority = None
-            instance._old_is_archived = None
-    else:
-        instance._old_status = None
-        instance._old_priority = None
-        instance._old_is_archived = None
+from . import hub, services
+from .models import Notification, adjust_unread_count
 
 
 @receiver(post_save, sender=Concern)
 def concern_post_save(sender, instance, created, **kwargs):
     """
-    Create notifications after a concern is saved.
+    Create notifications after a concern is saved, comparing with the
+    values it was loaded with (no extra query).
     """
     # Don't notify on new concern creation
     if created:
         return
     
-    old_status = getattr(instance, '_old_status', None)
-    old_priority = getattr(instance, '_old_priority', None)
-    old_is_archived = getattr(instance, '_old_is_archived', None)
+    old_status = instance.previous('status')
+    old_priority = instance.previous('priority')
+    old_is_archived = instance.previous('is_archived')
     
     # Status change notification
     if old_status and old_status != instance.status:
@@ -56,8 +35,9 @@ def concern_post_save(sender, instance, created, **kwargs):
                 new_status=instance.status
             )
     
-    # Priority change notification
-    if old_priority and old_priority != instance.priority:
+    # Priority change notification (the initial AI triage is part of
+    # filing the report, not a change the reporter needs to hear about)
+    if old_priority and old_priority != instance.priority and not getattr(instance, '_ai_triage', False):
         services.notify_priority_change(
             concern=instance,
             old_priority=old_priority,
@@ -67,3 +47,14 @@ def concern_post_save(sender, instance, created, **kwargs):
     # Archive notification
     if old_is_archived is False and instance.is_archived is True:
         services.notify_concern_archived(instance)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_post_delete(sender, instance, **kwargs):
+    """
+    Keep the unread counter right when an unread notification is deleted,
+    including through a cascade from its concern.
+    """
+    if not instance.is_read:
+        adjust_unread_count(instance.user_id, -1)
+        hub.publish_on_commit(instance.user_id)
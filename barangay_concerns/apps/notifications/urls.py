@@ -11,4 +11,7 @@ urlpatterns = [
     path('<int:pk>/delete/', views.notification_delete_view, name='delete'),
     path('delete-all-read/', views.notification_delete_all_read_view, name='delete_all_read'),
     path('api/count/', views.notification_count_api, name='count_api'),
+    path('api/list/', views.notification_list_api, name='list_api'),
+    path('api/stream/', views.notification_stream, name='stream'),
+    path('api/poll/', views.notification_poll, name='poll'),
 ]
@@ -1,26 +1,76 @@
 # apps/notifications/views.py
+import asyncio
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from apps.concerns.pagination import InvalidCursor, page_links, paginate
+from config.streaming import ClientDisconnected, stream_until_disconnect, wait_unless_disconnected
+from . import hub
 from .models import Notification
 
 
 @login_required
 def notification_list_view(request):
     """
-    Display all notifications for the current user.
+    Display the current user's notifications, one cursor page at a time.
     """
-    notifications = Notification.objects.filter(user=request.user)
-    unread_count = notifications.filter(is_read=False).count()
+    notifications = Notification.objects.filter(user=request.user).select_related('concern')
+    unread_count = request.user.unread_notifications
+    page = paginate(request, notifications)
     
     context = {
-        'notifications': notifications,
+        'notifications': page,
         'unread_count': unread_count,
+        **page_links(request, page),
     }
     return render(request, 'notifications/list.html', context)
 
 
+def _notification_data(notification):
+    return {
+        'id': notification.pk,
+        'type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'count': notification.count,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+        'concern': {
+            'id': notification.concern.pk,
+            'url': reverse('concerns:detail', args=[notification.concern.pk]),
+            'category_display': notification.concern.get_category_display(),
+            'status': notification.concern.status,
+            'status_display': notification.concern.get_status_display(),
+        },
+    }
+
+
+@login_required
+def notification_list_api(request):
+    """
+    JSON variant of the notification list for infinite scrolling.
+    """
+    notifications = Notification.objects.filter(user=request.user).select_related('concern')
+    try:
+        page = paginate(request, notifications, strict=True)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    results = [_notification_data(notification) for notification in page]
+    return JsonResponse({
+        'results': results,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
 @login_required
 def notification_mark_read_view(request, pk):
     """
@@ -83,5 +133,123 @@ def notification_count_api(request):
     API endpoint to get the unread notification count.
     Used for updating the navbar badge dynamically.
     """
-    count = Notification.get_unread_count(request.user)
-    return JsonResponse({'count': count})
+    # The counter arrives with request.user, which is loaded by primary key
+    return JsonResponse({'count': request.user.unread_notifications})
+
+
+# Push channel replacing the badge poll (see hub.py). Both views are async:
+# under ASGI a waiting connection costs an idle coroutine, not a worker.
+
+def _user_id(request):
+    return request.user.pk if request.user.is_authenticated else None
+
+
+def _push_state(user_id, notification_ids=()):
+    """Unread count plus the data of the given (new or updated) notifications."""
+    notifications = Notification.objects.filter(user_id=user_id, pk__in=notification_ids).select_related('concern')
+    return Notification.get_unread_count(user_id), [_notification_data(n) for n in notifications]
+
+
+def _drain(queue):
+    """Notification ids waiting in ``queue`` (None entries only mean 'recount')."""
+    ids = set()
+    while not queue.empty():
+        notification_id = queue.get_nowait()
+        if notification_id is not None:
+            ids.add(notification_id)
+    return ids
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _push_events(user_id):
+    queue = hub.subscribe(user_id)
+    started = time.monotonic()
+    try:
+        yield f"retry: {settings.NOTIFICATION_PUSH_RETRY_MS}\n\n"
+        count, _ = await sync_to_async(_push_state)(user_id)
+        yield _sse('count', {'count': count})
+        sent = {}  # id -> updated data already sent, so duplicate wakes stay quiet
+        while time.monotonic() - started < settings.NOTIFICATION_PUSH_MAX_AGE:
+            try:
+                first = await asyncio.wait_for(queue.get(), timeout=settings.NOTIFICATION_PUSH_KEEPALIVE)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+            ids = _drain(queue) | ({first} if first is not None else set())
+            new_count, notifications = await sync_to_async(_push_state)(user_id, ids)
+            for data in notifications:
+                if sent.get(data['id']) != data:
+                    sent[data['id']] = data
+                    yield _sse('notification', data)
+            if new_count != count:
+                count = new_count
+                yield _sse('count', {'count': count})
+    finally:
+        hub.unsubscribe(user_id, queue)
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events of ``count`` (unread total) and ``notification``
+    (new or updated row) for the current user. Needs ASGI; under WSGI it
+    answers 204, which makes the browser stop and fall back to polling.
+    """
+    user_id = await sync_to_async(_user_id)(request)
+    if user_id is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    # Ends, and unsubscribes, as soon as the client goes away (config/streaming.py)
+    events = stream_until_disconnect(request, _push_events(user_id))
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def notification_poll(request):
+    """
+    Long-poll fallback: returns as soon as the unread count differs from
+    ``?count=`` or a notification arrives, else after
+    ``NOTIFICATION_LONG_POLL_TIMEOUT`` seconds. Under WSGI it answers at once
+    with ``retry_after`` so a waiting request never holds a worker.
+    """
+    user_id = await sync_to_async(_user_id)(request)
+    if user_id is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    try:
+        known = int(request.GET.get('count', -1))
+    except ValueError:
+        known = -1
+
+    if not isinstance(request, ASGIRequest):
+        count, _ = await sync_to_async(_push_state)(user_id)
+        return JsonResponse({'count': count, 'notifications': [], 'retry_after': settings.NOTIFICATION_POLL_INTERVAL})
+
+    queue = hub.subscribe(user_id)
+    try:
+        count, _ = await sync_to_async(_push_state)(user_id)
+        ids = set()
+        if count == known:
+            try:
+                first = await wait_unless_disconnected(
+                    request, queue.get(), timeout=settings.NOTIFICATION_LONG_POLL_TIMEOUT
+                )
+                ids = _drain(queue) | ({first} if first is not None else set())
+            except asyncio.TimeoutError:
+                pass
+            except ClientDisconnected:
+                # Nobody is left to read the answer
+                return HttpResponse(status=204)
+        if ids:
+            count, notifications = await sync_to_async(_push_state)(user_id, ids)
+        else:
+            notifications = []
+    finally:
+        hub.unsubscribe(user_id, queue)
+    return JsonResponse({'count': count, 'notifications': notifications, 'retry_after': 0})
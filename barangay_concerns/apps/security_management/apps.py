@@ -7,4 +7,8 @@ class SecurityManagementConfig(AppConfig):
     # 2. App name/path changed from 'apps.accounts'
     name = 'apps.security_management'
 
+    def ready(self):
+        # Import signals when app is ready
+        import apps.security_management.signals  # noqa
+
 # Note: Any line like 'from . import views' has been removed to prevent the AppRegistryNotReady error.
\ No newline at end of file
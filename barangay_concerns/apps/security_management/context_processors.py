@@ -1,14 +1,16 @@
 from django.utils import timezone
+from config.caching import ANNOUNCEMENTS
 from .models import Announcement
 
 def active_announcements(request):
     """
     Inject active global announcements into the template context.
+    Every page shows them, so the active ones are kept in the shared cache
+    (dropped whenever an announcement changes) and expiry is checked here.
     """
     now = timezone.now()
-    announcements = Announcement.objects.filter(
-        is_active=True, 
-        active_until__gte=now
-    ).order_by('-created_at')
+    announcements = ANNOUNCEMENTS.get_or_set(('active',), lambda: list(
+        Announcement.objects.filter(is_active=True, active_until__isnull=False).order_by('-created_at')
+    ))
     
-    return {'global_announcements': announcements}
+    return {'global_announcements': [a for a in announcements if a.active_until >= now]}
@@ -41,7 +41,7 @@ class UserProfileForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ['profile_image', 'alias', 'first_name', 'last_name', 'phone_number', 
-                  'region', 'province', 'city', 'municipality', 'barangay']
+                  'region', 'province', 'city', 'municipality', 'barangay', 'email_frequency']
         
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
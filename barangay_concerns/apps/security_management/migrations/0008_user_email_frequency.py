@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security_management', '0007_auditlog_announcement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_frequency',
+            field=models.CharField(choices=[('IMMEDIATE', 'Right away'), ('HOURLY', 'Hourly digest'), ('DAILY', 'Daily digest'), ('OFF', 'No emails')], default='IMMEDIATE', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, help_text='End of the period covered by the last digest email', null=True),
+        ),
+    ]
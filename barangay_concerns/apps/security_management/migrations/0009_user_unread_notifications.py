@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_unread(apps, schema_editor):
+    User = apps.get_model('security_management', 'User')
+    Notification = apps.get_model('notifications', 'Notification')
+    unread = (
+        Notification.objects.filter(user=OuterRef('pk'), is_read=False)
+        .order_by().values('user').annotate(total=Count('id')).values('total')
+    )
+    User.objects.update(unread_notifications=Coalesce(Subquery(unread), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_coalescing'),
+        ('security_management', '0008_user_email_frequency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
@@ -28,6 +28,18 @@ class User(AbstractUser):
     is_flagged_for_legal_action = models.BooleanField(default=False, help_text="Flagged by LGU for legal action due to trolling/misconduct")
     legal_action_reason = models.TextField(blank=True, help_text="Reason for legal action")
     
+    # Notification emails
+    EMAIL_FREQUENCY_CHOICES = (
+        ('IMMEDIATE', 'Right away'),
+        ('HOURLY', 'Hourly digest'),
+        ('DAILY', 'Daily digest'),
+        ('OFF', 'No emails'),
+    )
+    email_frequency = models.CharField(max_length=10, choices=EMAIL_FREQUENCY_CHOICES, default='IMMEDIATE')
+    last_digest_at = models.DateTimeField(null=True, blank=True, help_text="End of the period covered by the last digest email")
+    # Maintained by apps.notifications; repaired by `manage.py reconcile_unread_counts`
+    unread_notifications = models.PositiveIntegerField(default=0, editable=False)
+    
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
     
@@ -0,0 +1,17 @@
+# apps/security_management/signals.py
+"""
+Drop the cached announcement list (see context_processors) when an
+announcement is created, edited or deleted.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.caching import ANNOUNCEMENTS
+
+from .models import Announcement
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def announcement_changed(sender, **kwargs):
+    ANNOUNCEMENTS.invalidate_on_commit()
@@ -10,6 +10,7 @@ from datetime import timedelta
 from .forms import UserRegistrationForm, UserLoginForm, UserProfileForm, ChangePasswordForm
 from .models import User, Announcement, AuditLog
 from apps.concerns.utils import generate_random_alias
+from config.caching import ANNOUNCEMENTS
 
 def is_staff_or_admin(user):
     return user.is_authenticated and user.role in ['LGU', 'ADMIN']
@@ -221,6 +222,7 @@ def admin_announcements_view(request):
         elif action == 'expire':
             announcement_id = request.POST.get('announcement_id')
             Announcement.objects.filter(id=announcement_id).update(is_active=False)
+            ANNOUNCEMENTS.invalidate()  # update() sends no signal
             messages.success(request, "Announcement expired.")
         
         elif action == 'delete':
@@ -11,3 +11,6 @@ python manage.py collectstatic --no-input
 
 # Run migrations
 python manage.py migrate
+
+# Create the cache table (does nothing unless CACHE_BACKEND=database)
+python manage.py createcachetable
@@ -2,4 +2,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
-application = get_asgi_application()
\ No newline at end of file
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from config.streaming import DisconnectMiddleware  # noqa: E402
+
+# Lets streaming views stop as soon as their client goes away
+application = DisconnectMiddleware(django_application)
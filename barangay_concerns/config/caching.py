@@ -0,0 +1,186 @@
+# config/caching.py
+"""
+Namespaced, versioned entries in the shared cache.
+
+``CACHES`` (see settings) points every worker at one store: a directory, a
+database table or Redis. Cached data is grouped into namespaces, one per
+kind of data. Every key of a namespace carries the namespace's version, a
+time-based counter kept in the cache, so ``invalidate()`` orphans all of
+the namespace's entries with a single write; they are never looked up again
+and age out by their timeout.
+
+Each namespace counts its hits and misses. The counts are buffered in the
+process and added to counters in the shared cache every
+``CACHE_STATS_FLUSH_EVERY`` lookups or ``CACHE_STATS_FLUSH_SECONDS``, so
+``manage.py cache_stats`` reports every worker, not just one.
+"""
+import atexit
+import hashlib
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Key parts that are long or hold anything else (spaces, user input) are
+# hashed, which keeps every key valid for every backend
+MAX_PARTS_LENGTH = 200
+PLAIN_PARTS = re.compile(r'[\w.,:|-]*')
+
+_registry = {}
+_lock = threading.Lock()
+_missing = object()
+
+
+def _new_version():
+    # Time-based so an evicted version key never comes back with a value
+    # some stale entry is still stored under
+    return time.time_ns() // 1000
+
+
+def _add_to_counter(key, count):
+    try:
+        cache.incr(key, count)
+    except ValueError:
+        if not cache.add(key, count, timeout=None):
+            cache.incr(key, count)
+
+
+class CacheNamespace:
+    def __init__(self, name):
+        self.name = name
+        self._pending = {'hits': 0, 'misses': 0}
+        self._flushed_at = time.monotonic()
+        _registry[name] = self
+
+    def __repr__(self):
+        return f'<CacheNamespace {self.name}>'
+
+    @property
+    def timeout(self):
+        """Seconds entries live, from ``CACHE_NAMESPACE_TIMEOUTS``; 0 disables caching."""
+        return settings.CACHE_NAMESPACE_TIMEOUTS.get(self.name, 0)
+
+    def version(self):
+        key = f'{self.name}:version'
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, _new_version(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def key(self, *parts):
+        """The cache key of ``parts`` under the namespace's current version."""
+        tail = ':'.join('' if part is None else str(part) for part in parts)
+        if len(tail) > MAX_PARTS_LENGTH or not PLAIN_PARTS.fullmatch(tail):
+            tail = hashlib.sha1(tail.encode()).hexdigest()
+        return f'{self.name}:{self.version()}:{tail}'
+
+    def get_or_set(self, parts, compute):
+        """
+        Return the value cached under ``parts`` (a tuple of strings and
+        numbers that identifies it within the namespace), or call
+        ``compute()``, cache its result and return it. Exceptions from
+        ``compute`` propagate and nothing is cached.
+        """
+        timeout = self.timeout
+        if not timeout:
+            return compute()
+        key = self.key(*parts)
+        value = cache.get(key, _missing)
+        if value is _missing:
+            value = compute()
+            cache.set(key, value, timeout)
+            self.record(misses=1)
+        else:
+            self.record(hits=1)
+        return value
+
+    def invalidate(self):
+        """Orphan every entry of the namespace."""
+        key = f'{self.name}:version'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+    def invalidate_on_commit(self):
+        """``invalidate`` once the current transaction commits, so no request re-caches old rows."""
+        transaction.on_commit(self.invalidate)
+
+    def record(self, hits=0, misses=0):
+        with _lock:
+            self._pending['hits'] += hits
+            self._pending['misses'] += misses
+            due = (
+                sum(self._pending.values()) >= settings.CACHE_STATS_FLUSH_EVERY
+                or time.monotonic() - self._flushed_at >= settings.CACHE_STATS_FLUSH_SECONDS
+            )
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Add this process's buffered counts to the shared counters."""
+        with _lock:
+            pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+            self._flushed_at = time.monotonic()
+        for kind, count in pending.items():
+            if count:
+                _add_to_counter(f'{self.name}:stats:{kind}', count)
+
+    def stats(self):
+        """Hits, misses and hit rate of all workers since the last reset."""
+        self.flush_stats()
+        counts = cache.get_many([f'{self.name}:stats:hits', f'{self.name}:stats:misses'])
+        hits = counts.get(f'{self.name}:stats:hits', 0)
+        misses = counts.get(f'{self.name}:stats:misses', 0)
+        return {
+            'lookups': hits + misses,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+
+    def reset_stats(self):
+        with _lock:
+            self._pending = {'hits': 0, 'misses': 0}
+        cache.delete_many([f'{self.name}:stats:hits', f'{self.name}:stats:misses'])
+
+
+def namespaces():
+    return sorted(_registry.values(), key=lambda namespace: namespace.name)
+
+
+def backend_description():
+    """``Backend class (location)`` of the default cache, for reports."""
+    config = settings.CACHES['default']
+    backend = config['BACKEND'].rsplit('.', 1)[-1]
+    location = config.get('LOCATION')
+    if location and '@' in str(location):
+        # Keep credentials in a Redis URL out of the output
+        location = str(location).split('://', 1)[0] + '://...@' + str(location).rsplit('@', 1)[1]
+    return f'{backend} ({location})' if location else backend
+
+
+@atexit.register
+def _flush_all():
+    # Best effort: the cache (or its database) may already be gone at exit
+    for namespace in namespaces():
+        try:
+            namespace.flush_stats()
+        except Exception:
+            pass
+
+
+# Ids of concern list pages (list view and API), per filter and cursor
+CONCERN_LIST = CacheNamespace('concern-list')
+# Map point payloads, per filter, tile-snapped bounding box and zoom
+MAP_DATA = CacheNamespace('map-data')
+# Aggregates of the LGU analytics dashboard
+ANALYTICS = CacheNamespace('analytics')
+# Announcements shown on every page
+ANNOUNCEMENTS = CacheNamespace('announcements')
+# Stats only: detail fragments keep per-concern versions (apps/concerns/fragments.py)
+CONCERN_DETAIL = CacheNamespace('concern-detail')
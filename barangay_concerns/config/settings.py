@@ -2,6 +2,7 @@
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,6 +51,66 @@ INSTALLED_APPS = [
 
 # AI Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+AI_ANALYSIS_MODEL = 'gemini-pro'
+# 'gemini', or 'fake' for the offline keyword model in apps/ai_services/fake.py
+AI_MODEL_BACKEND = os.environ.get('AI_MODEL_BACKEND', 'gemini')
+AI_FAKE_LATENCY = float(os.environ.get('AI_FAKE_LATENCY', 0))  # seconds per fake call
+
+# Barangay Bot answer cache (apps/ai_services/faq_cache.py): entries, seconds,
+# and the TF-IDF cosine similarity a reworded question needs to reuse an answer
+CHATBOT_CACHE_SIZE = 256
+CHATBOT_CACHE_TTL = 24 * 60 * 60
+CHATBOT_CACHE_SIMILARITY = 0.75
+# gemini-flash-latest is the safest alias for the current library version/quota
+CHATBOT_MODEL = 'gemini-flash-latest'
+CHATBOT_STREAM_TIMEOUT = 60  # seconds a streamed answer may take in total
+
+# Background AI triage of new concerns (apps/ai_services/triage.py). Workers run
+# inside the web process unless AI_TRIAGE_IN_PROCESS is off and
+# `manage.py run_triage_worker` runs separately.
+AI_TRIAGE_IN_PROCESS = os.environ.get('AI_TRIAGE_IN_PROCESS', 'True').lower() == 'true'
+AI_TRIAGE_CONCURRENCY = int(os.environ.get('AI_TRIAGE_CONCURRENCY', 2))
+AI_TRIAGE_TIMEOUT = 30          # seconds per AI call
+AI_TRIAGE_MAX_ATTEMPTS = 3
+AI_TRIAGE_RETRY_DELAY = 30      # seconds, doubled after every failed attempt
+
+# Concern search backend: leave empty to pick one from the database vendor
+# (PostgreSQL full-text search or SQLite FTS5), or force 'basic', 'postgres' or 'sqlite_fts'.
+CONCERN_SEARCH_BACKEND = os.environ.get('CONCERN_SEARCH_BACKEND', '')
+
+# Cursor pagination for concern, archive and notification lists (?page_size= is capped at the max)
+PAGINATION_PAGE_SIZE = int(os.environ.get('PAGINATION_PAGE_SIZE', 20))
+PAGINATION_MAX_PAGE_SIZE = 100
+# ?sort=trending ranks concerns reported in the last this-many days by score
+TRENDING_WINDOW_DAYS = 7
+# ?sort=hot: log10 of engagement (votes + comments + priority points) plus age
+# bonus; a report HOT_DECAY_SECONDS newer needs ten times less engagement to tie
+HOT_DECAY_SECONDS = 45000
+HOT_COMMENT_WEIGHT = 2
+HOT_PRIORITY_POINTS = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 3, 'URGENT': 10}
+# Concerns read, locked and updated per statement by bulk status updates
+BULK_UPDATE_CHUNK_SIZE = 1000
+# Comment threads: reply levels kept (the path column fits 31), indentation
+# levels drawn, and replies shown per comment before a "show more" button
+COMMENT_MAX_DEPTH = 30
+COMMENT_INDENT_LEVELS = 6
+COMMENT_REPLIES_SHOWN = 3
+# Top-level comments rendered with the detail page (later ones load from the
+# comments API), and the most replies a comment may have to be rendered inline
+COMMENT_PAGE_SIZE = 20
+COMMENT_INLINE_REPLIES = 10
+# Lifetime of cached concern detail fragments; they are also dropped whenever the
+# concern, its comments or its votes change. 0 renders them on every request
+DETAIL_FRAGMENT_CACHE_SECONDS = int(os.environ.get('DETAIL_FRAGMENT_CACHE_SECONDS', 600))
+# Reporters whose karma falls to this many points are blocked by the votes against them
+KARMA_BAN_THRESHOLD = -10
+
+# The concerns map gets server-side clusters instead of points below this zoom
+MAP_CLUSTER_MAX_ZOOM = 12
+# GeoJSON map tiles: deepest zoom served (the map over-zooms past it) and the
+# public Cache-Control max-age, which bounds how stale a CDN copy can get
+MAP_TILE_MAX_ZOOM = 16
+MAP_TILE_CACHE_SECONDS = int(os.environ.get('MAP_TILE_CACHE_SECONDS', 300))
 
 # Email Configuration (Console backend for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -63,6 +124,28 @@ DEFAULT_FROM_EMAIL = 'Barangay Concerns <noreply@barangay-concerns.local>'
 # EMAIL_HOST_USER = 'your-email@gmail.com'
 # EMAIL_HOST_PASSWORD = 'your-app-password'
 
+# Notification emails go through an outbox table (apps/notifications/outbox.py).
+# A dispatcher thread runs inside the web process unless EMAIL_OUTBOX_IN_PROCESS
+# is off and `manage.py dispatch_email_outbox` runs separately.
+EMAIL_OUTBOX_IN_PROCESS = os.environ.get('EMAIL_OUTBOX_IN_PROCESS', 'True').lower() == 'true'
+EMAIL_OUTBOX_BATCH_SIZE = 50        # emails sent per SMTP connection
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5       # then the email is dead-lettered
+EMAIL_OUTBOX_RETRY_DELAY = 60       # seconds, doubled after every failed attempt
+
+# Repeat votes/comments on one concern within this many seconds update a single
+# unread notification instead of adding rows; digests list at most this many items
+NOTIFICATION_COALESCE_WINDOW = 60 * 60
+NOTIFICATION_DIGEST_MAX_ITEMS = 50
+
+# Live notification badge (apps/notifications/hub.py). Push needs ASGI; under
+# WSGI the browser polls every NOTIFICATION_POLL_INTERVAL seconds instead.
+NOTIFICATION_PUSH_WATCH_INTERVAL = 2     # seconds between cross-process change checks (0 = off)
+NOTIFICATION_PUSH_KEEPALIVE = 25         # seconds between SSE keep-alive comments
+NOTIFICATION_PUSH_MAX_AGE = 5 * 60       # seconds before a stream closes and the browser reconnects
+NOTIFICATION_PUSH_RETRY_MS = 3000        # browser reconnect delay
+NOTIFICATION_LONG_POLL_TIMEOUT = 25
+NOTIFICATION_POLL_INTERVAL = 30
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Whitenoise for static files
@@ -108,6 +191,48 @@ DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
     DATABASES['default'] = dj_database_url.config(default=DATABASE_URL, conn_max_age=600)
 
+# Cache shared by all workers (config/caching.py). CACHE_BACKEND is 'file' (a
+# directory, shared by the workers of one machine), 'database' (needs
+# `manage.py createcachetable`), 'redis' (REDIS_URL, needs the redis package),
+# or 'locmem' (per process, for development). Defaults to redis when REDIS_URL is set.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if REDIS_URL else 'file')
+CACHE_OPTIONS = {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))}
+if CACHE_BACKEND == 'file':
+    CACHE_CONFIG = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', str(BASE_DIR / '.cache' / 'django')),
+        'OPTIONS': CACHE_OPTIONS,
+    }
+elif CACHE_BACKEND == 'database':
+    CACHE_CONFIG = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': CACHE_OPTIONS,
+    }
+elif CACHE_BACKEND == 'redis':
+    if not REDIS_URL:
+        raise ImproperlyConfigured('CACHE_BACKEND=redis needs REDIS_URL.')
+    CACHE_CONFIG = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+elif CACHE_BACKEND == 'locmem':
+    CACHE_CONFIG = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'OPTIONS': CACHE_OPTIONS}
+else:
+    raise ImproperlyConfigured(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r}: use 'file', 'database', 'redis' or 'locmem'.")
+CACHES = {'default': {**CACHE_CONFIG, 'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'barangay')}}
+# Seconds entries of each cache namespace live (0 = off). Edits drop concern
+# list, map and analytics entries at once; vote and comment counts on list
+# pages may lag by up to the list timeout.
+CACHE_NAMESPACE_TIMEOUTS = {
+    'concern-list': int(os.environ.get('CONCERN_LIST_CACHE_SECONDS', 60)),
+    'map-data': 5 * 60,
+    'analytics': 5 * 60,
+    'announcements': 5 * 60,
+    'concern-detail': DETAIL_FRAGMENT_CACHE_SECONDS,  # read by apps/concerns/fragments.py itself
+}
+# Hit/miss counts are added to the shared counters every this many lookups or seconds
+CACHE_STATS_FLUSH_EVERY = 50
+CACHE_STATS_FLUSH_SECONDS = 30
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
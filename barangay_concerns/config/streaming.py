@@ -0,0 +1,111 @@
+# config/streaming.py
+"""
+Noticing client disconnects in streaming responses under ASGI.
+
+Django 4.2 reads the request body from the ASGI ``receive`` channel and
+then stops listening to it, so it never learns that a client went away:
+a streaming response keeps running, holding whatever it subscribed to,
+until it ends by itself, and the server quietly drops what it writes.
+``DisconnectMiddleware`` (wrapped around the application in ``asgi.py``)
+keeps waiting on ``receive`` once the body has been read and sets an event
+in the scope when ``http.disconnect`` arrives. ``stream_until_disconnect``
+wraps a view's async generator and cancels it at its current ``await``
+the moment that happens, so its ``finally`` blocks run at once;
+``wait_unless_disconnected`` does the same for a view that waits before
+it answers (a long poll).
+
+Django 5 listens for the disconnect itself; drop this when upgrading.
+"""
+import asyncio
+
+DISCONNECTED = 'barangay.disconnected'
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class DisconnectMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        disconnected = scope[DISCONNECTED] = asyncio.Event()
+        listener = None
+
+        async def listen():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        async def receive_body():
+            nonlocal listener
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+            elif not message.get('more_body', False) and listener is None:
+                # The body is complete; from here on only the disconnect can come
+                listener = asyncio.ensure_future(listen())
+            return message
+
+        try:
+            await self.app(scope, receive_body, send)
+        finally:
+            if listener is not None:
+                listener.cancel()
+
+
+async def stream_until_disconnect(request, events):
+    """
+    Yield from the async generator ``events`` until it ends or the client
+    disconnects, then close it (cancelling it mid-``await`` if need be).
+    Without ``DisconnectMiddleware`` in front it simply yields everything.
+    """
+    disconnected = getattr(request, 'scope', {}).get(DISCONNECTED)
+    waiter = asyncio.ensure_future(disconnected.wait()) if disconnected else None
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(events.__anext__())
+            await asyncio.wait([step] + ([waiter] if waiter else []), return_when=asyncio.FIRST_COMPLETED)
+            if not step.done():
+                return
+            try:
+                event = step.result()
+            except StopAsyncIteration:
+                return
+            step = None
+            yield event
+    finally:
+        if waiter:
+            waiter.cancel()
+        if step is not None and not step.done():
+            step.cancel()
+            await asyncio.gather(step, return_exceptions=True)
+        await events.aclose()
+
+
+async def wait_unless_disconnected(request, awaitable, timeout=None):
+    """
+    ``asyncio.wait_for(awaitable, timeout)`` that gives up with
+    ``ClientDisconnected`` as soon as the client disconnects.
+    """
+    disconnected = getattr(request, 'scope', {}).get(DISCONNECTED)
+    if disconnected is None:
+        return await asyncio.wait_for(awaitable, timeout)
+    task = asyncio.ensure_future(awaitable)
+    waiter = asyncio.ensure_future(disconnected.wait())
+    try:
+        await asyncio.wait((task, waiter), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            return task.result()
+        if waiter.done():
+            raise ClientDisconnected()
+        raise asyncio.TimeoutError()
+    finally:
+        waiter.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)